@@ -0,0 +1,451 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Local agent process that executes command line interface calls. The agent
+listens on a Unix domain socket. It keeps one API client for each client
+configuration (i.e., API Url, access token, connection and retry settings).
+Connections to the API server, the response cache and the imported command
+modules are reused by all forwarded commands with the same configuration.
+
+A forwarded command is sent as a single JSON line that contains the command
+line arguments, the ROB_* and FLOWSERV_* environment variables and the
+working directory of the caller. The agent writes the output of the command
+back as a sequence of frames. Each frame starts with a one-byte channel
+identifier (standard output, standard error or exit code) and the length of
+the payload as a four-byte unsigned integer. Large outputs are split into
+multiple frames so that the payload of a frame never exceeds a maximum size.
+
+Commands are executed one at a time since the environment, the working
+directory and the standard streams are shared by the whole process. If the
+agent is busy with another command it answers with a busy frame and the
+caller runs the command in its own process. Commands cannot read from
+standard input.
+"""
+
+import io
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import traceback
+
+from robclient.protocol import HEADER_TOKEN
+
+import robclient.config as config
+
+
+"""Frame channel identifier."""
+CHANNEL_BUSY = b'b'
+CHANNEL_EXIT = b'x'
+CHANNEL_STDERR = b'e'
+CHANNEL_STDOUT = b'o'
+
+"""Frame header with channel identifier and payload length."""
+FRAME_HEADER = struct.Struct('>cI')
+
+"""Maximum size (in bytes) of the payload of a single frame."""
+MAX_FRAME_SIZE = 64 * 1024
+
+"""Prefixes of environment variables that are forwarded to the agent."""
+FORWARD_PREFIXES = ('ROB_', 'FLOWSERV_')
+
+"""Agent requests."""
+REQUEST_RUN = 'run'
+REQUEST_STATUS = 'status'
+REQUEST_STOP = 'stop'
+
+
+class Agent(object):
+    """Agent that executes forwarded commands in the current process. The
+    agent holds the API clients for all forwarded commands. Commands only see
+    the ROB_* and FLOWSERV_* environment variables of the caller.
+    """
+    def __init__(self, filename):
+        """Initialize the socket file and the shared state.
+
+        Parameters
+        ----------
+        filename: string
+            Path to the Unix domain socket
+        """
+        self.filename = filename
+        self.clients = dict()
+        self.count = 0
+        self.lock = threading.Lock()
+        self.server = None
+
+    def client(self):
+        """Get the API client for the client configuration in the current
+        environment. A new client is created on first use.
+
+        Returns
+        -------
+        robclient.api.Client
+        """
+        from robclient.api import Client
+        from robclient.cache import ResponseCache
+        from robclient.route import UrlFactory
+        from robclient.session import ClientSession
+        key = (
+            config.API_URL(),
+            config.ACCESS_TOKEN(),
+            config.POOL_SIZE(),
+            config.KEEP_ALIVE(),
+            config.RETRIES(),
+            config.CHUNK_SIZE(),
+            config.CACHE_DIR(),
+            config.CACHE_SIZE()
+        )
+        client = self.clients.get(key)
+        if client is None:
+            url, token, pool_size, keep_alive, retries, chunk_size = key[:6]
+            try:
+                cache = ResponseCache(directory=key[6], max_size=key[7])
+            except OSError:
+                cache = None
+            session = ClientSession(
+                headers={HEADER_TOKEN: token},
+                pool_size=pool_size,
+                keep_alive=keep_alive,
+                retries=retries
+            )
+            client = Client(
+                urls=UrlFactory(base_url=url),
+                session=session,
+                chunk_size=chunk_size,
+                cache=cache
+            )
+            self.clients[key] = client
+        return client
+
+    def close(self):
+        """Close the connections of all API clients."""
+        for client in self.clients.values():
+            client.close()
+        self.clients = dict()
+
+    def execute(self, request, sink):
+        """Execute a forwarded command and write the output frames to the
+        given sink. The environment variables and the working directory of
+        the caller are set while the command runs. If another command is
+        running a busy frame is written and the command is not executed.
+        Returns the exit code of the command or None if the agent is busy.
+
+        Parameters
+        ----------
+        request: dict
+            Forwarded command
+        sink: file-like object
+            Binary output stream
+
+        Returns
+        -------
+        int
+        """
+        from robclient.cli.base import invoke
+        if not self.lock.acquire(blocking=False):
+            try:
+                write_frame(sink, CHANNEL_BUSY, b'')
+            except OSError:
+                pass
+            return None
+        stdout = frame_writer(sink, CHANNEL_STDOUT)
+        stderr = frame_writer(sink, CHANNEL_STDERR)
+        environ = dict(os.environ)
+        cwd = os.getcwd()
+        streams = (sys.stdin, sys.stdout, sys.stderr)
+        try:
+            for key in list(os.environ):
+                if key.startswith(FORWARD_PREFIXES):
+                    del os.environ[key]
+            os.environ.update(request.get('env', dict()))
+            sys.stdin = io.StringIO()
+            sys.stdout, sys.stderr = stdout, stderr
+            os.chdir(request.get('cwd', cwd))
+            argv = request.get('argv', list())
+            if argv[:1] == ['agent']:
+                print('agent commands cannot be forwarded', file=stderr)
+                code = 2
+            else:
+                code = invoke(argv, self.client())
+            self.count += 1
+        except Exception:
+            try:
+                traceback.print_exc()
+            except OSError:
+                pass
+            code = 1
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = streams
+            os.environ.clear()
+            os.environ.update(environ)
+            os.chdir(cwd)
+            self.lock.release()
+        try:
+            stdout.flush()
+            stderr.flush()
+            write_frame(sink, CHANNEL_EXIT, str(code).encode('ascii'))
+        except OSError:
+            # The caller closed the connection.
+            pass
+        return code
+
+    def handle(self, rfile, wfile):
+        """Handle a request on a new connection.
+
+        Parameters
+        ----------
+        rfile: file-like object
+            Binary input stream of the connection
+        wfile: file-like object
+            Binary output stream of the connection
+        """
+        try:
+            request = json.loads(rfile.readline().decode('utf-8'))
+        except ValueError:
+            return
+        op = request.get('request', REQUEST_RUN)
+        if op == REQUEST_RUN:
+            self.execute(request, wfile)
+        elif op == REQUEST_STATUS:
+            status = {
+                'pid': os.getpid(),
+                'socket': self.filename,
+                'commands': self.count,
+                'clients': len(self.clients)
+            }
+            data = (json.dumps(status, indent=4) + '\n').encode('utf-8')
+            write_frame(wfile, CHANNEL_STDOUT, data)
+            write_frame(wfile, CHANNEL_EXIT, b'0')
+        elif op == REQUEST_STOP:
+            write_frame(wfile, CHANNEL_EXIT, b'0')
+            # The server is shut down from a separate thread since shutdown()
+            # waits for the request loop to finish.
+            threading.Thread(target=self.server.shutdown).start()
+        wfile.flush()
+
+    def serve(self):
+        """Listen for forwarded commands until the agent is stopped. The
+        socket file is only accessible by the current user and it is removed
+        when the agent stops.
+
+        Raises
+        ------
+        ValueError
+        """
+        import socketserver
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError('Unix domain sockets are not supported')
+        if is_running(self.filename):
+            msg = "agent is already running at '{}'"
+            raise ValueError(msg.format(self.filename))
+        dirname = os.path.dirname(os.path.abspath(self.filename))
+        os.makedirs(dirname, exist_ok=True)
+        if os.path.exists(self.filename):
+            # Remove the socket of an agent that was not stopped properly.
+            os.remove(self.filename)
+        agent = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                agent.handle(self.rfile, self.wfile)
+
+        class Server(
+            socketserver.ThreadingMixIn,
+            socketserver.UnixStreamServer
+        ):
+            daemon_threads = True
+
+        umask = os.umask(0o077)
+        try:
+            self.server = Server(self.filename, Handler)
+        finally:
+            os.umask(umask)
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.close()
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+
+
+class FrameStream(io.RawIOBase):
+    """Raw output stream that writes data as frames for a given channel."""
+    def __init__(self, sink, channel):
+        """Initialize the output stream and the channel identifier.
+
+        Parameters
+        ----------
+        sink: file-like object
+            Binary output stream of the connection
+        channel: bytes
+            Channel identifier
+        """
+        self.sink = sink
+        self.channel = channel
+
+    def writable(self):
+        """The stream is writable.
+
+        Returns
+        -------
+        bool
+        """
+        return True
+
+    def write(self, data):
+        """Write data as a sequence of frames that do not exceed the maximum
+        frame size.
+
+        Parameters
+        ----------
+        data: bytes
+            Output data
+
+        Returns
+        -------
+        int
+        """
+        data = bytes(data)
+        for pos in range(0, len(data), MAX_FRAME_SIZE):
+            chunk = data[pos:pos + MAX_FRAME_SIZE]
+            write_frame(self.sink, self.channel, chunk)
+        return len(data)
+
+
+# -- Client functions ---------------------------------------------------------
+
+def forward(argv, filename=None, request=REQUEST_RUN):
+    """Forward a command to the agent. Output of the command is written to
+    the standard output and standard error streams. Returns the exit code of
+    the command or None if no agent is listening on the socket or if the
+    agent is busy with another command.
+
+    Parameters
+    ----------
+    argv: list(string)
+        Command line arguments
+    filename: string, optional
+        Path to the Unix domain socket. The default is read from the
+        environment.
+    request: string, default='run'
+        Request type
+
+    Returns
+    -------
+    int
+    """
+    if filename is None:
+        filename = config.AGENT_SOCKET()
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(filename)
+    except OSError:
+        sock.close()
+        return None
+    env = dict()
+    for key, value in os.environ.items():
+        if key.startswith(FORWARD_PREFIXES):
+            env[key] = value
+    doc = {'request': request, 'argv': argv, 'env': env, 'cwd': os.getcwd()}
+    with sock:
+        sock.sendall((json.dumps(doc) + '\n').encode('utf-8'))
+        rfile = sock.makefile('rb')
+        stdout = getattr(sys.stdout, 'buffer', sys.stdout)
+        stderr = getattr(sys.stderr, 'buffer', sys.stderr)
+        while True:
+            header = rfile.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                # The agent closed the connection unexpectedly.
+                return 1
+            channel, size = FRAME_HEADER.unpack(header)
+            if size > MAX_FRAME_SIZE:
+                # The stream is corrupted.
+                return 1
+            data = rfile.read(size)
+            if len(data) < size:
+                return 1
+            if channel == CHANNEL_BUSY:
+                return None
+            if channel == CHANNEL_EXIT:
+                return int(data)
+            target = stdout if channel == CHANNEL_STDOUT else stderr
+            target.write(data)
+            target.flush()
+
+
+def is_running(filename=None):
+    """Test if an agent is listening on the given socket.
+
+    Parameters
+    ----------
+    filename: string, optional
+        Path to the Unix domain socket
+
+    Returns
+    -------
+    bool
+    """
+    if filename is None:
+        filename = config.AGENT_SOCKET()
+    if not hasattr(socket, 'AF_UNIX'):
+        return False
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(filename)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def frame_writer(sink, channel):
+    """Get a text stream that writes its output as frames for the given
+    channel. The stream is line buffered. The binary buffer of the stream
+    can be used for binary output.
+
+    Parameters
+    ----------
+    sink: file-like object
+        Binary output stream of the connection
+    channel: bytes
+        Channel identifier
+
+    Returns
+    -------
+    io.TextIOWrapper
+    """
+    return io.TextIOWrapper(
+        io.BufferedWriter(FrameStream(sink, channel)),
+        encoding='utf-8',
+        line_buffering=True
+    )
+
+
+def write_frame(sink, channel, data):
+    """Write a frame with the given channel identifier and payload.
+
+    Parameters
+    ----------
+    sink: file-like object
+        Binary output stream of the connection
+    channel: bytes
+        Channel identifier
+    data: bytes
+        Frame payload
+    """
+    sink.write(FRAME_HEADER.pack(channel, len(data)) + data)
+    sink.flush()
@@ -0,0 +1,244 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Asynchronous client for the read-only routes of the Web API that are
+queried in bulk (runs and leaderboards). Multiple requests are sent
+concurrently while the number of requests that are in flight at the same time
+is bounded by a concurrency limit.
+
+The asynchronous client requires the optional 'aiohttp' package (install with
+``pip install rob-client[aio]``).
+"""
+
+import aiohttp
+import asyncio
+
+from robclient.protocol import HEADER_TOKEN
+from robclient.route import UrlFactory
+
+import robclient.config as config
+
+
+"""Default number of requests that are sent concurrently."""
+DEFAULT_CONCURRENCY = 10
+
+
+class AsyncClient(object):
+    """Asynchronous client for the Web API. The client is used as an
+    asynchronous context manager that opens and closes the underlying
+    connection pool.
+
+    Example
+    -------
+    async with AsyncClient(concurrency=20) as client:
+        runs = await client.get_runs(run_ids)
+    """
+    def __init__(self, urls=None, access_token=None, concurrency=None):
+        """Initialize the Url factory, the request headers and the limit for
+        the number of concurrent requests.
+
+        Parameters
+        ----------
+        urls: robclient.route.UrlFactory, optional
+            Factory for API resource Urls
+        access_token: string, optional
+            User access token
+        concurrency: int, optional
+            Maximum number of concurrent requests
+        """
+        self.urls = urls if urls is not None else UrlFactory()
+        if access_token is None:
+            access_token = config.ACCESS_TOKEN()
+        self.headers = {HEADER_TOKEN: access_token}
+        self.concurrency = concurrency if concurrency else DEFAULT_CONCURRENCY
+        self.session = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        """Open the connection pool when entering the context."""
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Close the connection pool when leaving the context."""
+        await self.close()
+
+    async def close(self):
+        """Close all connections in the connection pool."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get(self, url):
+        """Send GET request and return the parsed response body. The request
+        waits until the number of requests in flight is below the concurrency
+        limit.
+
+        Parameters
+        ----------
+        url: string
+            Request Url
+
+        Returns
+        -------
+        dict
+
+        Raises
+        ------
+        aiohttp.ClientError
+        """
+        async with self.semaphore:
+            async with self.session.get(url) as r:
+                r.raise_for_status()
+                return await r.json()
+
+    async def get_leaderboard(self, benchmark_id, include_all=None):
+        """Get the current leaderboard for a benchmark.
+
+        Parameters
+        ----------
+        benchmark_id: string
+            Unique benchmark identifier
+        include_all: bool, optional
+            Flag to return all results and not just one result per submission
+
+        Returns
+        -------
+        dict
+        """
+        url = self.urls.get_leaderboard(benchmark_id, include_all=include_all)
+        return await self.get(url)
+
+    async def get_leaderboards(self, benchmark_ids, include_all=None):
+        """Get leaderboards for multiple benchmarks concurrently. The result
+        is a list of leaderboards in the order of the given identifier.
+
+        Parameters
+        ----------
+        benchmark_ids: list(string)
+            List of unique benchmark identifier
+        include_all: bool, optional
+            Flag to return all results and not just one result per submission
+
+        Returns
+        -------
+        list(dict)
+        """
+        return await asyncio.gather(*[
+            self.get_leaderboard(b_id, include_all=include_all)
+            for b_id in benchmark_ids
+        ])
+
+    async def get_run(self, run_id):
+        """Get run handle.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier
+
+        Returns
+        -------
+        dict
+        """
+        return await self.get(self.urls.get_run(run_id=run_id))
+
+    async def get_runs(self, run_ids):
+        """Get handles for multiple runs concurrently. The result is a list of
+        run handles in the order of the given identifier.
+
+        Parameters
+        ----------
+        run_ids: list(string)
+            List of unique run identifier
+
+        Returns
+        -------
+        list(dict)
+        """
+        return await asyncio.gather(*[self.get_run(r_id) for r_id in run_ids])
+
+    async def list_runs(self, submission_id):
+        """Get listing of runs for a submission.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+
+        Returns
+        -------
+        dict
+        """
+        return await self.get(self.urls.list_runs(submission_id=submission_id))
+
+    async def list_runs_for_submissions(self, submission_ids):
+        """Get run listings for multiple submissions concurrently. The result
+        is a list of run listings in the order of the given identifier.
+
+        Parameters
+        ----------
+        submission_ids: list(string)
+            List of unique submission identifier
+
+        Returns
+        -------
+        list(dict)
+        """
+        return await asyncio.gather(*[
+            self.list_runs(s_id) for s_id in submission_ids
+        ])
+
+    async def open(self):
+        """Open the connection pool. The pool size matches the concurrency
+        limit.
+        """
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector
+            )
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+
+
+# -- Synchronous wrappers -----------------------------------------------------
+
+def get_runs(run_ids, concurrency=None, urls=None, access_token=None):
+    """Get handles for multiple runs concurrently from synchronous code.
+
+    Parameters
+    ----------
+    run_ids: list(string)
+        List of unique run identifier
+    concurrency: int, optional
+        Maximum number of concurrent requests
+    urls: robclient.route.UrlFactory, optional
+        Factory for API resource Urls
+    access_token: string, optional
+        User access token
+
+    Returns
+    -------
+    list(dict)
+    """
+    async def fetch():
+        async with AsyncClient(
+            urls=urls,
+            access_token=access_token,
+            concurrency=concurrency
+        ) as client:
+            return await client.get_runs(run_ids)
+
+    # Use a new event loop instead of asyncio.run() which is not available in
+    # Python 3.6.
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(fetch())
+    finally:
+        loop.close()
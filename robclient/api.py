@@ -0,0 +1,969 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Programmatic client for the Reproducible Open Benchmark Web API. The client
+provides a method for each API route. Methods return the parsed body of the
+API response. Errors are raised as the respective requests exceptions.
+"""
+
+import os
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from robclient.cache import cache_key, is_fresh, validators
+from robclient.download import DEFAULT_JOBS, download, download_files
+from robclient.download import download_segmented
+from robclient.route import UrlFactory
+from robclient.protocol import HEADER_TOKEN
+from robclient.retry import HEADER_IDEMPOTENCY_KEY, idempotency_key
+from robclient.session import ClientSession
+from robclient.stream import open_stream
+from robclient.upload import MultipartFile
+
+import robclient.config as config
+
+
+class Client(object):
+    """Client for the Web API. All requests are sent using a shared session.
+    The Url factory is used to generate the Urls for the API resources.
+    """
+    def __init__(
+        self, urls=None, session=None, access_token=None, chunk_size=None,
+        cache=None
+    ):
+        """Initialize the Url factory and the session. If no session is given a
+        new session is created that carries the given access token. If the
+        access token is not given the value is read from the environment.
+
+        Parameters
+        ----------
+        urls: robclient.route.UrlFactory, optional
+            Factory for API resource Urls
+        session: robclient.session.ClientSession, optional
+            Shared session for API requests
+        access_token: string, optional
+            User access token
+        chunk_size: int, optional
+            Size of chunks (in bytes) that are written to disk when
+            downloading files
+        cache: robclient.cache.ResponseCache, optional
+            Cache for responses of read-only requests. Responses are not
+            cached if no cache is given.
+        """
+        self.urls = urls if urls is not None else UrlFactory()
+        if session is None:
+            if access_token is None:
+                access_token = config.ACCESS_TOKEN()
+            session = ClientSession(
+                headers={HEADER_TOKEN: access_token},
+                pool_size=config.POOL_SIZE(),
+                keep_alive=config.KEEP_ALIVE(),
+                retries=config.RETRIES()
+            )
+        self.session = session
+        if chunk_size is None:
+            chunk_size = config.CHUNK_SIZE()
+        self.chunk_size = chunk_size
+        self.cache = cache
+
+    def close(self):
+        """Close the connections of the underlying session."""
+        self.session.close()
+
+    # -- Benchmarks -----------------------------------------------------------
+
+    def download_benchmark_archive(
+        self, benchmark_id, filename=None, segments=None
+    ):
+        """Download the archive containing all resources for a benchmark. If no
+        output file is given the name from the response header is used.
+
+        Parameters
+        ----------
+        benchmark_id: string
+            Unique benchmark identifier
+        filename: string, optional
+            Output file
+        segments: int, optional
+            Number of parallel connections for a segmented download
+
+        Returns
+        -------
+        string
+        """
+        url = self.urls.download_benchmark_archive(benchmark_id=benchmark_id)
+        return self.download(url, filename=filename, segments=segments)
+
+    def download_benchmark_file(
+        self, benchmark_id, resource_id, filename=None
+    ):
+        """Download a benchmark resource file. If no output file is given the
+        name from the response header is used.
+
+        Parameters
+        ----------
+        benchmark_id: string
+            Unique benchmark identifier
+        resource_id: string
+            Unique resource identifier
+        filename: string, optional
+            Output file
+
+        Returns
+        -------
+        string
+        """
+        url = self.urls.download_benchmark_file(
+            benchmark_id=benchmark_id,
+            resource_id=resource_id
+        )
+        return self.download(url, filename=filename)
+
+    def download_benchmark_resources(
+        self, benchmark_id, targetdir, resource_ids=None, jobs=None,
+        callback=None
+    ):
+        """Download post-processing resource files for a benchmark in
+        parallel. Files are stored in the target directory under their
+        resource name. If no resource identifier are given all resources are
+        downloaded.
+
+        Parameters
+        ----------
+        benchmark_id: string
+            Unique benchmark identifier
+        targetdir: string
+            Path to the output directory
+        resource_ids: list(string), optional
+            Identifier of resources that are downloaded
+        jobs: int, optional
+            Number of parallel downloads
+        callback: callable, optional
+            Function that is called for each downloaded file
+
+        Returns
+        -------
+        list(string)
+
+        Raises
+        ------
+        ValueError
+        """
+        body = self.get_benchmark(benchmark_id)
+        resources = body.get('postproc', dict()).get('resources', list())
+        files = list()
+        for res in select_resources(resources, resource_ids):
+            url = self.urls.download_benchmark_file(
+                benchmark_id=benchmark_id,
+                resource_id=res['id']
+            )
+            files.append((url, resource_path(targetdir, res['name'])))
+        return self.download_files(files, jobs=jobs, callback=callback)
+
+    def get_benchmark(self, benchmark_id):
+        """Get benchmark handle.
+
+        Parameters
+        ----------
+        benchmark_id: string
+            Unique benchmark identifier
+
+        Returns
+        -------
+        dict
+        """
+        return self.get(self.urls.get_benchmark(benchmark_id), cached=True)
+
+    def get_leaderboard(self, benchmark_id, include_all=None):
+        """Get the current leaderboard for a benchmark.
+
+        Parameters
+        ----------
+        benchmark_id: string
+            Unique benchmark identifier
+        include_all: bool, optional
+            Flag to return all results and not just one result per submission
+
+        Returns
+        -------
+        dict
+        """
+        url = self.urls.get_leaderboard(benchmark_id, include_all=include_all)
+        return self.get(url, cached=True)
+
+    def list_benchmarks(self):
+        """Get listing of all benchmarks.
+
+        Returns
+        -------
+        dict
+        """
+        return self.get(self.urls.list_benchmarks(), cached=True)
+
+    def stream_leaderboard(self, benchmark_id, include_all=None):
+        """Get the current leaderboard for a benchmark as a stream of ranking
+        entries. The result schema is available via the get() method of the
+        returned stream.
+
+        Parameters
+        ----------
+        benchmark_id: string
+            Unique benchmark identifier
+        include_all: bool, optional
+            Flag to return all results and not just one result per submission
+
+        Returns
+        -------
+        robclient.stream.ListStream
+        """
+        url = self.urls.get_leaderboard(benchmark_id, include_all=include_all)
+        return self.stream(url, 'ranking')
+
+    # -- Files ----------------------------------------------------------------
+
+    def delete_file(self, submission_id, file_id):
+        """Delete a previously uploaded file.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+        file_id: string
+            Unique file identifier
+        """
+        url = self.urls.delete_file(
+            submission_id=submission_id,
+            file_id=file_id
+        )
+        r = self.session.delete(url)
+        r.raise_for_status()
+
+    def download_file(self, submission_id, file_id, filename=None):
+        """Download a previously uploaded file. If no output file is given the
+        name from the response header is used.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+        file_id: string
+            Unique file identifier
+        filename: string, optional
+            Output file
+
+        Returns
+        -------
+        string
+        """
+        url = self.urls.download_file(
+            submission_id=submission_id,
+            file_id=file_id
+        )
+        return self.download(url, filename=filename)
+
+    def list_files(self, submission_id):
+        """Get listing of uploaded files for a submission.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+
+        Returns
+        -------
+        dict
+        """
+        return self.get(self.urls.list_files(submission_id=submission_id))
+
+    def upload_file(self, submission_id, filename, name=None, callback=None):
+        """Upload a file for a submission. The request body is streamed from
+        the file. The optional callback is called with the number of bytes
+        of the file that were sent so far and the file size.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+        filename: string
+            Path to the local file
+        name: string, optional
+            Name of the uploaded file. By default, the base name of the local
+            file is used.
+        callback: callable, optional
+            Progress callback
+
+        Returns
+        -------
+        dict
+        """
+        url = self.urls.upload_file(submission_id=submission_id)
+        body = MultipartFile(
+            filename,
+            name=name,
+            chunk_size=self.chunk_size,
+            callback=callback
+        )
+        headers = {'Content-Type': body.content_type}
+        r = self.session.post(url, data=body, headers=headers)
+        r.raise_for_status()
+        return r.json()
+
+    def upload_files(self, submission_id, files, jobs=None, callback=None):
+        """Upload multiple files for a submission in parallel. Files are given
+        as a list of tuples containing the local file path and the name of the
+        uploaded file. After each upload the callback is called with the
+        response body, the number of completed uploads and the total number of
+        files. The result contains the response bodies in the order of the
+        given files.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+        files: list(tuple(string, string))
+            List of file path and file name pairs
+        jobs: int, optional
+            Number of parallel uploads
+        callback: callable, optional
+            Function that is called for each uploaded file
+
+        Returns
+        -------
+        list(dict)
+        """
+        jobs = jobs if jobs else DEFAULT_JOBS
+        self.session.ensure_pool_size(jobs)
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(self.upload_file, submission_id, path, name)
+                for path, name in files
+            ]
+            count = 0
+            for future in as_completed(futures):
+                body = future.result()
+                count += 1
+                if callback is not None:
+                    callback(body, count, len(futures))
+        return [future.result() for future in futures]
+
+    # -- Runs -----------------------------------------------------------------
+
+    def cancel_run(self, run_id, reason=None):
+        """Cancel an active run.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier
+        reason: string, optional
+            Reason for canceling the run
+
+        Returns
+        -------
+        dict
+        """
+        data = {'reason': reason if reason is not None else 'User request'}
+        return self.put(self.urls.cancel_run(run_id=run_id), data)
+
+    def delete_run(self, run_id):
+        """Delete a run.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier
+        """
+        r = self.session.delete(self.urls.delete_run(run_id=run_id))
+        r.raise_for_status()
+
+    def download_run_archive(self, run_id, filename=None, segments=None):
+        """Download the archive containing all result files for a run. If no
+        output file is given the name from the response header is used.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier
+        filename: string, optional
+            Output file
+        segments: int, optional
+            Number of parallel connections for a segmented download
+
+        Returns
+        -------
+        string
+        """
+        url = self.urls.download_run_archive(run_id=run_id)
+        return self.download(url, filename=filename, segments=segments)
+
+    def download_run_file(self, run_id, resource_id, filename=None):
+        """Download a run result file. If no output file is given the name from
+        the response header is used.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier
+        resource_id: string
+            Unique resource identifier
+        filename: string, optional
+            Output file
+
+        Returns
+        -------
+        string
+        """
+        url = self.urls.download_run_file(
+            run_id=run_id,
+            resource_id=resource_id
+        )
+        return self.download(url, filename=filename)
+
+    def download_run_resources(
+        self, run_id, targetdir, resource_ids=None, jobs=None, callback=None
+    ):
+        """Download result files for a run in parallel. Files are stored in the
+        target directory under their resource name. If no resource identifier
+        are given all resources are downloaded.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier
+        targetdir: string
+            Path to the output directory
+        resource_ids: list(string), optional
+            Identifier of resources that are downloaded
+        jobs: int, optional
+            Number of parallel downloads
+        callback: callable, optional
+            Function that is called for each downloaded file
+
+        Returns
+        -------
+        list(string)
+
+        Raises
+        ------
+        ValueError
+        """
+        body = self.get_run(run_id)
+        resources = body.get('resources', list())
+        files = list()
+        for res in select_resources(resources, resource_ids):
+            url = self.urls.download_run_file(
+                run_id=run_id,
+                resource_id=res['id']
+            )
+            files.append((url, resource_path(targetdir, res['name'])))
+        return self.download_files(files, jobs=jobs, callback=callback)
+
+    def get_run(self, run_id):
+        """Get run handle.
+
+        Parameters
+        ----------
+        run_id: string
+            Unique run identifier
+
+        Returns
+        -------
+        dict
+        """
+        return self.get(self.urls.get_run(run_id=run_id))
+
+    def list_runs(self, submission_id):
+        """Get listing of runs for a submission.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+
+        Returns
+        -------
+        dict
+        """
+        return self.get(self.urls.list_runs(submission_id=submission_id))
+
+    def start_run(self, submission_id, arguments, key=None):
+        """Start a new run for a submission. The request carries an
+        idempotency key so that it can be repeated without starting a second
+        run.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+        arguments: list(dict)
+            List of serialized run arguments
+        key: string, optional
+            Idempotency key for the request. A new unique key is used by
+            default.
+
+        Returns
+        -------
+        dict
+        """
+        url = self.urls.start_run(submission_id=submission_id)
+        if key is None:
+            key = idempotency_key()
+        return self.post(url, {'arguments': arguments}, key=key)
+
+    def stream_runs(self, submission_id):
+        """Get listing of runs for a submission as a stream of run handles.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+
+        Returns
+        -------
+        robclient.stream.ListStream
+        """
+        url = self.urls.list_runs(submission_id=submission_id)
+        return self.stream(url, 'runs')
+
+    # -- Submissions ----------------------------------------------------------
+
+    def create_submission(self, benchmark_id, name, members=None):
+        """Create a new submission for a benchmark.
+
+        Parameters
+        ----------
+        benchmark_id: string
+            Unique benchmark identifier
+        name: string
+            Submission name
+        members: list(string), optional
+            List of user identifier for submission members
+
+        Returns
+        -------
+        dict
+        """
+        data = {'name': name}
+        if members is not None:
+            data['members'] = members
+        url = self.urls.create_submission(benchmark_id=benchmark_id)
+        return self.post(url, data, key=idempotency_key())
+
+    def delete_submission(self, submission_id):
+        """Delete a submission.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+        """
+        url = self.urls.delete_submission(submission_id=submission_id)
+        r = self.session.delete(url)
+        r.raise_for_status()
+
+    def get_submission(self, submission_id):
+        """Get submission handle.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+
+        Returns
+        -------
+        dict
+        """
+        return self.get(self.urls.get_submission(submission_id))
+
+    def list_submissions(self, benchmark_id=None):
+        """Get listing of submissions for a benchmark or the current user.
+
+        Parameters
+        ----------
+        benchmark_id: string, optional
+            Unique benchmark identifier
+
+        Returns
+        -------
+        dict
+        """
+        url = self.urls.list_submissions(benchmark_id=benchmark_id)
+        return self.get(url, cached=True)
+
+    def stream_submissions(self, benchmark_id=None):
+        """Get listing of submissions for a benchmark or the current user as a
+        stream of submission handles.
+
+        Parameters
+        ----------
+        benchmark_id: string, optional
+            Unique benchmark identifier
+
+        Returns
+        -------
+        robclient.stream.ListStream
+        """
+        url = self.urls.list_submissions(benchmark_id=benchmark_id)
+        return self.stream(url, 'submissions')
+
+    def update_submission(self, submission_id, name=None, members=None):
+        """Update name and/or members of a submission.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+        name: string, optional
+            New submission name
+        members: list(string), optional
+            List of user identifier for submission members
+
+        Returns
+        -------
+        dict
+        """
+        data = dict()
+        if name is not None:
+            data['name'] = name
+        if members is not None:
+            data['members'] = members
+        url = self.urls.update_submission(submission_id=submission_id)
+        return self.put(url, data)
+
+    # -- Users ----------------------------------------------------------------
+
+    def list_users(self):
+        """Get listing of registered users.
+
+        Returns
+        -------
+        dict
+        """
+        return self.get(self.urls.list_users())
+
+    def login(self, username, password):
+        """Login user to obtain an access token.
+
+        Parameters
+        ----------
+        username: string
+            User name
+        password: string
+            User password
+
+        Returns
+        -------
+        dict
+        """
+        data = {'username': username, 'password': password}
+        return self.post(self.urls.login(), data)
+
+    def logout(self):
+        """Logout from the current user session.
+
+        Returns
+        -------
+        dict
+        """
+        return self.post(self.urls.logout())
+
+    def register_user(self, username, password, verify=False):
+        """Register a new user.
+
+        Parameters
+        ----------
+        username: string
+            User name
+        password: string
+            User password
+        verify: bool, default=False
+            Require verification of the user account
+
+        Returns
+        -------
+        dict
+        """
+        data = {'username': username, 'password': password, 'verify': verify}
+        return self.post(self.urls.register_user(), data)
+
+    def request_password_reset(self, username):
+        """Request a password reset for the given user.
+
+        Parameters
+        ----------
+        username: string
+            User name
+
+        Returns
+        -------
+        dict
+        """
+        url = self.urls.request_password_reset()
+        return self.post(url, {'username': username})
+
+    def reset_password(self, request_id, password):
+        """Set a new password for the user that requested the reset.
+
+        Parameters
+        ----------
+        request_id: string
+            Unique password reset request identifier
+        password: string
+            New user password
+
+        Returns
+        -------
+        dict
+        """
+        data = {'requestId': request_id, 'password': password}
+        return self.post(self.urls.reset_password(), data)
+
+    def stream_users(self):
+        """Get listing of registered users as a stream of user handles.
+
+        Returns
+        -------
+        robclient.stream.ListStream
+        """
+        return self.stream(self.urls.list_users(), 'users')
+
+    def whoami(self):
+        """Get information about the user that is logged in.
+
+        Returns
+        -------
+        dict
+        """
+        return self.get(self.urls.whoami())
+
+    # -- Helper methods -------------------------------------------------------
+
+    def download(self, url, filename=None, segments=None):
+        """Download the file at the given Url. If no output file is given the
+        name from the Content-Disposition header of the response is used. If
+        the number of segments is greater than one, the file is fetched in
+        byte ranges over parallel connections.
+
+        Parameters
+        ----------
+        url: string
+            Resource Url
+        filename: string, optional
+            Output file
+        segments: int, optional
+            Number of parallel connections for a segmented download
+
+        Returns
+        -------
+        string
+
+        Raises
+        ------
+        ValueError
+        """
+        if segments is not None and segments > 1:
+            return download_segmented(
+                self.session,
+                url,
+                filename=filename,
+                segments=segments,
+                chunk_size=self.chunk_size
+            )
+        return download(
+            self.session,
+            url,
+            filename=filename,
+            chunk_size=self.chunk_size
+        )
+
+    def download_files(self, files, jobs=None, callback=None):
+        """Download multiple files in parallel. Files are given as a list of
+        resource Url and output file pairs.
+
+        Parameters
+        ----------
+        files: list(tuple(string, string))
+            List of resource Url and output file pairs
+        jobs: int, optional
+            Number of parallel downloads
+        callback: callable, optional
+            Function that is called for each downloaded file
+
+        Returns
+        -------
+        list(string)
+        """
+        return download_files(
+            self.session,
+            files,
+            jobs=jobs,
+            chunk_size=self.chunk_size,
+            callback=callback
+        )
+
+    def get(self, url, cached=False):
+        """Send GET request and return the parsed response body. If the cached
+        flag is True and the client has a response cache, fresh responses are
+        taken from the cache and stale responses are revalidated.
+
+        Parameters
+        ----------
+        url: string
+            Request Url
+        cached: bool, default=False
+            Use the response cache for the request
+
+        Returns
+        -------
+        dict
+        """
+        if not cached or self.cache is None:
+            r = self.session.get(url)
+            r.raise_for_status()
+            return r.json()
+        key = cache_key(url, self.session.headers.get(HEADER_TOKEN))
+        entry = self.cache.get(key)
+        if entry is None:
+            r = self.session.get(url)
+        elif is_fresh(entry):
+            return entry['body']
+        else:
+            r = self.session.get(url, headers=validators(entry))
+            if r.status_code == 304:
+                self.cache.refresh(key, entry, r)
+                return entry['body']
+        r.raise_for_status()
+        body = r.json()
+        self.cache.put(key, url, r, body)
+        return body
+
+    def post(self, url, data=None, key=None):
+        """Send POST request with the given JSON data and return the parsed
+        response body. Requests that create a resource carry an idempotency
+        key so that the request can be repeated after a transient error
+        without creating a duplicate resource.
+
+        Parameters
+        ----------
+        url: string
+            Request Url
+        data: dict, optional
+            Request body
+        key: string, optional
+            Idempotency key for the request
+
+        Returns
+        -------
+        dict
+        """
+        headers = None
+        if key is not None:
+            headers = {HEADER_IDEMPOTENCY_KEY: key}
+        r = self.session.post(url, json=data, headers=headers)
+        r.raise_for_status()
+        return r.json()
+
+    def put(self, url, data=None):
+        """Send PUT request with the given JSON data and return the parsed
+        response body.
+
+        Parameters
+        ----------
+        url: string
+            Request Url
+        data: dict, optional
+            Request body
+
+        Returns
+        -------
+        dict
+        """
+        r = self.session.put(url, json=data)
+        r.raise_for_status()
+        return r.json()
+
+    def stream(self, url, key):
+        """Send GET request and return a stream over the items of the list
+        with the given key in the response body. The response body is parsed
+        incrementally while the items are consumed. Responses are not cached.
+
+        Parameters
+        ----------
+        url: string
+            Request Url
+        key: string
+            Key of the list element in the response body
+
+        Returns
+        -------
+        robclient.stream.ListStream
+        """
+        r = self.session.get(url, stream=True)
+        if not r.ok:
+            # Release the connection before raising the error.
+            r.close()
+        r.raise_for_status()
+        return open_stream(r, key)
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def resource_path(targetdir, name):
+    """Get the output path for a resource file in the target directory. Raises
+    an error if the resource name references a location outside of the target
+    directory.
+
+    Parameters
+    ----------
+    targetdir: string
+        Path to the output directory
+    name: string
+        Resource name (relative file path)
+
+    Returns
+    -------
+    string
+
+    Raises
+    ------
+    ValueError
+    """
+    relpath = os.path.normpath(name)
+    if os.path.isabs(relpath) or relpath.split(os.sep)[0] == os.pardir:
+        raise ValueError('invalid resource name \'{}\''.format(name))
+    return os.path.join(targetdir, relpath)
+
+
+def select_resources(resources, resource_ids=None):
+    """Get the list of resources with the given identifier. Returns all
+    resources if the list of identifier is None.
+
+    Parameters
+    ----------
+    resources: list(dict)
+        List of resource descriptors
+    resource_ids: list(string), optional
+        Identifier of selected resources
+
+    Returns
+    -------
+    list(dict)
+
+    Raises
+    ------
+    ValueError
+    """
+    if resource_ids is None:
+        return resources
+    index = dict([(res['id'], res) for res in resources])
+    result = list()
+    for res_id in resource_ids:
+        if res_id not in index:
+            raise ValueError('unknown resource \'{}\''.format(res_id))
+        result.append(index[res_id])
+    return result
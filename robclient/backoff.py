@@ -0,0 +1,56 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Exponential backoff with jitter for repeated requests to the API (e.g.,
+polling the state of a run).
+"""
+
+import random
+
+
+class Backoff(object):
+    """Generator for exponentially increasing delays. Each delay is the
+    previous delay multiplied by a constant factor, up to a maximum delay. A
+    random jitter is applied to each delay to avoid that multiple clients
+    send their requests at the same time.
+    """
+    def __init__(self, initial=1.0, maximum=30.0, factor=2.0, jitter=0.5):
+        """Initialize the parameters for the delay computation.
+
+        Parameters
+        ----------
+        initial: float, default=1.0
+            Initial delay in seconds
+        maximum: float, default=30.0
+            Maximum delay in seconds
+        factor: float, default=2.0
+            Multiplier for consecutive delays
+        jitter: float, default=0.5
+            Fraction of each delay that is randomized. A value of 0 disables
+            the jitter.
+        """
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+        self.attempt = 0
+
+    def next(self):
+        """Get the next delay in seconds.
+
+        Returns
+        -------
+        float
+        """
+        delay = min(self.maximum, self.initial * self.factor ** self.attempt)
+        self.attempt += 1
+        return delay * (1 - self.jitter * random.random())
+
+    def reset(self):
+        """Start over with the initial delay."""
+        self.attempt = 0
@@ -0,0 +1,362 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Execute a script of command line interface calls in a single process. All
+commands share the same API client, i.e., the connections to the API server
+and the response cache are reused by all commands of the script.
+
+Each line of a script contains a command with the same arguments as the 'rob'
+command (the leading 'rob' is optional). Lines that end with a backslash are
+continued on the next line. Comments start with '#'. Variables are assigned
+with 'NAME=VALUE' or 'export NAME=VALUE' and referenced as $NAME or ${NAME}.
+Exported variables are also set as environment variables for all following
+commands.
+
+.. code-block:: console
+
+    # Create a submission and start a parameter sweep
+    submissions create -n "my submission"
+    files upload -i data/config.json
+    runs sweep -i sweep.yaml
+    runs watch -s ${ROB_SUBMISSION}
+
+Lines of the form 'export NAME=VALUE' that are printed by a command (e.g., by
+'submissions create' or 'login') are applied in the same way, i.e., the
+identifier of a new submission is the default submission for the following
+commands. These commands print JSON instead of exports if the --raw option is
+given. A warning is printed for each of these commands in raw mode.
+"""
+
+import io
+import os
+import re
+import shlex
+import string
+import sys
+
+from robclient.cli.base import invoke
+from robclient.protocol import HEADER_TOKEN
+
+import robclient.config as config
+
+
+"""Pattern for variable assignments."""
+ASSIGNMENT = re.compile(r'^(export\s+)?([A-Za-z_][A-Za-z0-9_]*)=(.*)$')
+
+"""Commands that print variable exports (unless the --raw option is given)."""
+EXPORT_COMMANDS = [
+    ['login'],
+    ['submissions', 'create']
+]
+
+
+class BatchRunner(object):
+    """Run the commands of a batch script with a shared API client. Stops at
+    the first command that exits with a non-zero exit code unless errors are
+    ignored.
+    """
+    def __init__(self, client, options=None, keep_going=False):
+        """Initialize the shared client and the run options.
+
+        Parameters
+        ----------
+        client: robclient.api.Client
+            Shared API client
+        options: list(string), optional
+            Global options that are added to every command (e.g., --raw)
+        keep_going: bool, default=False
+            Continue with the next command after a command failed
+        """
+        self.client = client
+        self.options = options if options else list()
+        self.keep_going = keep_going
+        self.variables = dict()
+
+    def assign(self, name, value, export=False):
+        """Assign a value to a variable. Exported variables are also set in
+        the environment. Changes to the access token are applied to the
+        shared client.
+
+        Parameters
+        ----------
+        name: string
+            Variable name
+        value: string
+            Variable value
+        export: bool, default=False
+            Set the variable in the environment
+        """
+        self.variables[name] = value
+        if export:
+            os.environ[name] = value
+            if name == config.ROB_ACCESS_TOKEN:
+                self.client.session.headers[HEADER_TOKEN] = value
+
+    def capture(self, line):
+        """Apply variable exports in the output of a command.
+
+        Parameters
+        ----------
+        line: string
+            Output line
+        """
+        match = ASSIGNMENT.match(line.strip())
+        if match is not None and match.group(1):
+            self.assign(match.group(2), match.group(3), export=True)
+
+    def execute(self, argv):
+        """Execute a single command. Output of the command is written to the
+        standard output and scanned for variable exports. Prints a warning if
+        the exports of the command are not printed because of the --raw
+        option.
+
+        Parameters
+        ----------
+        argv: list(string)
+            Command line arguments
+
+        Returns
+        -------
+        int
+        """
+        argv = self.options + argv
+        command = export_command(argv)
+        if command is not None and '--raw' in argv:
+            msg = "warning: variables of '{}' are not exported with --raw"
+            print(msg.format(' '.join(command)), file=sys.stderr)
+        stdout = sys.stdout
+        sys.stdout = OutputRecorder(stdout, self.capture)
+        try:
+            return invoke(argv, self.client)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    def run(self, lines):
+        """Run the commands in the given script lines. Returns the exit code
+        of the last failed command or zero if all commands succeeded.
+
+        Parameters
+        ----------
+        lines: iterable(string)
+            Script lines
+
+        Returns
+        -------
+        int
+        """
+        environ = dict(os.environ)
+        token = self.client.session.headers.get(HEADER_TOKEN)
+        result = 0
+        try:
+            for lineno, line in read_lines(lines):
+                try:
+                    code = self.step(line)
+                except ValueError as ex:
+                    print('line {}: {}'.format(lineno, ex), file=sys.stderr)
+                    code = 2
+                if code != 0:
+                    result = code
+                    if not self.keep_going:
+                        break
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+            self.client.session.headers[HEADER_TOKEN] = token
+        return result
+
+    def step(self, line):
+        """Execute a single script line. The line is either a variable
+        assignment or a command.
+
+        Parameters
+        ----------
+        line: string
+            Script line
+
+        Returns
+        -------
+        int
+
+        Raises
+        ------
+        ValueError
+        """
+        line = substitute(line, self.variables)
+        match = ASSIGNMENT.match(line)
+        if match is not None:
+            tokens = shlex.split(match.group(3), comments=True)
+            if len(tokens) > 1:
+                raise ValueError("invalid assignment '{}'".format(line))
+            value = tokens[0] if tokens else ''
+            self.assign(match.group(2), value, export=bool(match.group(1)))
+            return 0
+        argv = shlex.split(line, comments=True)
+        if argv[:1] == ['rob']:
+            argv = argv[1:]
+        if not argv:
+            return 0
+        return self.execute(argv)
+
+
+class OutputRecorder(io.TextIOBase):
+    """Text stream that writes to another stream and passes each complete
+    line of output to a callback function.
+    """
+    def __init__(self, stream, callback):
+        """Initialize the target stream and the callback function.
+
+        Parameters
+        ----------
+        stream: file-like object
+            Target stream
+        callback: callable
+            Function that is called for each output line
+        """
+        self.stream = stream
+        self.callback = callback
+        self.partial = ''
+
+    def close(self):
+        """Pass the last incomplete line to the callback function."""
+        if self.partial:
+            self.callback(self.partial)
+            self.partial = ''
+        super(OutputRecorder, self).close()
+
+    @property
+    def encoding(self):
+        """Encoding of the target stream.
+
+        Returns
+        -------
+        string
+        """
+        return getattr(self.stream, 'encoding', 'utf-8')
+
+    def flush(self):
+        """Flush the target stream."""
+        self.stream.flush()
+
+    def isatty(self):
+        """Test if the target stream is connected to a terminal.
+
+        Returns
+        -------
+        bool
+        """
+        return self.stream.isatty()
+
+    def writable(self):
+        """The stream is writable.
+
+        Returns
+        -------
+        bool
+        """
+        return True
+
+    def write(self, text):
+        """Write text to the target stream.
+
+        Parameters
+        ----------
+        text: string
+            Output text
+
+        Returns
+        -------
+        int
+        """
+        self.stream.write(text)
+        lines = (self.partial + text).split('\n')
+        self.partial = lines.pop()
+        for line in lines:
+            self.callback(line)
+        return len(text)
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def export_command(argv):
+    """Get the command that prints variable exports if the given arguments
+    invoke one of these commands. Returns None otherwise.
+
+    Parameters
+    ----------
+    argv: list(string)
+        Command line arguments
+
+    Returns
+    -------
+    list(string)
+    """
+    names = [arg for arg in argv if not arg.startswith('-')]
+    for cmd in EXPORT_COMMANDS:
+        for i in range(len(names)):
+            if names[i:i + len(cmd)] == cmd:
+                return cmd
+    return None
+
+
+def read_lines(lines):
+    """Iterate over the logical lines of a script. Lines that end with a
+    backslash are joined with the following line. Empty lines and comment
+    lines are skipped.
+
+    Parameters
+    ----------
+    lines: iterable(string)
+        Script lines
+
+    Returns
+    -------
+    iterator(tuple(int, string))
+    """
+    buffer, start = '', None
+    for lineno, line in enumerate(lines, start=1):
+        line = line.rstrip('\r\n')
+        if start is None:
+            start = lineno
+        if line.endswith('\\'):
+            buffer += line[:-1] + ' '
+            continue
+        buffer += line
+        if buffer.strip() and not buffer.strip().startswith('#'):
+            yield start, buffer.strip()
+        buffer, start = '', None
+    if buffer.strip() and not buffer.strip().startswith('#'):
+        yield start, buffer.strip()
+
+
+def substitute(line, variables):
+    """Replace references to variables in the given line. Variables that are
+    not assigned in the script are read from the environment. Use $$ for a
+    literal dollar sign.
+
+    Parameters
+    ----------
+    line: string
+        Script line
+    variables: dict
+        Assigned variables
+
+    Returns
+    -------
+    string
+
+    Raises
+    ------
+    ValueError
+    """
+    mapping = dict(os.environ)
+    mapping.update(variables)
+    try:
+        return string.Template(line).substitute(mapping)
+    except KeyError as ex:
+        raise ValueError('undefined variable {}'.format(ex))
@@ -0,0 +1,329 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""On-disk cache for responses of read-only API requests. Each cached
+response is stored as a JSON file in the cache directory. Cache entries are
+keyed by the request Url and the user access token, i.e., responses are never
+shared between users.
+
+The cache follows the Cache-Control header of the response. Responses are
+fresh for the time given by the max-age directive and they are not stored if
+the no-store directive is given. Stale entries are revalidated with the
+ETag and Last-Modified validators of the cached response. If the server
+responds with '304 Not Modified' the cached body is used.
+
+The total size of the cache is bounded. When the size is exceeded the least
+recently used entries are removed. The modification time of the cache files
+is used to keep track of when an entry was last used.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+
+"""Default maximum size of the cache directory in bytes."""
+DEFAULT_CACHE_SIZE = 50 * 1024 * 1024
+
+"""Suffix for cache entry files."""
+ENTRY_SUFFIX = '.json'
+
+
+class ResponseCache(object):
+    """Cache for parsed response bodies of GET requests. Cache entries are
+    dictionaries with the request Url, the response body, the response
+    validators (ETag and Last-Modified) and the time (in seconds since the
+    epoch) until which the entry is fresh.
+    """
+    def __init__(self, directory, max_size=None):
+        """Initialize the cache directory and the maximum cache size. The
+        directory is created if it does not exist.
+
+        Parameters
+        ----------
+        directory: string
+            Path to the cache directory
+        max_size: int, optional
+            Maximum size of the cache in bytes
+        """
+        self.directory = directory
+        self.max_size = max_size if max_size else DEFAULT_CACHE_SIZE
+        os.makedirs(directory, exist_ok=True)
+
+    def evict(self):
+        """Remove the least recently used entries until the total size of the
+        cache does not exceed the maximum size.
+        """
+        files = list()
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            filename = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, filename))
+            total += stat.st_size
+        if total <= self.max_size:
+            return
+        for _, size, filename in sorted(files):
+            try:
+                os.remove(filename)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def filename(self, key):
+        """Get the path to the file for the cache entry with the given key.
+
+        Parameters
+        ----------
+        key: string
+            Cache key
+
+        Returns
+        -------
+        string
+        """
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Get the cache entry for the given key. The result is None if no
+        entry exists.
+
+        Parameters
+        ----------
+        key: string
+            Cache key
+
+        Returns
+        -------
+        dict
+        """
+        filename = self.filename(key)
+        try:
+            with open(filename, 'r') as f:
+                entry = json.load(f)
+            # Mark the entry as recently used.
+            os.utime(filename)
+            return entry
+        except (IOError, OSError, ValueError):
+            return None
+
+    def put(self, key, url, response, body):
+        """Add the body for the given response to the cache. The response is
+        not cached if the Cache-Control header contains the no-store directive
+        or if the response is neither fresh nor has a validator. In this case
+        an existing entry for the key is removed since it is outdated.
+
+        Parameters
+        ----------
+        key: string
+            Cache key
+        url: string
+            Request Url
+        response: requests.Response
+            Response for the GET request
+        body: dict
+            Parsed response body
+        """
+        entry = create_entry(url=url, response=response, body=body)
+        if entry is not None:
+            self.write(key, entry)
+        else:
+            self.remove(key)
+
+    def refresh(self, key, entry, response):
+        """Update the freshness and validators of a cache entry after a
+        successful revalidation. Validators that are not included in the
+        revalidation response are kept.
+
+        Parameters
+        ----------
+        key: string
+            Cache key
+        entry: dict
+            Cache entry
+        response: requests.Response
+            '304 Not Modified' response for the revalidation request
+        """
+        entry = create_entry(
+            url=entry['url'],
+            response=response,
+            body=entry['body'],
+            previous=entry
+        )
+        if entry is not None:
+            self.write(key, entry)
+        else:
+            self.remove(key)
+
+    def remove(self, key):
+        """Remove the entry with the given key from the cache.
+
+        Parameters
+        ----------
+        key: string
+            Cache key
+        """
+        try:
+            os.remove(self.filename(key))
+        except OSError:
+            pass
+
+    def write(self, key, entry):
+        """Write the cache entry for the given key and remove least recently
+        used entries if the cache size is exceeded.
+
+        Parameters
+        ----------
+        key: string
+            Cache key
+        entry: dict
+            Cache entry
+        """
+        filename = self.filename(key)
+        tmpfile = '{}.{}.tmp'.format(filename, os.getpid())
+        with open(tmpfile, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmpfile, filename)
+        self.evict()
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def cache_control(response):
+    """Get the directives from the Cache-Control header of a response. The
+    result is a dictionary that maps directive names (in lower case) to
+    their value (or None for directives without value).
+
+    Parameters
+    ----------
+    response: requests.Response
+        Response for a GET request
+
+    Returns
+    -------
+    dict
+    """
+    directives = dict()
+    value = response.headers.get('Cache-Control', '')
+    for token in value.split(','):
+        token = token.strip()
+        if not token:
+            continue
+        name, _, arg = token.partition('=')
+        directives[name.strip().lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+def cache_key(url, token):
+    """Get the key for a cache entry. The key is the SHA-256 hash of the
+    request Url and the user access token.
+
+    Parameters
+    ----------
+    url: string
+        Request Url
+    token: string
+        User access token
+
+    Returns
+    -------
+    string
+    """
+    value = '{}\n{}'.format(token if token else '', url)
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def create_entry(url, response, body, previous=None):
+    """Create a cache entry for a response. The result is None if the
+    response must not be stored, i.e., if the Cache-Control header contains
+    the no-store directive or if the response is neither fresh nor has a
+    validator. Validators of a previous entry are used if the response does
+    not contain them.
+
+    Parameters
+    ----------
+    url: string
+        Request Url
+    response: requests.Response
+        Response for the GET request
+    body: dict
+        Parsed response body
+    previous: dict, optional
+        Previous cache entry for the Url
+
+    Returns
+    -------
+    dict
+    """
+    directives = cache_control(response)
+    if 'no-store' in directives:
+        return None
+    expires = 0
+    if 'no-cache' not in directives and 'max-age' in directives:
+        try:
+            expires = time.time() + int(directives['max-age'])
+        except (TypeError, ValueError):
+            pass
+    etag = response.headers.get('ETag')
+    modified = response.headers.get('Last-Modified')
+    if previous is not None:
+        etag = etag if etag is not None else previous.get('etag')
+        if modified is None:
+            modified = previous.get('modified')
+    if not expires and etag is None and modified is None:
+        return None
+    return {
+        'url': url,
+        'etag': etag,
+        'modified': modified,
+        'expires': expires,
+        'body': body
+    }
+
+
+def is_fresh(entry):
+    """Test if a cache entry can be used without revalidation.
+
+    Parameters
+    ----------
+    entry: dict
+        Cache entry
+
+    Returns
+    -------
+    bool
+    """
+    return entry['expires'] > time.time()
+
+
+def validators(entry):
+    """Get the conditional request headers for revalidating a cache entry.
+
+    Parameters
+    ----------
+    entry: dict
+        Cache entry
+
+    Returns
+    -------
+    dict
+    """
+    headers = dict()
+    if entry.get('etag') is not None:
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('modified') is not None:
+        headers['If-Modified-Since'] = entry['modified']
+    return headers
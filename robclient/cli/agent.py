@@ -0,0 +1,90 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Command line interface for the local agent process."""
+
+import click
+import json
+
+from robclient.agent import Agent, REQUEST_STATUS, REQUEST_STOP
+from robclient.agent import forward, is_running
+
+import robclient.config as config
+
+
+@click.group(name='agent')
+def agent():
+    """Run commands in a persistent local agent."""
+    pass
+
+
+# -- Start agent --------------------------------------------------------------
+
+@click.command(name='start')
+@click.pass_context
+@click.option(
+    '-S', '--socket',
+    required=False,
+    help='Path to the Unix domain socket'
+)
+def start_agent(ctx, socket):
+    """Start the agent (runs in the foreground)."""
+    filename = socket if socket else config.AGENT_SOCKET()
+    try:
+        click.echo('Agent listening on {}'.format(filename), err=True)
+        Agent(filename).serve()
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+# -- Agent status -------------------------------------------------------------
+
+@click.command(name='status')
+@click.pass_context
+@click.option(
+    '-S', '--socket',
+    required=False,
+    help='Path to the Unix domain socket'
+)
+def agent_status(ctx, socket):
+    """Show status of the agent."""
+    filename = socket if socket else config.AGENT_SOCKET()
+    if ctx.obj['RAW']:
+        code = forward([], filename, request=REQUEST_STATUS)
+        if code is None:
+            click.echo(json.dumps({'running': False}, indent=4))
+        return
+    if not is_running(filename):
+        click.echo('No agent running at {}'.format(filename))
+    else:
+        click.echo('Agent running at {}'.format(filename))
+
+
+# -- Stop agent ---------------------------------------------------------------
+
+@click.command(name='stop')
+@click.option(
+    '-S', '--socket',
+    required=False,
+    help='Path to the Unix domain socket'
+)
+def stop_agent(socket):
+    """Stop the agent."""
+    filename = socket if socket else config.AGENT_SOCKET()
+    if forward([], filename, request=REQUEST_STOP) is None:
+        click.echo('No agent running at {}'.format(filename))
+    else:
+        click.echo('Agent stopped.')
+
+
+agent.add_command(agent_status)
+agent.add_command(start_agent)
+agent.add_command(stop_agent)
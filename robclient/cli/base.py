@@ -9,53 +9,233 @@
 """Command line interface for the Reproducible Open Benchmark Web API."""
 
 import click
+import importlib
 
-from flowserv.service.api import HEADER_TOKEN
-from robclient.route import UrlFactory
+from robclient.output import FORMAT_TABLE, FORMATS
+from robclient.protocol import HEADER_TOKEN
 
-import robclient.cli.benchmark as benchmark
-import robclient.cli.files as file
-import robclient.cli.run as run
-import robclient.cli.submission as submission
-import robclient.cli.user as user
 import robclient.config as config
 
 
-@click.group()
+"""Import paths for the subcommands of the command line interface. Each
+command is referenced by the module name and the name of the command object
+in the module. Command modules are only imported when they are needed.
+"""
+COMMANDS = {
+    # Agent
+    'agent': 'robclient.cli.agent:agent',
+    # Scripts
+    'batch': 'robclient.cli.batch:batch',
+    # Users
+    'users': 'robclient.cli.user:list',
+    'login': 'robclient.cli.user:login',
+    'logout': 'robclient.cli.user:logout',
+    'register': 'robclient.cli.user:register',
+    'pwd': 'robclient.cli.user:reset_password',
+    'whoami': 'robclient.cli.user:whoami',
+    # Benchmarks
+    'benchmarks': 'robclient.cli.benchmark:benchmarks',
+    # Files
+    'files': 'robclient.cli.files:files',
+    # Runs
+    'runs': 'robclient.cli.run:runs',
+    'queue': 'robclient.cli.queue:queue',
+    # Submissions
+    'submissions': 'robclient.cli.submission:submissions'
+}
+
+
+class LazyGroup(click.Group):
+    """Command group that imports the module for a subcommand only when the
+    subcommand is invoked. Listing the commands (e.g., for the help text)
+    imports all command modules.
+    """
+    def __init__(self, name=None, commands=None, lazy_commands=None, **attrs):
+        """Initialize the group and the import paths of the lazy commands.
+
+        Parameters
+        ----------
+        name: string, optional
+            Group name
+        commands: dict or list, optional
+            Commands that are already loaded
+        lazy_commands: dict, optional
+            Mapping of command names to import paths of the form
+            'module:attribute'
+        attrs: dict
+            Additional arguments for the Click group
+        """
+        super(LazyGroup, self).__init__(name=name, commands=commands, **attrs)
+        self.lazy_commands = lazy_commands if lazy_commands else dict()
+
+    def get_command(self, ctx, cmd_name):
+        """Get the command with the given name. The module for a lazy
+        command is imported on first access.
+
+        Parameters
+        ----------
+        ctx: click.Context
+            Current context
+        cmd_name: string
+            Command name
+
+        Returns
+        -------
+        click.Command
+        """
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            self.add_command(self.load_command(cmd_name), name=cmd_name)
+        return super(LazyGroup, self).get_command(ctx, cmd_name)
+
+    def list_commands(self, ctx):
+        """Get sorted list of names for all loaded and lazy commands.
+
+        Parameters
+        ----------
+        ctx: click.Context
+            Current context
+
+        Returns
+        -------
+        list(string)
+        """
+        return sorted(set(self.commands) | set(self.lazy_commands))
+
+    def load_command(self, cmd_name):
+        """Import the command object for a lazy command.
+
+        Parameters
+        ----------
+        cmd_name: string
+            Command name
+
+        Returns
+        -------
+        click.Command
+        """
+        module_name, attr = self.lazy_commands[cmd_name].split(':')
+        return getattr(importlib.import_module(module_name), attr)
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
 @click.option(
     '--raw',
     is_flag=True,
     default=False,
     help='Show raw (JSON) response'
 )
+@click.option(
+    '--no-cache',
+    is_flag=True,
+    default=False,
+    help='Do not use cached responses'
+)
+@click.option(
+    '--format',
+    type=click.Choice(FORMATS),
+    default=FORMAT_TABLE,
+    help='Output format for listings'
+)
+@click.option(
+    '--stream',
+    is_flag=True,
+    default=False,
+    help='Parse and print large listings incrementally'
+)
 @click.pass_context
-def cli(ctx, raw):
+def cli(ctx, raw, no_cache, format, stream):
     """Command Line Interface for the Reproducible Open Benchmark Web API."""
     # Ensure that ctx.obj exists and is a dict. Based on
     # https://click.palletsprojects.com/en/7.x/commands/#nested-handling-and-contexts
     ctx.ensure_object(dict)
-    # Set the raw output flag and initialize the url factory in the context
+    # The API client modules depend on the requests library. They are only
+    # imported when a command is invoked to keep the start-up time low (e.g.,
+    # for --help).
+    from robclient.api import Client
+    from robclient.cache import ResponseCache
+    from robclient.route import UrlFactory
+    from robclient.session import ClientSession
+    # Set the raw output flag and initialize the API client in the context
     # object. The API base url is expected to be set in the environment
     # variable 'FLOWSERV_API_HOST'.
     ctx.obj['RAW'] = raw
-    ctx.obj['URLS'] = UrlFactory(base_url=config.API_URL())
-    ctx.obj['HEADERS'] = {HEADER_TOKEN: config.ACCESS_TOKEN()}
-
-
-# -- User Commands ------------------------------------------------------------
-
-# Users
-cli.add_command(user.list)
-cli.add_command(user.login)
-cli.add_command(user.logout)
-cli.add_command(user.register)
-cli.add_command(user.reset_password)
-cli.add_command(user.whoami)
-# Benchmarks
-cli.add_command(benchmark.benchmarks)
-# Files
-cli.add_command(file.files)
-# Runs
-cli.add_command(run.runs)
-# Submissions
-cli.add_command(submission.submissions)
+    ctx.obj['FORMAT'] = format
+    ctx.obj['STREAM'] = stream
+    client = ctx.obj.get('CLIENT')
+    if client is not None:
+        # Use the client that was given by the caller (e.g., the local agent).
+        # The session is shared by a client without cache if caching is
+        # disabled.
+        if no_cache and client.cache is not None:
+            ctx.obj['CLIENT'] = Client(
+                urls=client.urls,
+                session=client.session
+            )
+        return
+    # Create a single session that is shared by all requests of the invoked
+    # command. The session carries the access token and keeps connections to
+    # the API server open between requests.
+    session = ClientSession(
+        headers={HEADER_TOKEN: config.ACCESS_TOKEN()},
+        pool_size=config.POOL_SIZE(),
+        keep_alive=config.KEEP_ALIVE(),
+        retries=config.RETRIES()
+    )
+    ctx.call_on_close(session.close)
+    # Responses of read-only requests are cached in the user cache directory
+    # unless caching is disabled.
+    cache = None
+    if not no_cache:
+        try:
+            cache = ResponseCache(
+                directory=config.CACHE_DIR(),
+                max_size=config.CACHE_SIZE()
+            )
+        except OSError:
+            # Continue without cache if the directory cannot be created.
+            pass
+    ctx.obj['CLIENT'] = Client(
+        urls=UrlFactory(base_url=config.API_URL()),
+        session=session,
+        cache=cache
+    )
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def invoke(argv, client):
+    """Run the command line interface for the given arguments with a shared
+    API client. Errors are reported on standard error instead of terminating
+    the process. Returns the exit code of the command.
+
+    Parameters
+    ----------
+    argv: list(string)
+        Command line arguments
+    client: robclient.api.Client
+        Shared API client
+
+    Returns
+    -------
+    int
+    """
+    try:
+        # Without standalone mode the exit code of a command that calls
+        # ctx.exit() is returned by main().
+        code = cli.main(
+            args=argv,
+            prog_name='rob',
+            obj={'CLIENT': client},
+            standalone_mode=False
+        )
+    except click.exceptions.Exit as ex:
+        return ex.exit_code
+    except click.ClickException as ex:
+        ex.show()
+        return ex.exit_code
+    except click.Abort:
+        click.echo('Aborted!', err=True)
+        return 1
+    except SystemExit as ex:
+        return ex.code if isinstance(ex.code, int) else 1
+    return code if isinstance(code, int) else 0
@@ -0,0 +1,44 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Command line interface to run a script of commands in a single process."""
+
+import click
+
+from robclient.batch import BatchRunner
+from robclient.output import FORMAT_TABLE
+
+
+@click.command(name='batch')
+@click.pass_context
+@click.option(
+    '-k', '--keep-going',
+    is_flag=True,
+    default=False,
+    help='Continue after a failed command'
+)
+@click.argument('script', type=click.File('r'))
+def batch(ctx, keep_going, script):
+    """Run commands from a script file ('-' for stdin)."""
+    # Global options of the batch command apply to all commands in the
+    # script.
+    options = list()
+    if ctx.obj['RAW']:
+        options.append('--raw')
+    if ctx.obj['FORMAT'] != FORMAT_TABLE:
+        options.extend(['--format', ctx.obj['FORMAT']])
+    if ctx.obj['STREAM']:
+        options.append('--stream')
+    runner = BatchRunner(
+        client=ctx.obj['CLIENT'],
+        options=options,
+        keep_going=keep_going
+    )
+    code = runner.run(script)
+    if code != 0:
+        ctx.exit(code)
@@ -10,14 +10,17 @@
 
 import click
 import json
-import os
 import requests
+import sqlite3
 
-from flowserv.model.parameter.numeric import NUMERIC_TYPES
-from flowserv.model.parameter.string import PARA_STRING
-from robclient.table import ResultTable
+from robclient.download import DEFAULT_JOBS
+from robclient.history import LeaderboardHistory
+from robclient.leaderboard import DIFF_UNCHANGED, diff_leaderboards
+from robclient.leaderboard import filter_ranking, find_column, parse_filter
+from robclient.output import FORMAT_TABLE, create_writer
+from robclient.protocol import PARA_INT, PARA_STRING
+from robclient.table import ResultTable, echo_download
 
-import flowserv.util as util
 import robclient.config as config
 
 
@@ -37,12 +40,9 @@ def get_benchmark(ctx, benchmark):
     b_id = benchmark if benchmark else config.BENCHMARK_ID()
     if b_id is None:
         click.echo('no benchmark specified')
-        return
-    url = ctx.obj['URLS'].get_benchmark(b_id)
+        ctx.exit(1)
     try:
-        r = requests.get(url)
-        r.raise_for_status()
-        body = r.json()
+        body = ctx.obj['CLIENT'].get_benchmark(b_id)
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
@@ -65,6 +65,7 @@ def get_benchmark(ctx, benchmark):
                     click.echo('  {} ({})'.format(r_name, r_id))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- List benchmarks ----------------------------------------------------------
@@ -73,24 +74,27 @@ def get_benchmark(ctx, benchmark):
 @click.pass_context
 def list_benchmarks(ctx):
     """List all benchmarks."""
-    url = ctx.obj['URLS'].list_benchmarks()
     try:
-        r = requests.get(url)
-        r.raise_for_status()
-        body = r.json()
+        body = ctx.obj['CLIENT'].list_benchmarks()
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
-            table = ResultTable(
-                ['ID', 'Name', 'Description'],
-                [PARA_STRING] * 3
+            table = create_writer(
+                ctx.obj['FORMAT'],
+                headline=['ID', 'Name', 'Description'],
+                types=[PARA_STRING] * 3,
+                keys=['id', 'name', 'description'],
+                stream=ctx.obj['STREAM']
             )
-            for b in body['benchmarks']:
-                table.add([b['id'], b['name'], b['description']])
-            for line in table.format():
-                click.echo(line)
+            with table:
+                for b in body['benchmarks']:
+                    table.add([b['id'], b['name'], b['description']])
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Get benchmark leaderboard------------------------------------------------
@@ -103,43 +107,190 @@ def list_benchmarks(ctx):
     default=False,
     help='Show all run results'
 )
+@click.option(
+    '--record',
+    is_flag=True,
+    default=False,
+    help='Record leaderboard snapshot in local history'
+)
+@click.option(
+    '--diff',
+    type=click.Path(exists=True, dir_okay=False, readable=True),
+    required=False,
+    help='Compare with leaderboard snapshot (JSON file)'
+)
+@click.option('--sort', required=False, help='Sort by result column')
+@click.option(
+    '--desc',
+    is_flag=True,
+    default=False,
+    help='Sort in descending order'
+)
+@click.option(
+    '--filter',
+    multiple=True,
+    help='Filter condition, e.g., \'accuracy>0.9\' (repeat for multiple)'
+)
+@click.option(
+    '--top',
+    type=int,
+    required=False,
+    help='Show only the first K entries'
+)
+@click.option(
+    '--columns',
+    required=False,
+    help='Result columns to show (comma-separated)'
+)
 @click.pass_context
-def get_leaderboard(ctx, benchmark, all):
+def get_leaderboard(
+    ctx, benchmark, all, record, diff, sort, desc, filter, top, columns
+):
     """Show benchmark leaderboard."""
     b_id = benchmark if benchmark else config.BENCHMARK_ID()
     if b_id is None:
         click.echo('no benchmark specified')
-        return
-    url = ctx.obj['URLS'].get_leaderboard(b_id, include_all=all)
-    headers = ctx.obj['HEADERS']
+        ctx.exit(1)
+    client = ctx.obj['CLIENT']
     try:
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        body = r.json()
+        if ctx.obj['STREAM'] and not (ctx.obj['RAW'] or record or diff):
+            # The ranking is parsed while the table rows are written. The
+            # leaderboard schema is read before the first row.
+            ranking = client.stream_leaderboard(b_id, include_all=all)
+            body = {'schema': ranking.get('schema', []), 'ranking': ranking}
+        else:
+            body = client.get_leaderboard(b_id, include_all=all)
+        if record:
+            history = LeaderboardHistory(config.HISTORY_FILE())
+            try:
+                count = history.record(benchmark_id=b_id, leaderboard=body)
+            finally:
+                history.close()
+            msg = 'Recorded {} changed entries.'.format(count)
+            click.echo(msg, err=True)
+        if diff is not None:
+            with open(diff, 'r') as f:
+                snapshot = json.load(f)
+            changes = diff_leaderboards(old=snapshot, new=body)
+            changes = [c for c in changes if c['status'] != DIFF_UNCHANGED]
+            if ctx.obj['RAW']:
+                click.echo(json.dumps(changes, indent=4))
+            elif ctx.obj['FORMAT'] == FORMAT_TABLE:
+                echo_diff(changes, body['schema'])
+            else:
+                write_diff(ctx.obj['FORMAT'], changes, body['schema'])
+            return
+        schema = body['schema']
+        entries = filter_ranking(
+            body,
+            filters=[parse_filter(f, schema) for f in filter],
+            sort=find_column(schema, sort)['id'] if sort else None,
+            descending=desc,
+            top=top
+        )
+        if columns is not None:
+            schema = [find_column(schema, c) for c in columns.split(',')]
         if ctx.obj['RAW']:
-            click.echo(json.dumps(body, indent=4))
+            doc = dict(body)
+            doc['ranking'] = [entry for _, entry, _ in entries]
+            click.echo(json.dumps(doc, indent=4))
         else:
             headline = ['Rank', 'Submission']
-            types = NUMERIC_TYPES
-            for col in body['schema']:
+            types = [PARA_INT, PARA_STRING]
+            keys = ['rank', 'submission']
+            for col in schema:
                 headline.append(col['name'])
                 types.append(col['type'])
-            table = ResultTable(headline=headline, types=types)
-            rank = 1
-            for run in body['ranking']:
-                row = [str(rank), run['submission']['name']]
-                result = dict()
-                for val in run['results']:
-                    result[val['id']] = val['value']
-                for col in body['schema']:
-                    col_id = col['id']
-                    row.append(str(result[col_id]))
-                table.add(row)
-                rank += 1
-            for line in table.format():
-                click.echo(line)
+                keys.append(col['id'])
+            # Only the values of selected columns are formatted. Rows are
+            # written while the table is generated.
+            table = create_writer(
+                ctx.obj['FORMAT'],
+                headline=headline,
+                types=types,
+                keys=keys,
+                stream=ctx.obj['STREAM']
+            )
+            with table:
+                for rank, run, result in entries:
+                    row = [rank, run['submission']['name']]
+                    for col in schema:
+                        row.append(result.get(col['id']))
+                    table.add(row)
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError, sqlite3.Error) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+
+
+# -- Leaderboard history ------------------------------------------------------
+
+@click.command(name='history')
+@click.option('-b', '--benchmark', required=False, help='Benchmark identifier')
+@click.option(
+    '-s', '--submission',
+    required=False,
+    help='Show history for submission only'
+)
+@click.pass_context
+def get_history(ctx, benchmark, submission):
+    """Show recorded leaderboard changes."""
+    b_id = benchmark if benchmark else config.BENCHMARK_ID()
+    if b_id is None:
+        click.echo('no benchmark specified')
+        ctx.exit(1)
+    try:
+        history = LeaderboardHistory(config.HISTORY_FILE())
+        try:
+            changes = history.history(
+                benchmark_id=b_id,
+                submission_id=submission
+            )
+            schema = history.schema(benchmark_id=b_id)
+        finally:
+            history.close()
+        if ctx.obj['RAW']:
+            click.echo(json.dumps(changes, indent=4))
+            return
+        if schema is None:
+            click.echo('no history for benchmark {}'.format(b_id))
+            return
+        headline = ['Time', 'Submission', 'Rank']
+        types = [PARA_STRING, PARA_STRING, PARA_INT]
+        keys = ['createdAt', 'submission', 'rank']
+        for col in schema:
+            headline.append(col['name'])
+            types.append(col['type'])
+            keys.append(col['id'])
+        fmt = ctx.obj['FORMAT']
+        table = create_writer(
+            fmt,
+            headline=headline,
+            types=types,
+            keys=keys,
+            stream=ctx.obj['STREAM']
+        )
+        with table:
+            for entry in changes:
+                name = entry['submission']['name']
+                if name is None:
+                    name = entry['submission']['id']
+                rank = entry['rank']
+                results = entry['results']
+                if results is None:
+                    # The entry was removed from the ranking.
+                    results = dict()
+                    if fmt == FORMAT_TABLE:
+                        rank = '-'
+                row = [entry['createdAt'][:19], name, rank]
+                for col in schema:
+                    row.append(results.get(col['id']))
+                table.add(row)
+    except (ValueError, IOError, OSError, sqlite3.Error) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Download resource file(s) ------------------------------------------------
@@ -160,53 +311,153 @@ def get_leaderboard(ctx, benchmark, all):
     required=False,
     help='Save as ...'
 )
-def download_resource(ctx, benchmark, resource, all, output):
+@click.option(
+    '--resources',
+    required=False,
+    help='Download resource files (comma-separated identifier or \'all\')'
+)
+@click.option(
+    '-d', '--directory',
+    type=click.Path(file_okay=False, writable=True),
+    default='.',
+    help='Output directory for resource files'
+)
+@click.option(
+    '-j', '--jobs',
+    type=int,
+    default=DEFAULT_JOBS,
+    help='Number of parallel downloads'
+)
+@click.option(
+    '--segments',
+    type=int,
+    required=False,
+    help='Download archive in segments over parallel connections'
+)
+def download_resource(
+    ctx, benchmark, resource, all, output, resources, directory, jobs,
+    segments
+):
     """Download a run resource file."""
-    # We cannot have a resource and the all flag being True
-    if resource is not None and all:
+    # Exactly one of resource, resources and the all flag has to be given
+    selected = [resource is not None, all, resources is not None]
+    if selected.count(True) > 1:
         click.echo('invalid argument combination')
-        return
-    elif resource is None and not all:
-        click.echo('select resource or all')
-        return
+        ctx.exit(1)
+    elif selected.count(True) == 0:
+        click.echo('select resource, resources or all')
+        ctx.exit(1)
     b_id = benchmark if benchmark else config.BENCHMARK_ID()
-    urls = ctx.obj['URLS']
-    if resource is not None:
-        url = urls.download_benchmark_file(
-            benchmark_id=b_id,
-            resource_id=resource
-        )
-    else:
-        url = urls.download_benchmark_archive(benchmark_id=b_id)
-    headers = ctx.obj['HEADERS']
+    client = ctx.obj['CLIENT']
     try:
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        content = r.headers['Content-Disposition']
-        if output is not None:
-            filename = output
-        elif 'filename=' in content:
-            filename = content[content.find('filename='):].split('=')[1]
-            if filename.startswith('"') or filename.startswith("'"):
-                filename = filename[1:]
-            if filename.endswith('"') or filename.endswith("'"):
-                filename = filename[:-1]
+        if resources is not None:
+            if resources == 'all':
+                resource_ids = None
+            else:
+                resource_ids = resources.split(',')
+            files = client.download_benchmark_resources(
+                benchmark_id=b_id,
+                targetdir=directory,
+                resource_ids=resource_ids,
+                jobs=jobs,
+                callback=echo_download
+            )
+            click.echo('Downloaded {} file(s).'.format(len(files)))
+        elif resource is not None:
+            client.download_benchmark_file(
+                benchmark_id=b_id,
+                resource_id=resource,
+                filename=output
+            )
         else:
-            click.echo('not output filename found')
-            return
-        # Write the file contents in the response to the specified path
-        # Based on https://www.techcoil.com/blog/how-to-download-a-file-via-http-post-and-http-get-with-python-3-requests-library/  # noqa: E501
-        targetdir = os.path.dirname(filename)
-        if targetdir:
-            util.create_dir(targetdir)
-        with open(filename, 'wb') as local_file:
-            for chunk in r.iter_content(chunk_size=128):
-                local_file.write(chunk)
+            client.download_benchmark_archive(
+                benchmark_id=b_id,
+                filename=output,
+                segments=segments
+            )
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+
+
+def echo_diff(changes, schema):
+    """Print the changes between two leaderboards. Rank movements are
+    positive if an entry moved up in the ranking. Result values are followed
+    by the difference to the previous value (if changed).
+
+    Parameters
+    ----------
+    changes: list(dict)
+        Changed ranking entries
+    schema: list(dict)
+        Leaderboard result schema
+    """
+    headline = ['Change', 'Rank', 'Move', 'Submission']
+    types = [PARA_STRING, PARA_INT, PARA_INT, PARA_STRING]
+    for col in schema:
+        headline.append(col['name'])
+        types.append(PARA_STRING)
+    table = ResultTable(headline=headline, types=types)
+    for entry in changes:
+        rank = entry['rank']
+        prev_rank = entry['previousRank']
+        move = ''
+        if rank is not None and prev_rank is not None and rank != prev_rank:
+            move = '{:+d}'.format(prev_rank - rank)
+        row = [
+            entry['status'],
+            str(rank) if rank is not None else '-',
+            move,
+            entry['submission'].get('name', entry['submission']['id'])
+        ]
+        for col in schema:
+            value = '{}'.format(entry['results'].get(col['id'], ''))
+            if col['id'] in entry['deltas']:
+                value += ' ({:+g})'.format(entry['deltas'][col['id']])
+            row.append(value)
+        table.add(row)
+    for line in table.format():
+        click.echo(line)
+
+
+def write_diff(fmt, changes, schema):
+    """Write the changes between two leaderboards in a machine-readable
+    format. Each result column is followed by a column with the difference
+    to the previous value.
+
+    Parameters
+    ----------
+    fmt: string
+        Output format identifier
+    changes: list(dict)
+        Changed ranking entries
+    schema: list(dict)
+        Leaderboard result schema
+    """
+    headline = ['status', 'rank', 'previousRank', 'submission']
+    types = [PARA_STRING, PARA_INT, PARA_INT, PARA_STRING]
+    for col in schema:
+        headline.extend([col['id'], '{}_delta'.format(col['id'])])
+        types.extend([col['type'], col['type']])
+    with create_writer(fmt, headline=headline, types=types) as table:
+        for entry in changes:
+            row = [
+                entry['status'],
+                entry['rank'],
+                entry['previousRank'],
+                entry['submission'].get('name', entry['submission']['id'])
+            ]
+            for col in schema:
+                row.append(entry['results'].get(col['id']))
+                row.append(entry['deltas'].get(col['id']))
+            table.add(row)
 
 
 benchmarks.add_command(get_benchmark)
 benchmarks.add_command(list_benchmarks)
 benchmarks.add_command(get_leaderboard)
+benchmarks.add_command(get_history)
 benchmarks.add_command(download_resource)
@@ -10,14 +10,19 @@
 
 import click
 import json
+import os
 import requests
+import sys
+import time
 
-from flowserv.model.parameter.numeric import PARA_INT
-from flowserv.model.parameter.string import PARA_STRING
-from robclient.table import ResultTable
+from robclient.download import DEFAULT_JOBS
+from robclient.output import create_writer
+from robclient.protocol import PARA_INT, PARA_STRING
+from robclient.table import ResultTable, format_throughput
 
-import flowserv.util as util
 import robclient.config as config
+import robclient.sync as sync
+import robclient.upload as upload
 
 
 @click.group(name='files')
@@ -41,18 +46,16 @@ def delete_file(ctx, submission, file):
     s_id = submission if submission else config.SUBMISSION_ID()
     if s_id is None:
         click.echo('no submission specified')
-        return
+        ctx.exit(1)
     msg = 'Do you really want to delete file {}'
     if not click.confirm(msg.format(file)):
         return
-    url = ctx.obj['URLS'].delete_file(submission_id=s_id, file_id=file)
-    headers = ctx.obj['HEADERS']
     try:
-        r = requests.delete(url, headers=headers)
-        r.raise_for_status()
+        ctx.obj['CLIENT'].delete_file(submission_id=s_id, file_id=file)
         click.echo('File \'{}\' deleted.'.format(file))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Download file ------------------------------------------------------------
@@ -76,27 +79,19 @@ def download_file(ctx, submission, file, output):
     s_id = submission if submission else config.SUBMISSION_ID()
     if s_id is None:
         click.echo('no submission specified')
-        return
-    url = ctx.obj['URLS'].download_file(submission_id=s_id, file_id=file)
-    headers = ctx.obj['HEADERS']
+        ctx.exit(1)
     try:
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        content = r.headers['Content-Disposition']
-        if output is not None:
-            filename = output
-        elif 'filename=' in content:
-            filename = content[content.find('filename='):].split('=')[1]
-        else:
-            click.echo('not output filename found')
-            return
-        # Write the file contents in the response to the specified path
-        # Based on https://www.techcoil.com/blog/how-to-download-a-file-via-http-post-and-http-get-with-python-3-requests-library/  # noqa: E501
-        with open(filename, 'wb') as local_file:
-            for chunk in r.iter_content(chunk_size=128):
-                local_file.write(chunk)
+        ctx.obj['CLIENT'].download_file(
+            submission_id=s_id,
+            file_id=file,
+            filename=output
+        )
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- List files ---------------------------------------------------------------
@@ -113,31 +108,138 @@ def list_files(ctx, submission):
     s_id = submission if submission else config.SUBMISSION_ID()
     if s_id is None:
         click.echo('no submission specified')
-        return
-    url = ctx.obj['URLS'].list_files(submission_id=s_id)
-    headers = ctx.obj['HEADERS']
+        ctx.exit(1)
     try:
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        body = r.json()
+        body = ctx.obj['CLIENT'].list_files(submission_id=s_id)
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
-            table = ResultTable(
+            table = create_writer(
+                ctx.obj['FORMAT'],
                 headline=['ID', 'Name', 'Created At', 'Size'],
-                types=[PARA_STRING, PARA_STRING, PARA_STRING, PARA_INT]
+                types=[PARA_STRING, PARA_STRING, PARA_STRING, PARA_INT],
+                keys=['id', 'name', 'createdAt', 'size'],
+                stream=ctx.obj['STREAM']
             )
-            for f in body['files']:
-                table.add([
-                    f['id'],
-                    f['name'],
-                    f['createdAt'][:19],
-                    f['size']
-                ])
+            with table:
+                for f in body['files']:
+                    table.add([
+                        f['id'],
+                        f['name'],
+                        f['createdAt'][:19],
+                        f['size']
+                    ])
+    except (requests.ConnectionError, requests.HTTPError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+
+
+# -- Synchronize files --------------------------------------------------------
+
+@click.command(name='sync')
+@click.pass_context
+@click.option(
+    '-s', '--submission',
+    required=False,
+    help='Submission identifier'
+)
+@click.option(
+    '-d', '--dir',
+    type=click.Path(exists=True, file_okay=False, writable=True),
+    required=True,
+    help='Local directory'
+)
+@click.option(
+    '--include',
+    multiple=True,
+    help='Include files matching pattern'
+)
+@click.option(
+    '--exclude',
+    multiple=True,
+    help='Exclude files matching pattern'
+)
+@click.option(
+    '-j', '--jobs',
+    type=int,
+    default=DEFAULT_JOBS,
+    help='Number of parallel uploads'
+)
+@click.option(
+    '--delete',
+    is_flag=True,
+    default=False,
+    help='Delete uploaded files that are replaced or do not exist locally'
+)
+@click.option(
+    '--dry-run',
+    is_flag=True,
+    default=False,
+    help='Show changes without uploading or deleting files'
+)
+def sync_files(ctx, submission, dir, include, exclude, jobs, delete, dry_run):
+    """Synchronize submission files with a local directory."""
+    s_id = submission if submission else config.SUBMISSION_ID()
+    if s_id is None:
+        click.echo('no submission specified')
+        ctx.exit(1)
+    client = ctx.obj['CLIENT']
+    try:
+        index = sync.FileIndex(dir)
+        files = upload.list_files(
+            dir,
+            include=include,
+            exclude=list(exclude) + [sync.INDEX_FILE]
+        )
+        plan = sync.sync_plan(
+            submission_id=s_id,
+            files=files,
+            remote_files=client.list_files(submission_id=s_id)['files'],
+            index=index,
+            delete=delete
+        )
+        table = ResultTable(
+            headline=['Action', 'Name', 'ID'],
+            types=[PARA_STRING] * 3
+        )
+        if not dry_run:
+            uploads = client.upload_files(
+                submission_id=s_id,
+                files=[(path, relpath) for path, relpath, _ in plan.uploads],
+                jobs=jobs
+            )
+            for (_, relpath, checksum), fh in zip(plan.uploads, uploads):
+                index.set_upload(s_id, relpath, fh['id'], checksum)
+                table.add(['upload', fh['name'], fh['id']])
+            for fh in plan.deletes:
+                client.delete_file(submission_id=s_id, file_id=fh['id'])
+                table.add(['delete', fh['name'], fh['id']])
+        else:
+            for _, relpath, _ in plan.uploads:
+                table.add(['upload', relpath, ''])
+            for fh in plan.deletes:
+                table.add(['delete', fh['name'], fh['id']])
+        # Keep the cached file hashes even if this is a dry run.
+        index.save()
+        if len(table.rows) > 1:
             for line in table.format():
                 click.echo(line)
+            click.echo()
+        msg = '{} uploaded, {} deleted, {} unchanged.'
+        click.echo(msg.format(
+            len(plan.uploads),
+            len(plan.deletes),
+            len(plan.skipped)
+        ))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Upload file --------------------------------------------------------------
@@ -152,33 +254,140 @@ def list_files(ctx, submission):
 @click.option(
     '-i', '--input',
     type=click.Path(exists=True, readable=True),
-    required=True,
+    required=False,
     help='Input file'
 )
-def upload_file(ctx, submission, input):
+@click.option(
+    '-d', '--dir',
+    type=click.Path(exists=True, file_okay=False, readable=True),
+    required=False,
+    help='Upload all files in directory'
+)
+@click.option(
+    '--include',
+    multiple=True,
+    help='Include files matching pattern (with --dir)'
+)
+@click.option(
+    '--exclude',
+    multiple=True,
+    help='Exclude files matching pattern (with --dir)'
+)
+@click.option(
+    '-j', '--jobs',
+    type=int,
+    default=DEFAULT_JOBS,
+    help='Number of parallel uploads (with --dir)'
+)
+def upload_file(ctx, submission, input, dir, include, exclude, jobs):
     """Upload a file for a submission."""
+    if input is not None and dir is not None:
+        click.echo('invalid argument combination')
+        ctx.exit(1)
+    elif input is None and dir is None:
+        click.echo('select input file or directory')
+        ctx.exit(1)
     s_id = submission if submission else config.SUBMISSION_ID()
     if s_id is None:
         click.echo('no submission specified')
+        ctx.exit(1)
+    if dir is not None:
+        upload_directory(ctx, s_id, dir, include, exclude, jobs)
         return
-    url = ctx.obj['URLS'].upload_file(submission_id=s_id)
-    headers = ctx.obj['HEADERS']
-    files = {'file': open(input, 'rb')}
     try:
-        r = requests.post(url, files=files, headers=headers)
-        r.raise_for_status()
-        body = r.json()
+        # Show upload progress on stderr to keep the command output intact.
+        start = time.time()
+        with click.progressbar(
+            length=os.path.getsize(input),
+            label='Uploading',
+            file=sys.stderr
+        ) as bar:
+            body = ctx.obj['CLIENT'].upload_file(
+                submission_id=s_id,
+                filename=input,
+                callback=lambda sent, total: bar.update(sent - bar.pos)
+            )
+        elapsed = time.time() - start
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
             f_id = body['id']
             f_name = body['name']
             click.echo('Uploaded \'{}\' with ID {}.'.format(f_name, f_id))
+            click.echo(format_throughput(body['size'], elapsed))
+    except (requests.ConnectionError, requests.HTTPError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+
+
+def upload_directory(ctx, submission_id, directory, include, exclude, jobs):
+    """Upload all matching files in a directory using parallel uploads. Files
+    are uploaded under their path relative to the directory. Prints a summary
+    table of the uploaded files.
+
+    Parameters
+    ----------
+    ctx: click.Context
+        Command context
+    submission_id: string
+        Unique submission identifier
+    directory: string
+        Path to the upload directory
+    include: list(string)
+        Patterns for files that are included
+    exclude: list(string)
+        Patterns for files that are excluded
+    jobs: int
+        Number of parallel uploads
+    """
+    files = upload.list_files(directory, include=include, exclude=exclude)
+    if not files:
+        click.echo('no files to upload')
+        ctx.exit(1)
+    try:
+        start = time.time()
+        with click.progressbar(
+            length=len(files),
+            label='Uploading',
+            file=sys.stderr
+        ) as bar:
+            result = ctx.obj['CLIENT'].upload_files(
+                submission_id=submission_id,
+                files=files,
+                jobs=jobs,
+                callback=lambda body, count, total: bar.update(1)
+            )
+        elapsed = time.time() - start
+        result = sorted(result, key=lambda f: f['name'])
+        if ctx.obj['RAW']:
+            click.echo(json.dumps({'files': result}, indent=4))
+        else:
+            table = ResultTable(
+                headline=['ID', 'Name', 'Size'],
+                types=[PARA_STRING, PARA_STRING, PARA_INT]
+            )
+            for f in result:
+                table.add([f['id'], f['name'], f['size']])
+            for line in table.format():
+                click.echo(line)
+            size = sum([f['size'] for f in result])
+            click.echo('\nUploaded {} file(s), {}'.format(
+                len(result),
+                format_throughput(size, elapsed)
+            ))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 files.add_command(delete_file)
 files.add_command(download_file)
 files.add_command(list_files)
+files.add_command(sync_files)
 files.add_command(upload_file)
@@ -0,0 +1,209 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Command line interface for the local run queue."""
+
+import click
+import json
+import requests
+
+from robclient.output import create_writer
+from robclient.protocol import PARA_STRING, ParameterIndex
+
+import robclient.config as config
+import robclient.scheduler as scheduler
+import robclient.sweep as sweep
+
+
+@click.group(name='queue')
+def queue():
+    """Queue runs and start them with a concurrency limit."""
+    pass
+
+
+# -- Add runs to queue --------------------------------------------------------
+
+@click.command(name='add')
+@click.pass_context
+@click.option(
+    '-s', '--submission',
+    required=False,
+    help='Submission identifier'
+)
+@click.option(
+    '-i', '--input',
+    type=click.Path(exists=True, dir_okay=False, readable=True),
+    required=True,
+    help='Sweep file with run arguments (JSON, YAML or CSV)'
+)
+def add_runs(ctx, submission, input):
+    """Add run requests to the queue."""
+    s_id = submission if submission else config.SUBMISSION_ID()
+    if s_id is None:
+        click.echo('no submission specified')
+        ctx.exit(1)
+    try:
+        body = ctx.obj['CLIENT'].get_submission(submission_id=s_id)
+        arguments = sweep.validate_arguments(
+            parameters=ParameterIndex.from_dict(body['parameters']),
+            argsets=sweep.read_sweep(input),
+            files=[fh['id'] for fh in body['files']]
+        )
+        runs = scheduler.RunQueue(config.QUEUE_FILE())
+        with runs.locked():
+            for args in arguments:
+                runs.add(submission_id=s_id, arguments=args)
+            runs.save()
+        click.echo('Queued {} run(s).'.format(len(arguments)))
+    except (requests.ConnectionError, requests.HTTPError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+
+
+# -- Clear queue --------------------------------------------------------------
+
+@click.command(name='clear')
+@click.pass_context
+@click.option(
+    '-a', '--all',
+    is_flag=True,
+    default=False,
+    help='Remove all entries (including queued and active runs)'
+)
+def clear_queue(ctx, all):
+    """Remove finished runs from the queue."""
+    try:
+        runs = scheduler.RunQueue(config.QUEUE_FILE())
+        with runs.locked():
+            if all:
+                count = runs.clear(states=[
+                    scheduler.ENTRY_ACTIVE,
+                    scheduler.ENTRY_FAILED,
+                    scheduler.ENTRY_FINISHED,
+                    scheduler.ENTRY_QUEUED
+                ])
+            else:
+                count = runs.clear()
+            runs.save()
+        click.echo('Removed {} entries.'.format(count))
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+
+
+# -- List queue ---------------------------------------------------------------
+
+@click.command(name='list')
+@click.pass_context
+def list_queue(ctx):
+    """List entries in the run queue."""
+    try:
+        runs = scheduler.RunQueue(config.QUEUE_FILE())
+        if ctx.obj['RAW']:
+            click.echo(json.dumps(runs.entries, indent=4))
+        else:
+            table = create_writer(
+                ctx.obj['FORMAT'],
+                headline=['ID', 'Submission', 'State', 'Run', 'Run State'],
+                types=[PARA_STRING] * 5,
+                keys=['id', 'submission', 'state', 'runId', 'runState'],
+                stream=ctx.obj['STREAM']
+            )
+            with table:
+                for e in runs.entries:
+                    table.add([
+                        e['id'][:8],
+                        e['submission'],
+                        e['state'],
+                        e.get('runId'),
+                        e.get('runState')
+                    ])
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+
+
+# -- Process queue ------------------------------------------------------------
+
+@click.command(name='run')
+@click.pass_context
+@click.option(
+    '-k', '--limit',
+    type=int,
+    default=scheduler.DEFAULT_LIMIT,
+    help='Maximum number of active runs'
+)
+@click.option(
+    '--per-benchmark',
+    is_flag=True,
+    default=False,
+    help='Apply limit per benchmark instead of per submission'
+)
+@click.option(
+    '-i', '--interval',
+    type=float,
+    default=1.0,
+    help='Initial polling interval in seconds'
+)
+@click.option(
+    '-m', '--max-interval',
+    type=float,
+    default=30.0,
+    help='Maximum polling interval in seconds'
+)
+@click.option(
+    '-t', '--timeout',
+    type=float,
+    required=False,
+    help='Stop after timeout (in seconds)'
+)
+def run_queue(ctx, limit, per_benchmark, interval, max_interval, timeout):
+    """Start queued runs until the queue is empty."""
+
+    def echo_entry(entry):
+        """Print state changes for queue entries."""
+        if 'error' in entry:
+            msg = 'error: {}'.format(entry['error'])
+        else:
+            msg = 'run {} in state {}'.format(
+                entry['runId'],
+                entry['runState']
+            )
+        click.echo('{} {}'.format(entry['id'][:8], msg))
+
+    try:
+        runs = scheduler.RunQueue(config.QUEUE_FILE())
+        scheduler.process_queue(
+            client=ctx.obj['CLIENT'],
+            queue=runs,
+            limit=limit,
+            per_benchmark=per_benchmark,
+            interval=interval,
+            max_interval=max_interval,
+            timeout=timeout,
+            callback=echo_entry
+        )
+        pending = len(runs.active()) + len(runs.queued())
+        if pending:
+            click.echo('{} run(s) not finished.'.format(pending))
+            ctx.exit(1)
+    except (requests.ConnectionError, requests.HTTPError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+
+
+queue.add_command(add_runs)
+queue.add_command(clear_queue)
+queue.add_command(list_queue)
+queue.add_command(run_queue)
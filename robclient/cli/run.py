@@ -13,15 +13,16 @@ import json
 import os
 import requests
 
-from flowserv.cli.parameter import read
-from flowserv.model.parameter.files import PARA_FILE
-from flowserv.model.parameter.string import PARA_STRING
-from flowserv.model.template.parameter import ParameterIndex
-from flowserv.service.run.argument import ARG, GET_FILE
-from robclient.table import ResultTable
-
-import flowserv.util as util
+from robclient.download import DEFAULT_JOBS
+from robclient.output import create_writer
+from robclient.protocol import ARG, GET_FILE, PARA_FILE, PARA_STRING
+from robclient.protocol import STATE_SUCCESS, ParameterIndex
+from robclient.table import echo_download
+from robclient.watch import TERMINAL_STATES
+
 import robclient.config as config
+import robclient.sweep as sweep
+import robclient.watch as watch
 
 
 @click.group(name='runs')
@@ -38,20 +39,17 @@ def runs():
 def cancel_run(ctx, run):
     """Cancel active run."""
     try:
-        url = ctx.obj['URLS'].cancel_run(run_id=run)
-        headers = ctx.obj['HEADERS']
-        data = {'reason': 'User request'}
-        r = requests.put(url, json=data, headers=headers)
-        r.raise_for_status()
-        body = r.json()
+        body = ctx.obj['CLIENT'].cancel_run(run_id=run)
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
             click.echo('Run  \'{}\' canceled.'.format(run))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
     except (ValueError, IOError, OSError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Delete run ---------------------------------------------------------------
@@ -62,15 +60,14 @@ def cancel_run(ctx, run):
 def delete_run(ctx, run):
     """Delete run."""
     try:
-        url = ctx.obj['URLS'].delete_run(run_id=run)
-        headers = ctx.obj['HEADERS']
-        r = requests.delete(url, headers=headers)
-        r.raise_for_status()
+        ctx.obj['CLIENT'].delete_run(run_id=run)
         click.echo('Run  \'{}\' deleted.'.format(run))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
     except (ValueError, IOError, OSError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Download resource file(s) ------------------------------------------------
@@ -91,46 +88,75 @@ def delete_run(ctx, run):
     required=False,
     help='Save as ...'
 )
-def download_resource(ctx, run, resource, all, output):
+@click.option(
+    '--resources',
+    required=False,
+    help='Download resource files (comma-separated identifier or \'all\')'
+)
+@click.option(
+    '-d', '--directory',
+    type=click.Path(file_okay=False, writable=True),
+    default='.',
+    help='Output directory for resource files'
+)
+@click.option(
+    '-j', '--jobs',
+    type=int,
+    default=DEFAULT_JOBS,
+    help='Number of parallel downloads'
+)
+@click.option(
+    '--segments',
+    type=int,
+    required=False,
+    help='Download archive in segments over parallel connections'
+)
+def download_resource(
+    ctx, run, resource, all, output, resources, directory, jobs,
+    segments
+):
     """Download a run resource file."""
-    # We cannot have a resource and the all flag being True
-    if resource is not None and all:
+    # Exactly one of resource, resources and the all flag has to be given
+    selected = [resource is not None, all, resources is not None]
+    if selected.count(True) > 1:
         click.echo('invalid argument combination')
-        return
-    elif resource is None and not all:
-        click.echo('select resource or all')
-        return
-    urls = ctx.obj['URLS']
-    if resource is not None:
-        url = urls.download_run_file(run_id=run, resource_id=resource)
-    else:
-        url = urls.download_run_archive(run_id=run)
-    headers = ctx.obj['HEADERS']
+        ctx.exit(1)
+    elif selected.count(True) == 0:
+        click.echo('select resource, resources or all')
+        ctx.exit(1)
+    client = ctx.obj['CLIENT']
     try:
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        content = r.headers['Content-Disposition']
-        if output is not None:
-            filename = output
-        elif 'filename=' in content:
-            filename = content[content.find('filename='):].split('=')[1]
-            if filename.startswith('"') or filename.startswith("'"):
-                filename = filename[1:]
-            if filename.endswith('"') or filename.endswith("'"):
-                filename = filename[:-1]
+        if resources is not None:
+            if resources == 'all':
+                resource_ids = None
+            else:
+                resource_ids = resources.split(',')
+            files = client.download_run_resources(
+                run_id=run,
+                targetdir=directory,
+                resource_ids=resource_ids,
+                jobs=jobs,
+                callback=echo_download
+            )
+            click.echo('Downloaded {} file(s).'.format(len(files)))
+        elif resource is not None:
+            client.download_run_file(
+                run_id=run,
+                resource_id=resource,
+                filename=output
+            )
         else:
-            click.echo('not output filename found')
-            return
-        # Write the file contents in the response to the specified path
-        # Based on https://www.techcoil.com/blog/how-to-download-a-file-via-http-post-and-http-get-with-python-3-requests-library/  # noqa: E501
-        targetdir = os.path.dirname(filename)
-        if targetdir:
-            util.create_dir(targetdir)
-        with open(filename, 'wb') as local_file:
-            for chunk in r.iter_content(chunk_size=128):
-                local_file.write(chunk)
+            client.download_run_archive(
+                run_id=run,
+                filename=output,
+                segments=segments
+            )
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Get run ------------------------------------------------------------------
@@ -141,11 +167,7 @@ def download_resource(ctx, run, resource, all, output):
 def get_run(ctx, run):
     """List all submission runs."""
     try:
-        url = ctx.obj['URLS'].get_run(run_id=run)
-        headers = ctx.obj['HEADERS']
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        body = r.json()
+        body = ctx.obj['CLIENT'].get_run(run_id=run)
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
@@ -183,8 +205,10 @@ def get_run(ctx, run):
                     click.echo('  {} ({})'.format(r_name, r_id))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
     except (ValueError, IOError, OSError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- List runs ----------------------------------------------------------------
@@ -201,29 +225,33 @@ def list_runs(ctx, submission):
     s_id = submission if submission else config.SUBMISSION_ID()
     if s_id is None:
         click.echo('no submission specified')
-        return
+        ctx.exit(1)
+    client = ctx.obj['CLIENT']
     try:
-        url = ctx.obj['URLS'].list_runs(submission_id=s_id)
-        headers = ctx.obj['HEADERS']
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        body = r.json()
         if ctx.obj['RAW']:
+            body = client.list_runs(submission_id=s_id)
             click.echo(json.dumps(body, indent=4))
         else:
-            table = ResultTable(
+            if ctx.obj['STREAM']:
+                runs = client.stream_runs(submission_id=s_id)
+            else:
+                runs = client.list_runs(submission_id=s_id)['runs']
+            table = create_writer(
+                ctx.obj['FORMAT'],
                 headline=['ID', 'Submitted at', 'State'],
-                types=[PARA_STRING] * 4
+                types=[PARA_STRING] * 3,
+                keys=['id', 'createdAt', 'state'],
+                stream=ctx.obj['STREAM']
             )
-            for r in body['runs']:
-                run = list([r['id'], r['createdAt'], r['state']])
-                table.add(run)
-            for line in table.format():
-                click.echo(line)
+            with table:
+                for r in runs:
+                    table.add([r['id'], r['createdAt'], r['state']])
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
     except (ValueError, IOError, OSError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Start new submission run -------------------------------------------------
@@ -237,16 +265,22 @@ def list_runs(ctx, submission):
 )
 def start_run(ctx, submission):
     """Start new submission run."""
+    try:
+        # Interactive input of argument values requires flowserv-core.
+        from flowserv.cli.parameter import read
+    except ImportError:
+        click.echo(
+            "reading arguments requires package 'flowserv-core' (install "
+            "with 'pip install rob-client[prompt]' or use 'runs sweep')"
+        )
+        ctx.exit(1)
     s_id = submission if submission else config.SUBMISSION_ID()
     if s_id is None:
         click.echo('no submission specified')
-        return
+        ctx.exit(1)
     try:
-        url = ctx.obj['URLS'].get_submission(submission_id=s_id)
-        headers = ctx.obj['HEADERS']
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        body = r.json()
+        client = ctx.obj['CLIENT']
+        body = client.get_submission(submission_id=s_id)
         # Create list of file descriptors for uploaded files that are included
         # in the submission handle
         files = []
@@ -256,11 +290,10 @@ def start_run(ctx, submission):
         parameters = ParameterIndex.from_dict(body['parameters'])
         # Read values for all parameters
         args = read(parameters.sorted(), files=files)
-        data = {'arguments': [ARG(key, val) for key, val in args.items()]}
-        url = ctx.obj['URLS'].start_run(submission_id=s_id)
-        r = requests.post(url, json=data, headers=headers)
-        r.raise_for_status()
-        body = r.json()
+        body = client.start_run(
+            submission_id=s_id,
+            arguments=[ARG(key, val) for key, val in args.items()]
+        )
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
@@ -269,8 +302,235 @@ def start_run(ctx, submission):
             click.echo('run {} in state {}'.format(run_id, run_state))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+
+
+# -- Parameter sweep ----------------------------------------------------------
+
+@click.command(name='sweep')
+@click.pass_context
+@click.option(
+    '-s', '--submission',
+    required=False,
+    help='Submission identifier'
+)
+@click.option(
+    '-i', '--input',
+    type=click.Path(exists=True, dir_okay=False, readable=True),
+    required=True,
+    help='Sweep file (JSON, YAML or CSV)'
+)
+@click.option(
+    '-j', '--jobs',
+    type=int,
+    default=sweep.DEFAULT_JOBS,
+    help='Number of runs that are started in parallel'
+)
+@click.option(
+    '--rate',
+    type=float,
+    required=False,
+    help='Maximum number of runs that are started per second'
+)
+@click.option(
+    '-m', '--manifest',
+    type=click.Path(dir_okay=False, writable=True),
+    required=False,
+    help='Write run identifier to manifest file'
+)
+@click.option(
+    '--dry-run',
+    is_flag=True,
+    default=False,
+    help='Validate argument sets without starting runs'
+)
+def sweep_runs(ctx, submission, input, jobs, rate, manifest, dry_run):
+    """Start runs for a parameter sweep."""
+    s_id = submission if submission else config.SUBMISSION_ID()
+    if s_id is None:
+        click.echo('no submission specified')
+        ctx.exit(1)
+    try:
+        client = ctx.obj['CLIENT']
+        body = client.get_submission(submission_id=s_id)
+        parameters = ParameterIndex.from_dict(body['parameters'])
+        arguments = sweep.validate_arguments(
+            parameters=parameters,
+            argsets=sweep.read_sweep(input),
+            files=[fh['id'] for fh in body['files']]
+        )
+        if dry_run:
+            click.echo('{} valid argument set(s).'.format(len(arguments)))
+            return
+
+        started = list()
+
+        def echo_run(entry, count, total):
+            """Add each started run to the manifest as soon as it starts and
+            print identifier of started runs and errors.
+            """
+            if manifest is not None:
+                started.append(entry)
+                sweep.write_manifest(manifest, s_id, started)
+            if ctx.obj['RAW']:
+                return
+            if 'error' in entry:
+                msg = 'error: {}'.format(entry['error'])
+            else:
+                msg = 'run {} in state {}'.format(
+                    entry['runId'],
+                    entry['state']
+                )
+            click.echo('[{}/{}] {}'.format(count, total, msg))
+
+        runs = sweep.launch_runs(
+            client=client,
+            submission_id=s_id,
+            arguments=arguments,
+            jobs=jobs,
+            rate=rate,
+            callback=echo_run
+        )
+        doc = {'submission': s_id, 'runs': runs}
+        if manifest is not None:
+            # Rewrite the manifest with the runs in the order of the sweep
+            # file.
+            sweep.write_manifest(manifest, s_id, runs)
+        errors = len([r for r in runs if 'error' in r])
+        if ctx.obj['RAW']:
+            click.echo(json.dumps(doc, indent=4))
+        else:
+            msg = 'Started {} run(s), {} error(s).'
+            click.echo(msg.format(len(runs) - errors, errors))
+        if errors:
+            ctx.exit(1)
+    except (requests.ConnectionError, requests.HTTPError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
+
+
+# -- Watch runs ---------------------------------------------------------------
+
+@click.command(name='watch')
+@click.pass_context
+@click.option(
+    '-r', '--run',
+    multiple=True,
+    help='Run identifier (repeat for multiple runs)'
+)
+@click.option(
+    '-s', '--submission',
+    required=False,
+    help='Watch all active runs of submission'
+)
+@click.option(
+    '-i', '--interval',
+    type=float,
+    default=1.0,
+    help='Initial polling interval in seconds'
+)
+@click.option(
+    '-m', '--max-interval',
+    type=float,
+    default=30.0,
+    help='Maximum polling interval in seconds'
+)
+@click.option(
+    '-t', '--timeout',
+    type=float,
+    required=False,
+    help='Stop watching after timeout (in seconds)'
+)
+@click.option(
+    '-d', '--download',
+    type=click.Path(file_okay=False, writable=True),
+    required=False,
+    help='Download resources of successful runs to directory'
+)
+@click.option(
+    '-j', '--jobs',
+    type=int,
+    default=DEFAULT_JOBS,
+    help='Number of parallel requests'
+)
+def watch_runs(
+    ctx, run, submission, interval, max_interval, timeout, download, jobs
+):
+    """Watch runs until they are finished."""
+    client = ctx.obj['CLIENT']
+    try:
+        run_ids = list(run)
+        if not run_ids:
+            s_id = submission if submission else config.SUBMISSION_ID()
+            if s_id is None:
+                click.echo('no run or submission specified')
+                ctx.exit(1)
+            for r in client.list_runs(submission_id=s_id)['runs']:
+                if r['state'] not in TERMINAL_STATES:
+                    run_ids.append(r['id'])
+            if not run_ids:
+                click.echo('no active runs')
+                ctx.exit(1)
+
+        def state_change(run_id, old_state, new_state, body):
+            """Print state transitions and download the resources of runs
+            that finished successfully.
+            """
+            if old_state is None:
+                click.echo('{} {}'.format(run_id, new_state))
+            else:
+                msg = '{} {} -> {}'
+                click.echo(msg.format(run_id, old_state, new_state))
+            if download is not None and new_state == STATE_SUCCESS:
+                client.download_run_resources(
+                    run_id=run_id,
+                    targetdir=os.path.join(download, run_id),
+                    jobs=jobs,
+                    callback=echo_download
+                )
+
+        failed = set()
+
+        def poll_error(run_id, error, removed):
+            """Print errors for runs that cannot be polled or whose results
+            cannot be downloaded.
+            """
+            if removed:
+                failed.add(run_id)
+                click.echo('{} failed: {}'.format(run_id, error))
+            else:
+                click.echo('{} error: {} (retrying)'.format(run_id, error))
+
+        result = watch.watch_runs(
+            client=client,
+            run_ids=run_ids,
+            callback=state_change,
+            interval=interval,
+            max_interval=max_interval,
+            timeout=timeout,
+            jobs=jobs,
+            error_callback=poll_error
+        )
+        pending = list()
+        for run_id in run_ids:
+            if run_id not in result and run_id not in failed:
+                pending.append(run_id)
+        if pending:
+            click.echo('timeout for {}'.format(', '.join(pending)))
+        if pending or failed:
+            ctx.exit(1)
+    except (requests.ConnectionError, requests.HTTPError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
     except (ValueError, IOError, OSError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 runs.add_command(cancel_run)
@@ -279,3 +539,5 @@ runs.add_command(download_resource)
 runs.add_command(get_run)
 runs.add_command(list_runs)
 runs.add_command(start_run)
+runs.add_command(sweep_runs)
+runs.add_command(watch_runs)
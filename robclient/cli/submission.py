@@ -12,11 +12,10 @@ import click
 import json
 import requests
 
-from flowserv.model.parameter.numeric import PARA_INT
-from flowserv.model.parameter.string import PARA_STRING
+from robclient.output import create_writer
+from robclient.protocol import PARA_INT, PARA_STRING
 from robclient.table import ResultTable
 
-import flowserv.util as util
 import robclient.config as config
 
 
@@ -38,16 +37,13 @@ def create_submission(ctx, benchmark, name, members):
     b_id = benchmark if benchmark else config.BENCHMARK_ID()
     if b_id is None:
         click.echo('no benchmark specified')
-        return
-    url = ctx.obj['URLS'].create_submission(benchmark_id=b_id)
-    headers = ctx.obj['HEADERS']
-    data = {'name': name}
-    if members is not None:
-        data['members'] = members.split(',')
+        ctx.exit(1)
     try:
-        r = requests.post(url, json=data, headers=headers)
-        r.raise_for_status()
-        body = r.json()
+        body = ctx.obj['CLIENT'].create_submission(
+            benchmark_id=b_id,
+            name=name,
+            members=members.split(',') if members is not None else None
+        )
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
@@ -55,6 +51,7 @@ def create_submission(ctx, benchmark, name, members):
             click.echo('export {}={}'.format(config.ROB_SUBMISSION, s_id))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Delete submission --------------------------------------------------------
@@ -71,18 +68,16 @@ def delete_submission(ctx, submission):
     s_id = submission if submission else config.SUBMISSION_ID()
     if s_id is None:
         click.echo('no submission specified')
-        return
+        ctx.exit(1)
     msg = 'Do you really want to delete submission {}'
     if not click.confirm(msg.format(s_id)):
         return
-    url = ctx.obj['URLS'].delete_submission(submission_id=s_id)
-    headers = ctx.obj['HEADERS']
     try:
-        r = requests.delete(url, headers=headers)
-        r.raise_for_status()
+        ctx.obj['CLIENT'].delete_submission(submission_id=s_id)
         click.echo('Submission \'{}\' deleted.'.format(s_id))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Get submission -----------------------------------------------------------
@@ -99,13 +94,9 @@ def get_submission(ctx, submission):
     s_id = submission if submission else config.SUBMISSION_ID()
     if s_id is None:
         click.echo('no submission specified')
-        return
-    url = ctx.obj['URLS'].get_submission(s_id)
-    headers = ctx.obj['HEADERS']
+        ctx.exit(1)
     try:
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        body = r.json()
+        body = ctx.obj['CLIENT'].get_submission(s_id)
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
@@ -146,6 +137,7 @@ def get_submission(ctx, submission):
                 click.echo(line)
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- List submissions ---------------------------------------------------------
@@ -160,22 +152,33 @@ def get_submission(ctx, submission):
 def list_submissions(ctx, benchmark):
     """Show submissions for a benchmark or user."""
     b_id = benchmark if benchmark else config.BENCHMARK_ID()
-    url = ctx.obj['URLS'].list_submissions(benchmark_id=b_id)
-    headers = ctx.obj['HEADERS']
+    client = ctx.obj['CLIENT']
     try:
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        body = r.json()
         if ctx.obj['RAW']:
+            body = client.list_submissions(benchmark_id=b_id)
             click.echo(json.dumps(body, indent=4))
         else:
-            table = ResultTable(['ID', 'Name'], [PARA_STRING] * 2)
-            for s in body['submissions']:
-                table.add([s['id'], s['name']])
-            for line in table.format():
-                click.echo(line)
+            if ctx.obj['STREAM']:
+                submissions = client.stream_submissions(benchmark_id=b_id)
+            else:
+                body = client.list_submissions(benchmark_id=b_id)
+                submissions = body['submissions']
+            table = create_writer(
+                ctx.obj['FORMAT'],
+                headline=['ID', 'Name'],
+                types=[PARA_STRING] * 2,
+                keys=['id', 'name'],
+                stream=ctx.obj['STREAM']
+            )
+            with table:
+                for s in submissions:
+                    table.add([s['id'], s['name']])
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Update submission --------------------------------------------------------
@@ -197,18 +200,13 @@ def update_submission(ctx, submission, name, members):
     s_id = submission if submission else config.SUBMISSION_ID()
     if s_id is None:
         click.echo('no submission specified')
-        return
-    url = ctx.obj['URLS'].update_submission(submission_id=s_id)
-    headers = ctx.obj['HEADERS']
-    data = dict()
-    if name is not None:
-        data['name'] = name
-    if members is not None:
-        data['members'] = members.split(',')
+        ctx.exit(1)
     try:
-        r = requests.put(url, json=data, headers=headers)
-        r.raise_for_status()
-        body = r.json()
+        body = ctx.obj['CLIENT'].update_submission(
+            submission_id=s_id,
+            name=name,
+            members=members.split(',') if members is not None else None
+        )
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
@@ -221,6 +219,7 @@ def update_submission(ctx, submission, name, members):
             click.echo('Members : {}'.format(','.join(members)))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 submissions.add_command(create_submission)
@@ -12,8 +12,8 @@ import click
 import json
 import requests
 
-from flowserv.model.parameter.string import PARA_STRING
-from robclient.table import ResultTable
+from robclient.output import create_writer
+from robclient.protocol import PARA_STRING
 
 import robclient.config as config
 
@@ -24,22 +24,31 @@ import robclient.config as config
 @click.pass_context
 def list(ctx):
     """List all registered users."""
-    url = ctx.obj['URLS'].list_users()
-    headers = ctx.obj['HEADERS']
+    client = ctx.obj['CLIENT']
     try:
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        body = r.json()
         if ctx.obj['RAW']:
-            click.echo(json.dumps(body, indent=4))
+            click.echo(json.dumps(client.list_users(), indent=4))
         else:
-            table = ResultTable(['Name', 'ID'], [PARA_STRING, PARA_STRING])
-            for user in body['users']:
-                table.add([user['username'], user['id']])
-            for line in table.format():
-                click.echo(line)
+            if ctx.obj['STREAM']:
+                users = client.stream_users()
+            else:
+                users = client.list_users()['users']
+            table = create_writer(
+                ctx.obj['FORMAT'],
+                headline=['Name', 'ID'],
+                types=[PARA_STRING, PARA_STRING],
+                keys=['username', 'id'],
+                stream=ctx.obj['STREAM']
+            )
+            with table:
+                for user in users:
+                    table.add([user['username'], user['id']])
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
+    except (ValueError, IOError, OSError) as ex:
+        click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Login --------------------------------------------------------------------
@@ -61,13 +70,8 @@ def list(ctx):
 )
 def login(ctx, username, password):
     """Login to to obtain access token."""
-    url = ctx.obj['URLS'].login()
-    headers = ctx.obj['HEADERS']
-    data = {'username': username, 'password': password}
     try:
-        r = requests.post(url, json=data, headers=headers)
-        r.raise_for_status()
-        body = r.json()
+        body = ctx.obj['CLIENT'].login(username=username, password=password)
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
@@ -75,6 +79,7 @@ def login(ctx, username, password):
             click.echo('export {}={}'.format(config.ROB_ACCESS_TOKEN, token))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Logout -------------------------------------------------------------------
@@ -83,19 +88,15 @@ def login(ctx, username, password):
 @click.pass_context
 def logout(ctx):
     """Logout from current user session."""
-    # Get user info using the access token
-    url = ctx.obj['URLS'].logout()
-    headers = ctx.obj['HEADERS']
     try:
-        r = requests.post(url, headers=headers)
-        r.raise_for_status()
-        body = r.json()
+        body = ctx.obj['CLIENT'].logout()
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
             click.echo('See ya mate!')
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Register -----------------------------------------------------------------
@@ -117,17 +118,12 @@ def logout(ctx):
 )
 def register(ctx, username, password):
     """Register a new user."""
-    url = ctx.obj['URLS'].register_user()
-    headers = ctx.obj['HEADERS']
-    data = {
-        'username': username,
-        'password': password,
-        'verify': False
-    }
     try:
-        r = requests.post(url, json=data, headers=headers)
-        r.raise_for_status()
-        body = r.json()
+        body = ctx.obj['CLIENT'].register_user(
+            username=username,
+            password=password,
+            verify=False
+        )
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
@@ -136,6 +132,7 @@ def register(ctx, username, password):
             click.echo('Registered {} with ID {}.'.format(user_name, user_id))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Reset Password -----------------------------------------------------------
@@ -157,24 +154,20 @@ def register(ctx, username, password):
 )
 def reset_password(ctx, username, password):
     """Reset user password."""
-    url = ctx.obj['URLS'].request_password_reset()
-    headers = ctx.obj['HEADERS']
-    data = {'username': username}
+    client = ctx.obj['CLIENT']
     try:
-        r = requests.post(url, json=data, headers=headers)
-        r.raise_for_status()
-        body = r.json()
-        reqest_id = body['requestId']
-        url = ctx.obj['URLS'].reset_password()
-        data = {'requestId': reqest_id, 'password': password}
-        r = requests.post(url, json=data, headers=headers)
-        r.raise_for_status()
+        body = client.request_password_reset(username=username)
+        client.reset_password(
+            request_id=body['requestId'],
+            password=password
+        )
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
             click.echo('Password reset.')
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
 
 
 # -- Who am I -----------------------------------------------------------------
@@ -185,12 +178,11 @@ def whoami(ctx):
     """Print name of current user."""
     # Get user info using the access token
     try:
-        r = requests.get(ctx.obj['URLS'].whoami(), headers=ctx.obj['HEADERS'])
-        r.raise_for_status()
-        body = r.json()
+        body = ctx.obj['CLIENT'].whoami()
         if ctx.obj['RAW']:
             click.echo(json.dumps(body, indent=4))
         else:
             click.echo('Logged in as {}.'.format(body['username']))
     except (requests.ConnectionError, requests.HTTPError) as ex:
         click.echo('{}'.format(ex))
+        ctx.exit(1)
@@ -12,14 +12,44 @@ the environment.
 
 import os
 
-from flowserv.config.api import API_URL
 
+"""Environment variables for the base Url of the API. The variables are the
+same that are used by the flowserv API.
+"""
+FLOWSERV_API_HOST = 'FLOWSERV_API_HOST'
+FLOWSERV_API_PATH = 'FLOWSERV_API_PATH'
+FLOWSERV_API_PORT = 'FLOWSERV_API_PORT'
+FLOWSERV_API_PROTOCOL = 'FLOWSERV_API_PROTOCOL'
+
+"""Default values for the base Url of the API."""
+DEFAULT_HOST = 'localhost'
+DEFAULT_PATH = '/flowserv/api/v1'
+DEFAULT_PORT = 5000
+DEFAULT_PROTOCOL = 'http'
 
 """Environment variables for the command line interface."""
 # Access token for the command line interface
 ROB_ACCESS_TOKEN = 'ROB_ACCESS_TOKEN'
+# Path to the Unix domain socket of the local agent
+ROB_AGENT_SOCKET = 'ROB_AGENT_SOCKET'
 # Identifier of the default benchmark
 ROB_BENCHMARK = 'ROB_BENCHMARK'
+# Directory for cached API responses
+ROB_CACHEDIR = 'ROB_CACHEDIR'
+# Maximum size (in bytes) of the response cache
+ROB_CACHESIZE = 'ROB_CACHESIZE'
+# Size of chunks (in bytes) that are written to disk when downloading files
+ROB_CHUNKSIZE = 'ROB_CHUNKSIZE'
+# Path to the SQLite database for the leaderboard history
+ROB_HISTORY = 'ROB_HISTORY'
+# Keep connections to the API server alive between requests
+ROB_KEEPALIVE = 'ROB_KEEPALIVE'
+# Maximum number of connections in the connection pool
+ROB_POOLSIZE = 'ROB_POOLSIZE'
+# Path to the file that contains the local run queue
+ROB_QUEUEFILE = 'ROB_QUEUEFILE'
+# Maximum number of times that a failed request is repeated
+ROB_RETRIES = 'ROB_RETRIES'
 # Identifier of the default submission
 ROB_SUBMISSION = 'ROB_SUBMISSION'
 
@@ -39,6 +69,50 @@ def ACCESS_TOKEN():
         return token
 
 
+def AGENT_SOCKET():
+    """Short-cut to get the path to the Unix domain socket of the local agent
+    from the environment. By default, the socket is 'rob-agent.sock' in the
+    user runtime directory ($XDG_RUNTIME_DIR) or '~/.rob-agent.sock' if the
+    runtime directory is not set.
+
+    Returns
+    -------
+    string
+    """
+    filename = os.environ.get(ROB_AGENT_SOCKET)
+    if filename is not None:
+        return filename
+    base_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if base_dir:
+        return os.path.join(base_dir, 'rob-agent.sock')
+    return os.path.join(os.path.expanduser('~'), '.rob-agent.sock')
+
+
+def API_URL():
+    """Get the base Url for the API from the environment variables
+    'FLOWSERV_API_PROTOCOL', 'FLOWSERV_API_HOST', 'FLOWSERV_API_PORT' and
+    'FLOWSERV_API_PATH'. Default values are used for variables that are not
+    set. The port is omitted from the Url if it is 80.
+
+    Returns
+    -------
+    string
+
+    Raises
+    ------
+    ValueError
+    """
+    protocol = os.environ.get(FLOWSERV_API_PROTOCOL, DEFAULT_PROTOCOL)
+    host = os.environ.get(FLOWSERV_API_HOST, DEFAULT_HOST)
+    port = int(os.environ.get(FLOWSERV_API_PORT, DEFAULT_PORT))
+    if port != 80:
+        host = '{}:{}'.format(host, port)
+    path = os.environ.get(FLOWSERV_API_PATH, DEFAULT_PATH)
+    if not path.startswith('/'):
+        path = '/' + path
+    return '{}://{}{}'.format(protocol, host, path)
+
+
 def BENCHMARK_ID(default_value=None):
     """Short-cut to get the value for the default benchmark identifier from the
     environment.
@@ -54,6 +128,134 @@ def BENCHMARK_ID(default_value=None):
         return benchmark_id
 
 
+def CACHE_DIR():
+    """Short-cut to get the directory for cached API responses from the
+    environment. By default, responses are cached in the sub-folder 'rob' of
+    the user cache directory ($XDG_CACHE_HOME or ~/.cache).
+
+    Returns
+    -------
+    string
+    """
+    cache_dir = os.environ.get(ROB_CACHEDIR)
+    if cache_dir is not None:
+        return cache_dir
+    base_dir = os.environ.get('XDG_CACHE_HOME')
+    if not base_dir:
+        base_dir = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base_dir, 'rob')
+
+
+def CACHE_SIZE(default_value=None):
+    """Short-cut to get the maximum size (in bytes) of the response cache
+    from the environment.
+
+    Returns
+    -------
+    int
+    """
+    cache_size = os.environ.get(ROB_CACHESIZE)
+    if cache_size is None:
+        return default_value
+    else:
+        return int(cache_size)
+
+
+def CHUNK_SIZE(default_value=None):
+    """Short-cut to get the size of chunks (in bytes) that are written to disk
+    when downloading files from the environment.
+
+    Returns
+    -------
+    int
+    """
+    chunk_size = os.environ.get(ROB_CHUNKSIZE)
+    if chunk_size is None:
+        return default_value
+    else:
+        return int(chunk_size)
+
+
+def HISTORY_FILE():
+    """Short-cut to get the path to the SQLite database for the leaderboard
+    history from the environment. By default, the database is stored as
+    'history.db' in the sub-folder 'rob' of the user data directory
+    ($XDG_DATA_HOME or ~/.local/share).
+
+    Returns
+    -------
+    string
+    """
+    filename = os.environ.get(ROB_HISTORY)
+    if filename is not None:
+        return filename
+    base_dir = os.environ.get('XDG_DATA_HOME')
+    if not base_dir:
+        base_dir = os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(base_dir, 'rob', 'history.db')
+
+
+def KEEP_ALIVE():
+    """Short-cut to get the flag that determines whether connections to the
+    API server are kept alive between requests. Connections are kept alive
+    unless the environment variable is set to a false value.
+
+    Returns
+    -------
+    bool
+    """
+    value = os.environ.get(ROB_KEEPALIVE)
+    if value is None:
+        return True
+    return value.lower() not in ['0', 'false', 'no', 'off']
+
+
+def POOL_SIZE(default_value=None):
+    """Short-cut to get the maximum number of connections in the connection
+    pool from the environment.
+
+    Returns
+    -------
+    int
+    """
+    pool_size = os.environ.get(ROB_POOLSIZE)
+    if pool_size is None:
+        return default_value
+    else:
+        return int(pool_size)
+
+
+def QUEUE_FILE():
+    """Short-cut to get the path to the local run queue file from the
+    environment. By default, the queue is stored in the file '.robqueue.json'
+    in the home directory of the user.
+
+    Returns
+    -------
+    string
+    """
+    filename = os.environ.get(ROB_QUEUEFILE)
+    if filename is None:
+        return os.path.join(os.path.expanduser('~'), '.robqueue.json')
+    else:
+        return filename
+
+
+def RETRIES(default_value=None):
+    """Short-cut to get the maximum number of times that a failed request is
+    repeated from the environment.
+
+    Returns
+    -------
+    int
+    """
+    retries = os.environ.get(ROB_RETRIES)
+    if retries is None:
+        return default_value
+    else:
+        return int(retries)
+
+
 def SUBMISSION_ID(default_value=None):
     """Short-cut to get the value for the default submission identifier from the
     environment.
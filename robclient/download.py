@@ -0,0 +1,458 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Download engine for files and archives that are served by the API. The
+response body is streamed to disk in chunks so that memory usage remains
+constant independently of the size of the downloaded file.
+
+Downloads are first written to a partial file '<filename>.part'. The file is
+renamed once the download is complete. If a previous download of the same file
+was interrupted, the download resumes at the end of the partial file using a
+HTTP Range request. The entity tag (or last modification date) and the total
+size of the file are kept in a metadata file '<filename>.part.json' to ensure
+that the remaining bytes belong to the same version of the file.
+"""
+
+import json
+import os
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+"""Default size (in bytes) for chunks that are written to disk."""
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+"""Default number of files that are downloaded in parallel."""
+DEFAULT_JOBS = 4
+
+"""Minimal size (in bytes) of a segment in segmented downloads."""
+MIN_SEGMENT_SIZE = 1024 * 1024
+
+"""Suffixes for partial downloads and their metadata files."""
+PART_SUFFIX = '.part'
+META_SUFFIX = '.part.json'
+
+
+def download(session, url, filename=None, chunk_size=None, resume=True):
+    """Download the file at the given Url. If no output file is given the name
+    from the Content-Disposition header of the response is used.
+
+    If resume is True and a partial download for the output file exists, only
+    the remaining bytes are requested from the server.
+
+    Parameters
+    ----------
+    session: robclient.session.ClientSession
+        Session for API requests
+    url: string
+        Resource Url
+    filename: string, optional
+        Output file
+    chunk_size: int, optional
+        Size of chunks that are read from the response stream
+    resume: bool, default=True
+        Resume interrupted downloads
+
+    Returns
+    -------
+    string
+
+    Raises
+    ------
+    IOError
+    ValueError
+    """
+    r = send_request(session, url, filename=filename if resume else None)
+    with r:
+        r.raise_for_status()
+        if filename is None:
+            filename = get_filename(r)
+            if resume and read_partial(filename) is not None:
+                # Request the remaining bytes of the partial download instead
+                # of the full file.
+                r.close()
+                return download(
+                    session,
+                    url,
+                    filename=filename,
+                    chunk_size=chunk_size,
+                    resume=True
+                )
+        targetdir = os.path.dirname(filename)
+        if targetdir:
+            os.makedirs(targetdir, exist_ok=True)
+        partfile = filename + PART_SUFFIX
+        metafile = filename + META_SUFFIX
+        if r.status_code == 206:
+            offset, total = content_range(r)
+            if offset != os.path.getsize(partfile):
+                raise IOError('invalid content range for {}'.format(url))
+        else:
+            offset, total = 0, content_length(r)
+            # Keep information about the file version to validate the partial
+            # download if it gets interrupted.
+            with open(metafile, 'w') as f:
+                json.dump(
+                    {
+                        'etag': r.headers.get('ETag'),
+                        'modified': r.headers.get('Last-Modified'),
+                        'size': total
+                    },
+                    f
+                )
+        save_file(r, partfile, chunk_size=chunk_size, append=offset > 0)
+    # Ensure that the file is complete before moving it to its final location.
+    if total is not None and os.path.getsize(partfile) != total:
+        msg = 'incomplete download for {} ({} of {} bytes)'
+        raise IOError(msg.format(filename, os.path.getsize(partfile), total))
+    os.replace(partfile, filename)
+    if os.path.isfile(metafile):
+        os.remove(metafile)
+    return filename
+
+
+def download_files(session, files, jobs=None, chunk_size=None, callback=None):
+    """Download multiple files in parallel. Files are given as a list of
+    tuples containing the resource Url and the output file. After each file is
+    downloaded the callback is called with the output file name, the number of
+    completed downloads and the total number of files.
+
+    Parameters
+    ----------
+    session: robclient.session.ClientSession
+        Session for API requests
+    files: list(tuple(string, string))
+        List of resource Url and output file pairs
+    jobs: int, optional
+        Number of parallel downloads
+    chunk_size: int, optional
+        Size of chunks that are read from the response stream
+    callback: callable, optional
+        Function that is called for each downloaded file
+
+    Returns
+    -------
+    list(string)
+    """
+    jobs = jobs if jobs else DEFAULT_JOBS
+    # Each download uses its own connection.
+    session.ensure_pool_size(jobs)
+    result = list()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(download, session, url, filename, chunk_size)
+            for url, filename in files
+        ]
+        for future in as_completed(futures):
+            filename = future.result()
+            result.append(filename)
+            if callback is not None:
+                callback(filename, len(result), len(futures))
+    return result
+
+
+def download_segmented(
+    session, url, filename=None, segments=DEFAULT_JOBS, chunk_size=None
+):
+    """Download a single file by splitting it into multiple byte ranges that
+    are fetched over parallel connections. Each segment is written into a
+    preallocated file at its position in the file.
+
+    Falls back to a regular download if the server does not support range
+    requests or if the file is too small to be split.
+
+    Parameters
+    ----------
+    session: robclient.session.ClientSession
+        Session for API requests
+    url: string
+        Resource Url
+    filename: string, optional
+        Output file
+    segments: int, default=4
+        Number of parallel connections
+    chunk_size: int, optional
+        Size of chunks that are read from the response stream
+
+    Returns
+    -------
+    string
+
+    Raises
+    ------
+    IOError
+    ValueError
+    """
+    # Request the first byte of the file to get the file size and version.
+    with session.get(url, stream=True, headers={'Range': 'bytes=0-0'}) as r:
+        r.raise_for_status()
+        if filename is None:
+            filename = get_filename(r)
+        if r.status_code == 206:
+            _, total = content_range(r)
+        else:
+            total = None
+        validator = r.headers.get('ETag') or r.headers.get('Last-Modified')
+    if total is None or total < 2 * MIN_SEGMENT_SIZE:
+        return download(session, url, filename=filename, chunk_size=chunk_size)
+    targetdir = os.path.dirname(filename)
+    if targetdir:
+        os.makedirs(targetdir, exist_ok=True)
+    partfile = filename + PART_SUFFIX
+    metafile = filename + META_SUFFIX
+    # The partial file of a segmented download cannot be resumed. Remove the
+    # metadata file of a previously interrupted download.
+    if os.path.isfile(metafile):
+        os.remove(metafile)
+    with open(partfile, 'wb') as f:
+        f.truncate(total)
+    # Split the file into (almost) equal-sized byte ranges.
+    segments = max(1, min(segments, total // MIN_SEGMENT_SIZE))
+    size = total // segments
+    ranges = list()
+    for i in range(segments):
+        start = i * size
+        end = start + size - 1 if i < segments - 1 else total - 1
+        ranges.append((start, end))
+    session.ensure_pool_size(segments)
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        futures = [
+            executor.submit(
+                download_segment,
+                session,
+                url,
+                partfile,
+                start,
+                end,
+                validator,
+                chunk_size
+            ) for start, end in ranges
+        ]
+        for future in as_completed(futures):
+            future.result()
+    os.replace(partfile, filename)
+    return filename
+
+
+def download_segment(
+    session, url, filename, start, end, validator=None, chunk_size=None
+):
+    """Download the byte range [start, end] of the file at the given Url and
+    write it at the same position into the output file. The output file is
+    expected to exist.
+
+    Parameters
+    ----------
+    session: robclient.session.ClientSession
+        Session for API requests
+    url: string
+        Resource Url
+    filename: string
+        Output file
+    start: int
+        Position of the first byte in the segment
+    end: int
+        Position of the last byte in the segment
+    validator: string, optional
+        Entity tag or modification date of the downloaded file version
+    chunk_size: int, optional
+        Size of chunks that are read from the response stream
+
+    Raises
+    ------
+    IOError
+    """
+    if not chunk_size:
+        chunk_size = DEFAULT_CHUNK_SIZE
+    headers = {'Range': 'bytes={}-{}'.format(start, end)}
+    if validator is not None:
+        headers['If-Range'] = validator
+    with session.get(url, stream=True, headers=headers) as r:
+        r.raise_for_status()
+        # The server returns the full file if the file was modified.
+        if r.status_code != 206 or content_range(r)[0] != start:
+            raise IOError('file modified during download of {}'.format(url))
+        pos = start
+        with open(filename, 'r+b') as f:
+            fd = f.fileno()
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                if hasattr(os, 'pwrite'):
+                    os.pwrite(fd, chunk, pos)
+                else:
+                    f.seek(pos)
+                    f.write(chunk)
+                pos += len(chunk)
+    if pos != end + 1:
+        msg = 'incomplete segment {}-{} for {}'
+        raise IOError(msg.format(start, end, url))
+
+
+def get_filename(response):
+    """Get the name of the downloaded file from the Content-Disposition header
+    of the given response.
+
+    Parameters
+    ----------
+    response: requests.Response
+        Response for a file download request
+
+    Returns
+    -------
+    string
+
+    Raises
+    ------
+    ValueError
+    """
+    content = response.headers.get('Content-Disposition', '')
+    if 'filename=' not in content:
+        raise ValueError('no output filename found')
+    filename = content[content.find('filename='):].split('=')[1]
+    if filename.startswith('"') or filename.startswith("'"):
+        filename = filename[1:]
+    if filename.endswith('"') or filename.endswith("'"):
+        filename = filename[:-1]
+    return filename
+
+
+def save_file(response, filename, chunk_size=None, append=False):
+    """Write the file contents in the streamed response to the specified path.
+
+    Parameters
+    ----------
+    response: requests.Response
+        Response for a file download request
+    filename: string
+        Output file
+    chunk_size: int, optional
+        Size of chunks that are read from the response stream
+    append: bool, default=False
+        Append the response contents to an existing file
+    """
+    if not chunk_size:
+        chunk_size = DEFAULT_CHUNK_SIZE
+    with open(filename, 'ab' if append else 'wb') as local_file:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            local_file.write(chunk)
+
+
+def send_request(session, url, filename=None):
+    """Send GET request for a file download. If a partial download for the
+    given file exists, a range request for the remaining bytes is sent. The
+    range request is conditioned on the file version (If-Range) if the entity
+    tag or modification date of the file is known. If the server returns the
+    full file the partial download is overwritten.
+
+    Parameters
+    ----------
+    session: robclient.session.ClientSession
+        Session for API requests
+    url: string
+        Resource Url
+    filename: string, optional
+        Output file
+
+    Returns
+    -------
+    requests.Response
+    """
+    headers = dict()
+    meta = read_partial(filename) if filename is not None else None
+    if meta is not None:
+        headers['Range'] = 'bytes={}-'.format(meta['offset'])
+        validator = meta.get('etag') or meta.get('modified')
+        if validator is not None:
+            headers['If-Range'] = validator
+    r = session.get(url, stream=True, headers=headers)
+    if meta is not None:
+        valid = r.status_code != 416
+        if r.status_code == 206:
+            # Ensure that the server returned the remaining bytes of a file
+            # with the expected size.
+            offset, total = content_range(r)
+            valid = offset == meta['offset'] and total == meta.get('size')
+        if not valid:
+            # Discard the partial download and request the full file.
+            r.close()
+            os.remove(filename + PART_SUFFIX)
+            r = session.get(url, stream=True)
+    return r
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def content_length(response):
+    """Get the size of the file in the response body. Returns None if the size
+    is unknown or if the body is encoded (e.g., compressed) during transfer.
+
+    Parameters
+    ----------
+    response: requests.Response
+        Response for a file download request
+
+    Returns
+    -------
+    int
+    """
+    if response.headers.get('Content-Encoding', 'identity') != 'identity':
+        return None
+    length = response.headers.get('Content-Length')
+    return int(length) if length is not None else None
+
+
+def content_range(response):
+    """Get the start position and the total file size from the Content-Range
+    header of a partial content response. The total size is None if unknown.
+
+    Parameters
+    ----------
+    response: requests.Response
+        Response for a range request
+
+    Returns
+    -------
+    int, int
+    """
+    # Content-Range: bytes <start>-<end>/<size>
+    try:
+        value = response.headers['Content-Range'].split(' ')[1]
+        interval, size = value.split('/')
+        start = int(interval.split('-')[0])
+        return start, int(size) if size != '*' else None
+    except (KeyError, IndexError, ValueError):
+        raise IOError('invalid content range')
+
+
+def read_partial(filename):
+    """Get information about a previously interrupted download for the given
+    file. The result is None if no partial download exists or if the partial
+    download cannot be resumed.
+
+    Parameters
+    ----------
+    filename: string
+        Output file
+
+    Returns
+    -------
+    dict
+    """
+    partfile = filename + PART_SUFFIX
+    metafile = filename + META_SUFFIX
+    if not os.path.isfile(partfile) or not os.path.isfile(metafile):
+        return None
+    try:
+        with open(metafile, 'r') as f:
+            meta = json.load(f)
+    except (IOError, ValueError):
+        return None
+    offset = os.path.getsize(partfile)
+    if offset == 0 or meta.get('size') is None or offset >= meta['size']:
+        return None
+    meta['offset'] = offset
+    return meta
@@ -0,0 +1,218 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Local history of benchmark leaderboards. Leaderboard snapshots are
+recorded in a SQLite database. For each snapshot only the ranking entries that
+changed since the previous snapshot of the same benchmark are stored, i.e.,
+entries that are new, that changed their rank or result values, or that were
+removed from the ranking.
+
+Ranking entries are identified by the submission identifier and the run
+identifier. The last known state of each entry is maintained in a separate
+table so that the changes for a new snapshot are computed in a single pass
+over the ranking.
+"""
+
+import datetime
+import json
+import os
+import sqlite3
+
+
+"""Database schema for the leaderboard history."""
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS snapshot(
+        snapshot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        benchmark_id TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        result_schema TEXT NOT NULL
+    )""",
+    """CREATE INDEX IF NOT EXISTS snapshot_benchmark_idx
+        ON snapshot(benchmark_id, created_at)""",
+    """CREATE TABLE IF NOT EXISTS entry(
+        snapshot_id INTEGER NOT NULL REFERENCES snapshot(snapshot_id),
+        benchmark_id TEXT NOT NULL,
+        submission_id TEXT NOT NULL,
+        submission_name TEXT,
+        run_id TEXT NOT NULL,
+        rank INTEGER,
+        results TEXT
+    )""",
+    """CREATE INDEX IF NOT EXISTS entry_submission_idx
+        ON entry(benchmark_id, submission_id, snapshot_id)""",
+    """CREATE TABLE IF NOT EXISTS latest(
+        benchmark_id TEXT NOT NULL,
+        submission_id TEXT NOT NULL,
+        run_id TEXT NOT NULL,
+        rank INTEGER NOT NULL,
+        results TEXT NOT NULL,
+        PRIMARY KEY(benchmark_id, submission_id, run_id)
+    )"""
+]
+
+
+class LeaderboardHistory(object):
+    """SQLite store for leaderboard snapshots. Rows in the entry table with a
+    rank of NULL mark entries that were removed from the ranking.
+    """
+    def __init__(self, filename):
+        """Open the database and create the tables if they do not exist. The
+        parent directory of the database file is created if necessary.
+
+        Parameters
+        ----------
+        filename: string
+            Path to the SQLite database file
+        """
+        dirname = os.path.dirname(os.path.abspath(filename))
+        os.makedirs(dirname, exist_ok=True)
+        self.con = sqlite3.connect(filename)
+        with self.con:
+            for stmt in SCHEMA:
+                self.con.execute(stmt)
+
+    def close(self):
+        """Close the database connection."""
+        self.con.close()
+
+    def history(self, benchmark_id, submission_id=None):
+        """Get the recorded changes of ranking entries for a benchmark. The
+        result is a list of dictionaries with the snapshot time, submission
+        identifier and name, run identifier, rank and the result values for
+        each change (ordered by snapshot time and rank). Rank and results are
+        None for entries that were removed from the ranking.
+
+        Parameters
+        ----------
+        benchmark_id: string
+            Unique benchmark identifier
+        submission_id: string, optional
+            Only return changes for the given submission
+
+        Returns
+        -------
+        list(dict)
+        """
+        sql = (
+            'SELECT s.created_at, e.submission_id, e.submission_name, '
+            'e.run_id, e.rank, e.results '
+            'FROM entry e JOIN snapshot s ON e.snapshot_id = s.snapshot_id '
+            'WHERE e.benchmark_id = ?'
+        )
+        args = [benchmark_id]
+        if submission_id is not None:
+            sql += ' AND e.submission_id = ?'
+            args.append(submission_id)
+        sql += ' ORDER BY s.snapshot_id, e.rank'
+        result = list()
+        for row in self.con.execute(sql, args):
+            created_at, s_id, s_name, run_id, rank, results = row
+            result.append({
+                'createdAt': created_at,
+                'submission': {'id': s_id, 'name': s_name},
+                'run': run_id,
+                'rank': rank,
+                'results': json.loads(results) if results else None
+            })
+        return result
+
+    def record(self, benchmark_id, leaderboard, created_at=None):
+        """Record a snapshot of the given leaderboard. Only entries that
+        changed since the previous snapshot are stored. Returns the number of
+        stored entries.
+
+        Parameters
+        ----------
+        benchmark_id: string
+            Unique benchmark identifier
+        leaderboard: dict
+            Leaderboard serialization as returned by the API
+        created_at: string, optional
+            Timestamp of the snapshot (in ISO format). The current time is
+            used by default.
+
+        Returns
+        -------
+        int
+        """
+        if created_at is None:
+            created_at = datetime.datetime.now().isoformat()
+        latest = dict()
+        sql = (
+            'SELECT submission_id, run_id, rank, results FROM latest '
+            'WHERE benchmark_id = ?'
+        )
+        for s_id, run_id, rank, results in self.con.execute(
+            sql,
+            [benchmark_id]
+        ):
+            latest[(s_id, run_id)] = (rank, results)
+        changes = list()
+        for rank, entry in enumerate(leaderboard['ranking'], start=1):
+            s_id = entry['submission']['id']
+            s_name = entry['submission'].get('name')
+            run_id = entry.get('run', dict()).get('id', '')
+            # Missing result values are stored as null.
+            results = dict()
+            for val in entry.get('results', list()):
+                results[val['id']] = val.get('value')
+            results = json.dumps(results, sort_keys=True)
+            if latest.pop((s_id, run_id), None) != (rank, results):
+                changes.append((s_id, s_name, run_id, rank, results))
+        # Entries that are no longer in the ranking are marked as removed.
+        for s_id, run_id in latest:
+            changes.append((s_id, None, run_id, None, None))
+        with self.con:
+            cur = self.con.execute(
+                'INSERT INTO snapshot(benchmark_id, created_at, '
+                'result_schema) VALUES(?, ?, ?)',
+                [benchmark_id, created_at, json.dumps(leaderboard['schema'])]
+            )
+            snapshot_id = cur.lastrowid
+            self.con.executemany(
+                'INSERT INTO entry(snapshot_id, benchmark_id, submission_id, '
+                'submission_name, run_id, rank, results) '
+                'VALUES(?, ?, ?, ?, ?, ?, ?)',
+                [(snapshot_id, benchmark_id) + c for c in changes]
+            )
+            for s_id, _, run_id, rank, results in changes:
+                key = [benchmark_id, s_id, run_id]
+                if rank is None:
+                    self.con.execute(
+                        'DELETE FROM latest WHERE benchmark_id = ? '
+                        'AND submission_id = ? AND run_id = ?',
+                        key
+                    )
+                else:
+                    self.con.execute(
+                        'INSERT OR REPLACE INTO latest(benchmark_id, '
+                        'submission_id, run_id, rank, results) '
+                        'VALUES(?, ?, ?, ?, ?)',
+                        key + [rank, results]
+                    )
+        return len(changes)
+
+    def schema(self, benchmark_id):
+        """Get the result schema of the most recent snapshot for a benchmark.
+        The result is None if no snapshot was recorded.
+
+        Parameters
+        ----------
+        benchmark_id: string
+            Unique benchmark identifier
+
+        Returns
+        -------
+        list(dict)
+        """
+        row = self.con.execute(
+            'SELECT result_schema FROM snapshot WHERE benchmark_id = ? '
+            'ORDER BY snapshot_id DESC LIMIT 1',
+            [benchmark_id]
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
@@ -0,0 +1,366 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Helper functions for leaderboards that are returned by the API. A
+leaderboard contains the result schema and the ranking of runs. Ranking
+entries are identified by the submission identifier and the run identifier.
+"""
+
+import heapq
+import itertools
+import operator
+
+from robclient.protocol import NUMERIC_TYPES, PARA_FLOAT, PARA_INT
+
+
+"""Status of ranking entries in a leaderboard comparison."""
+DIFF_CHANGED = 'changed'
+DIFF_DROPPED = 'dropped'
+DIFF_NEW = 'new'
+DIFF_UNCHANGED = 'unchanged'
+
+"""Comparison operators for ranking filters. Operators are ordered such that
+operators that are a prefix of another operator come last.
+"""
+OPERATORS = [
+    ('>=', operator.ge),
+    ('<=', operator.le),
+    ('!=', operator.ne),
+    ('==', operator.eq),
+    ('>', operator.gt),
+    ('<', operator.lt),
+    ('=', operator.eq)
+]
+
+
+def diff_leaderboards(old, new):
+    """Compare two leaderboards. The result contains one entry for each
+    ranking entry in either of the two leaderboards. Entries are ordered by
+    their rank in the new leaderboard followed by the dropped entries in the
+    order of their rank in the old leaderboard.
+
+    Each entry is a dictionary with the status (new, dropped, changed or
+    unchanged), the submission handle, the run identifier, the rank in the
+    new and in the old leaderboard (None if the entry does not exist), the
+    result values and the difference to the old value for each numeric
+    result column. Both leaderboards are indexed by their entry keys so that
+    the comparison is linear in the size of the leaderboards.
+
+    Parameters
+    ----------
+    old: dict
+        Leaderboard serialization for the earlier snapshot
+    new: dict
+        Leaderboard serialization for the later snapshot
+
+    Returns
+    -------
+    list(dict)
+    """
+    numeric = [c['id'] for c in new['schema'] if c['type'] in NUMERIC_TYPES]
+    previous = index_ranking(old)
+    result = list()
+    for key, (rank, entry, results) in index_ranking(new).items():
+        match = previous.pop(key, None)
+        doc = {
+            'status': DIFF_NEW,
+            'submission': entry['submission'],
+            'run': key[1],
+            'rank': rank,
+            'previousRank': None,
+            'results': results,
+            'deltas': dict()
+        }
+        if match is not None:
+            old_rank, _, old_results = match
+            doc['previousRank'] = old_rank
+            for col_id in numeric:
+                val = results.get(col_id)
+                old_val = old_results.get(col_id)
+                if is_number(val) and is_number(old_val) and val != old_val:
+                    doc['deltas'][col_id] = val - old_val
+            unchanged = rank == old_rank and results == old_results
+            doc['status'] = DIFF_UNCHANGED if unchanged else DIFF_CHANGED
+        result.append(doc)
+    for key, (rank, entry, results) in previous.items():
+        result.append({
+            'status': DIFF_DROPPED,
+            'submission': entry['submission'],
+            'run': key[1],
+            'rank': None,
+            'previousRank': rank,
+            'results': results,
+            'deltas': dict()
+        })
+    return result
+
+
+def filter_ranking(
+    leaderboard, filters=None, sort=None, descending=False, top=None
+):
+    """Select entries from the ranking of a leaderboard. Entries are
+    filtered using the given list of conditions. Each condition is a tuple of
+    column identifier, comparison operator and value (as returned by
+    parse_filter). Entries that do not have a value for a filtered column are
+    excluded.
+
+    The result is an iterator over tuples with the rank, the ranking entry
+    and a dictionary of result values. Entries are in the order of the
+    ranking unless a sort column is given. Entries without a value for the
+    sort column come last. Numeric values come before other values, which
+    are sorted by their string representation. If top is given only the
+    first top entries are returned. The top entries for a sort column are
+    selected using a heap that holds at most top entries.
+
+    Without a sort column the ranking is consumed lazily, i.e., entries are
+    returned while the ranking is read from a stream.
+
+    Parameters
+    ----------
+    leaderboard: dict
+        Leaderboard serialization. The ranking may be any iterable of
+        ranking entries.
+    filters: list(tuple), optional
+        List of filter conditions
+    sort: string, optional
+        Identifier of the sort column
+    descending: bool, default=False
+        Sort in descending order
+    top: int, optional
+        Maximum number of returned entries
+
+    Returns
+    -------
+    iterator(tuple)
+    """
+    entries = iter_ranking(leaderboard)
+    if filters:
+        entries = (e for e in entries if matches(e[2], filters))
+    if sort is None:
+        if top is not None:
+            entries = itertools.islice(entries, top)
+        return entries
+    missing = list()
+
+    def present(entries, limit=None):
+        # Entries without a sort value are kept separately. At most limit
+        # of them are needed to fill up the result.
+        for e in entries:
+            if e[2].get(sort) is not None:
+                yield e
+            elif limit is None or len(missing) < limit:
+                missing.append(e)
+
+    def key(e):
+        # Sort key for entries with a sort value.
+        return sort_key(e[2][sort], descending=descending)
+
+    if top is not None:
+        select = heapq.nlargest if descending else heapq.nsmallest
+        result = select(top, present(entries, top), key=key)
+        return iter((result + missing)[:top])
+    result = list(present(entries))
+    result.sort(key=key, reverse=descending)
+    return iter(result + missing)
+
+
+def find_column(schema, name):
+    """Get the column from the leaderboard schema that has the given
+    identifier or name.
+
+    Parameters
+    ----------
+    schema: list(dict)
+        Leaderboard result schema
+    name: string
+        Column identifier or name
+
+    Returns
+    -------
+    dict
+
+    Raises
+    ------
+    ValueError
+    """
+    for col in schema:
+        if col['id'] == name:
+            return col
+    for col in schema:
+        if col['name'] == name:
+            return col
+    raise ValueError("unknown column '{}'".format(name))
+
+
+def index_ranking(leaderboard):
+    """Get an index for the ranking entries of a leaderboard. The index maps
+    the key of each entry (submission identifier and run identifier) to a
+    tuple of the rank, the entry and a dictionary of the result values. The
+    index preserves the order of the ranking.
+
+    Parameters
+    ----------
+    leaderboard: dict
+        Leaderboard serialization
+
+    Returns
+    -------
+    dict
+    """
+    index = dict()
+    for rank, entry, results in iter_ranking(leaderboard):
+        key = (entry['submission']['id'], entry.get('run', dict()).get('id'))
+        index[key] = (rank, entry, results)
+    return index
+
+
+def iter_ranking(leaderboard):
+    """Iterate over the ranking of a leaderboard. Yields tuples with the
+    rank, the ranking entry and a dictionary of result values.
+
+    Parameters
+    ----------
+    leaderboard: dict
+        Leaderboard serialization. The ranking may be any iterable of
+        ranking entries.
+
+    Returns
+    -------
+    iterator(tuple)
+    """
+    for rank, entry in enumerate(leaderboard['ranking'], start=1):
+        results = dict()
+        for val in entry.get('results', list()):
+            results[val['id']] = val.get('value')
+        yield rank, entry, results
+
+
+def parse_filter(expr, schema):
+    """Parse a filter expression of the form 'column operator value'. The
+    column is referenced by its identifier or name. The value is converted to
+    the type of the column.
+
+    Parameters
+    ----------
+    expr: string
+        Filter expression, e.g., 'accuracy>0.9'
+    schema: list(dict)
+        Leaderboard result schema
+
+    Returns
+    -------
+    tuple(string, callable, any)
+
+    Raises
+    ------
+    ValueError
+    """
+    for symbol, op in OPERATORS:
+        pos = expr.find(symbol)
+        if pos > 0:
+            col = find_column(schema, expr[:pos].strip())
+            value = expr[pos + len(symbol):].strip()
+            try:
+                return col['id'], op, convert(value, col['type'])
+            except ValueError:
+                msg = "invalid {} value '{}'".format(col['type'], value)
+                raise ValueError(msg)
+    raise ValueError("invalid filter '{}'".format(expr))
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def convert(value, type_id):
+    """Convert a string value to the given result column type.
+
+    Parameters
+    ----------
+    value: string
+        String representation of a value
+    type_id: string
+        Column type identifier
+
+    Returns
+    -------
+    any
+
+    Raises
+    ------
+    ValueError
+    """
+    if type_id == PARA_INT:
+        return int(value)
+    elif type_id == PARA_FLOAT:
+        return float(value)
+    return value
+
+
+def is_number(value):
+    """Test if the given value is an integer or float value.
+
+    Parameters
+    ----------
+    value: any
+        Result value
+
+    Returns
+    -------
+    bool
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def matches(results, filters):
+    """Test if the result values of a ranking entry satisfy all filter
+    conditions. Entries without a value for a filtered column do not match.
+
+    Parameters
+    ----------
+    results: dict
+        Result values of a ranking entry
+    filters: list(tuple)
+        List of filter conditions
+
+    Returns
+    -------
+    bool
+    """
+    for col_id, op, value in filters:
+        val = results.get(col_id)
+        if val is None:
+            return False
+        if isinstance(value, str):
+            val = str(val)
+        try:
+            if not op(val, value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def sort_key(value, descending=False):
+    """Get the sort key for a result value. Numbers are compared by their
+    value, all other values are compared by their string representation.
+    Values of different types are never compared directly. Numbers come
+    before other values in both sort orders.
+
+    Parameters
+    ----------
+    value: any
+        Result value
+    descending: bool, default=False
+        Key is used for sorting in descending order
+
+    Returns
+    -------
+    tuple
+    """
+    if is_number(value):
+        return (1 if descending else 0, value, '')
+    return (0 if descending else 1, 0, str(value))
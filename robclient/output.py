@@ -0,0 +1,303 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Writers for list-style command output. All writers implement the same
+interface as the streaming table writer: rows are added one at a time and
+the writer is closed after the last row. Row values keep their type so that
+machine-readable formats preserve numbers.
+
+The supported formats are the fixed-width text table, newline-delimited
+JSON, CSV, TSV and Parquet. Writing Parquet files requires the optional
+pyarrow package.
+"""
+
+import click
+import csv
+import json
+import sys
+
+from robclient.protocol import PARA_BOOL, PARA_FLOAT, PARA_INT
+from robclient.table import DEFAULT_SAMPLE_SIZE, TableWriter
+
+
+"""Output format identifier."""
+FORMAT_CSV = 'csv'
+FORMAT_NDJSON = 'ndjson'
+FORMAT_PARQUET = 'parquet'
+FORMAT_TABLE = 'table'
+FORMAT_TSV = 'tsv'
+
+FORMATS = [FORMAT_TABLE, FORMAT_NDJSON, FORMAT_CSV, FORMAT_TSV, FORMAT_PARQUET]
+
+"""Number of rows in each record batch of a Parquet file."""
+PARQUET_BATCH_SIZE = 10000
+
+
+class CSVWriter(object):
+    """Write rows as delimiter-separated values. The first line contains the
+    column keys.
+    """
+    def __init__(self, keys, sink=None, delimiter=','):
+        """Initialize the CSV writer and write the header row.
+
+        Parameters
+        ----------
+        keys: list(string)
+            Column keys
+        sink: file-like object, optional
+            Output stream. Rows are written to standard output by default.
+        delimiter: string, default=','
+            Field delimiter
+        """
+        if sink is None:
+            sink = sys.stdout
+        self.writer = csv.writer(
+            sink,
+            delimiter=delimiter,
+            lineterminator='\n'
+        )
+        self.writer.writerow(keys)
+
+    def __enter__(self):
+        """Enter the runtime context for the writer.
+
+        Returns
+        -------
+        robclient.output.CSVWriter
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the writer when leaving the runtime context."""
+        self.close()
+        return False
+
+    def add(self, row):
+        """Write a row.
+
+        Parameters
+        ----------
+        row: list
+            List of column values
+        """
+        self.writer.writerow(['' if val is None else val for val in row])
+
+    def close(self):
+        """Nothing to do for CSV output."""
+        pass
+
+
+class NDJSONWriter(object):
+    """Write each row as a JSON object on a separate line."""
+    def __init__(self, keys, sink=None):
+        """Initialize the column keys and the output stream.
+
+        Parameters
+        ----------
+        keys: list(string)
+            Column keys
+        sink: file-like object, optional
+            Output stream. Rows are written to standard output by default.
+        """
+        self.keys = keys
+        if sink is None:
+            sink = sys.stdout
+        self.sink = sink
+
+    def __enter__(self):
+        """Enter the runtime context for the writer.
+
+        Returns
+        -------
+        robclient.output.NDJSONWriter
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the writer when leaving the runtime context."""
+        self.close()
+        return False
+
+    def add(self, row):
+        """Write a row.
+
+        Parameters
+        ----------
+        row: list
+            List of column values
+        """
+        doc = dict(zip(self.keys, row))
+        self.sink.write(json.dumps(doc, separators=(',', ':')) + '\n')
+
+    def close(self):
+        """Nothing to do for NDJSON output."""
+        pass
+
+
+class ParquetWriter(object):
+    """Write rows to a Parquet file. Rows are buffered and written in record
+    batches. The Parquet schema is derived from the column types.
+    """
+    def __init__(self, keys, types, sink=None, batch_size=None):
+        """Initialize the Parquet schema and the output stream.
+
+        Parameters
+        ----------
+        keys: list(string)
+            Column keys
+        types: list(string)
+            List of column type identifier
+        sink: file-like object, optional
+            Binary output stream. The file is written to standard output by
+            default.
+        batch_size: int, optional
+            Number of rows in each record batch
+
+        Raises
+        ------
+        ValueError
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("format 'parquet' requires package 'pyarrow'")
+        self.pa = pa
+        self.schema = pa.schema([
+            (key, arrow_type(pa, type_id))
+            for key, type_id in zip(keys, types)
+        ])
+        if sink is None:
+            sink = click.get_binary_stream('stdout')
+        self.writer = pq.ParquetWriter(sink, self.schema)
+        self.batch_size = batch_size if batch_size else PARQUET_BATCH_SIZE
+        self.columns = [list() for _ in keys]
+        self.count = 0
+
+    def __enter__(self):
+        """Enter the runtime context for the writer.
+
+        Returns
+        -------
+        robclient.output.ParquetWriter
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the writer when leaving the runtime context."""
+        self.close()
+        return False
+
+    def add(self, row):
+        """Add a row to the current record batch. The batch is written when
+        it is full.
+
+        Parameters
+        ----------
+        row: list
+            List of column values
+        """
+        for col, val in zip(self.columns, row):
+            col.append(val)
+        self.count += 1
+        if self.count >= self.batch_size:
+            self.flush()
+
+    def close(self):
+        """Write the last record batch and the file footer."""
+        self.flush()
+        self.writer.close()
+
+    def flush(self):
+        """Write the buffered rows as a record batch."""
+        if not self.count:
+            return
+        batch = self.pa.RecordBatch.from_arrays(
+            [
+                self.pa.array(values, type=field.type)
+                for values, field in zip(self.columns, self.schema)
+            ],
+            schema=self.schema
+        )
+        self.writer.write_table(self.pa.Table.from_batches([batch]))
+        self.columns = [list() for _ in self.columns]
+        self.count = 0
+
+
+def create_writer(fmt, headline, types, keys=None, sink=None, stream=False):
+    """Get a writer for the given output format. Text tables are written
+    when the writer is closed unless the stream flag is True. Streamed tables
+    determine the column widths from the first rows.
+
+    Parameters
+    ----------
+    fmt: string
+        Output format identifier
+    headline: list(string)
+        List of column names for the text table
+    types: list(string)
+        List of column type identifier
+    keys: list(string), optional
+        Column keys for machine-readable formats. By default, the column
+        names are used.
+    sink: file-like object, optional
+        Output stream
+    stream: bool, default=False
+        Write rows of text tables while they are added
+
+    Returns
+    -------
+    robclient.table.TableWriter or robclient.output.CSVWriter or
+    robclient.output.NDJSONWriter or robclient.output.ParquetWriter
+
+    Raises
+    ------
+    ValueError
+    """
+    keys = keys if keys is not None else headline
+    if fmt == FORMAT_TABLE:
+        return TableWriter(
+            headline=headline,
+            types=types,
+            sink=sink,
+            sample_size=DEFAULT_SAMPLE_SIZE if stream else None
+        )
+    elif fmt == FORMAT_NDJSON:
+        return NDJSONWriter(keys=keys, sink=sink)
+    elif fmt == FORMAT_CSV:
+        return CSVWriter(keys=keys, sink=sink)
+    elif fmt == FORMAT_TSV:
+        return CSVWriter(keys=keys, sink=sink, delimiter='\t')
+    elif fmt == FORMAT_PARQUET:
+        return ParquetWriter(keys=keys, types=types, sink=sink)
+    raise ValueError("unknown format '{}'".format(fmt))
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def arrow_type(pa, type_id):
+    """Get the Arrow data type for a column type identifier.
+
+    Parameters
+    ----------
+    pa: module
+        The pyarrow module
+    type_id: string
+        Column type identifier
+
+    Returns
+    -------
+    pyarrow.DataType
+    """
+    if type_id == PARA_INT:
+        return pa.int64()
+    elif type_id == PARA_FLOAT:
+        return pa.float64()
+    elif type_id == PARA_BOOL:
+        return pa.bool_()
+    return pa.string()
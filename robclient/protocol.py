@@ -0,0 +1,339 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Definitions of the flowserv API protocol that are used by the client. The
+module contains the request header for the access token, the identifier of
+parameter types and run states, helper functions for the serialization of run
+arguments, and a lightweight model of the template parameter declarations
+that are part of submission handles.
+
+The definitions follow those in the flowserv-core package. They are kept here
+so that the client does not depend on flowserv-core at runtime.
+"""
+
+
+"""Name of the request header that carries the user access token."""
+HEADER_TOKEN = 'api_key'
+
+"""Identifier of template parameter types."""
+PARA_BOOL = 'bool'
+PARA_ENUM = 'enum'
+PARA_FILE = 'file'
+PARA_FLOAT = 'float'
+PARA_INT = 'int'
+PARA_STRING = 'string'
+
+NUMERIC_TYPES = [PARA_FLOAT, PARA_INT]
+
+"""Identifier of workflow run states."""
+STATE_CANCELED = 'CANCELED'
+STATE_ERROR = 'ERROR'
+STATE_PENDING = 'PENDING'
+STATE_RUNNING = 'RUNNING'
+STATE_SUCCESS = 'SUCCESS'
+
+ACTIVE_STATES = [STATE_PENDING, STATE_RUNNING]
+
+
+class InvalidArgumentError(ValueError):
+    """Error that is raised if a value is not a valid argument for a template
+    parameter.
+    """
+    pass
+
+
+class Parameter(object):
+    """Declaration of a template parameter. Argument values are validated
+    and converted depending on the parameter type. Numeric parameters may have
+    a range constraint, enumeration parameters have a list of valid values and
+    file parameters may have a target path.
+    """
+    def __init__(
+        self, para_id, type_id, name, index, description=None,
+        default_value=None, is_required=False, module_id=None,
+        constraint=None, values=None, target=None
+    ):
+        """Initialize the parameter properties.
+
+        Parameters
+        ----------
+        para_id: string
+            Unique parameter identifier
+        type_id: string
+            Parameter type identifier
+        name: string
+            Human-readable parameter name
+        index: int
+            Index position of the parameter (for display purposes)
+        description: string, optional
+            Descriptive text for the parameter
+        default_value: any, optional
+            Default value
+        is_required: bool, default=False
+            Is required flag
+        module_id: string, optional
+            Identifier of the parameter group
+        constraint: string, optional
+            Range constraint for numeric parameters in interval notation,
+            e.g., '[0,1)'
+        values: list(dict), optional
+            Valid values for enumeration parameters
+        target: string, optional
+            Target path for file parameters
+        """
+        self.para_id = para_id
+        self.type_id = type_id
+        self.name = name
+        self.index = index
+        self.description = description
+        self.default_value = default_value
+        self.is_required = is_required
+        self.module_id = module_id
+        self.constraint = constraint
+        self.values = values
+        self.target = target
+
+    @classmethod
+    def from_dict(cls, doc, index=0):
+        """Create parameter from its dictionary serialization. Parameters
+        without a default value are required unless the serialization says
+        otherwise.
+
+        Parameters
+        ----------
+        doc: dict
+            Serialized parameter declaration
+        index: int, default=0
+            Default index position
+
+        Returns
+        -------
+        robclient.protocol.Parameter
+
+        Raises
+        ------
+        ValueError
+        """
+        try:
+            return cls(
+                para_id=doc['id'],
+                type_id=doc['type'],
+                name=doc.get('name', doc['id']),
+                index=doc.get('index', index),
+                description=doc.get('description'),
+                default_value=doc.get('defaultValue'),
+                is_required=doc.get('isRequired', 'defaultValue' not in doc),
+                module_id=doc.get('module'),
+                constraint=doc.get('range'),
+                values=doc.get('values'),
+                target=doc.get('target')
+            )
+        except KeyError as ex:
+            raise ValueError("missing element {} in {}".format(ex, doc))
+
+    def prompt(self):
+        """Get the input prompt for the parameter. The prompt contains the
+        parameter name, the data type and the default value (if defined).
+
+        Returns
+        -------
+        string
+        """
+        val = '{} ({})'.format(self.name, self.type_id)
+        if self.default_value is not None:
+            val += " [default '{}']".format(self.default_value)
+        return val + ' $> '
+
+    def to_argument(self, value):
+        """Validate the given value and convert it to the argument value for
+        the parameter type. Values of file parameters are returned unchanged.
+
+        Parameters
+        ----------
+        value: any
+            User-provided value for the parameter
+
+        Returns
+        -------
+        any
+
+        Raises
+        ------
+        robclient.protocol.InvalidArgumentError
+        """
+        if self.type_id == PARA_BOOL:
+            if isinstance(value, bool):
+                return value
+            strvalue = '' if value is None else str(value).lower()
+            if strvalue in ['1', 't', 'true']:
+                return True
+            elif strvalue in ['', '0', 'f', 'false']:
+                return False
+            raise InvalidArgumentError("not a Boolean '{}'".format(value))
+        elif self.type_id == PARA_ENUM:
+            for val in self.values if self.values else list():
+                if val['value'] == value:
+                    return value
+            raise InvalidArgumentError("unknown value '{}'".format(value))
+        elif self.type_id in NUMERIC_TYPES:
+            convert = int if self.type_id == PARA_INT else float
+            try:
+                value = convert(value)
+            except (TypeError, ValueError):
+                msg = "no {} '{}'".format(self.type_id, value)
+                raise InvalidArgumentError(msg)
+            if self.constraint and not in_range(value, self.constraint):
+                msg = '{} not in {}'.format(value, self.constraint)
+                raise InvalidArgumentError(msg)
+            return value
+        elif self.type_id == PARA_FILE:
+            return value
+        if value is None and self.is_required:
+            raise InvalidArgumentError('missing argument')
+        return str(value)
+
+
+class ParameterIndex(dict):
+    """Index of parameter declarations. Parameters are indexed by their
+    unique identifier.
+    """
+    @staticmethod
+    def from_dict(doc):
+        """Create parameter index from a list of serialized parameter
+        declarations.
+
+        Parameters
+        ----------
+        doc: list(dict)
+            List of serialized parameter declarations
+
+        Returns
+        -------
+        robclient.protocol.ParameterIndex
+
+        Raises
+        ------
+        ValueError
+        """
+        parameters = ParameterIndex()
+        for index, obj in enumerate(doc):
+            para = Parameter.from_dict(obj, index=index)
+            if para.para_id in parameters:
+                msg = "duplicate parameter '{}'".format(para.para_id)
+                raise ValueError(msg)
+            parameters[para.para_id] = para
+        return parameters
+
+    def sorted(self):
+        """Get list of parameter declarations sorted by their index position.
+
+        Returns
+        -------
+        list(robclient.protocol.Parameter)
+        """
+        return sorted(self.values(), key=lambda p: p.index)
+
+
+# -- Run arguments ------------------------------------------------------------
+
+def ARG(para_id, value):
+    """Get serialization for a run argument.
+
+    Parameters
+    ----------
+    para_id: string
+        Unique parameter identifier
+    value: any
+        Argument value
+
+    Returns
+    -------
+    dict
+    """
+    return {'id': para_id, 'value': value}
+
+
+def FILE(file_id, target=None):
+    """Get serialization for the value of a file argument.
+
+    Parameters
+    ----------
+    file_id: string
+        Unique identifier of an uploaded file
+    target: string, optional
+        Target path for the file in the run environment
+
+    Returns
+    -------
+    dict
+    """
+    value = {'fileId': file_id}
+    if target is not None:
+        value['targetPath'] = target
+    return {'type': '$file', 'value': value}
+
+
+def GET_FILE(doc):
+    """Get the file identifier and optional target path from the serialized
+    value of a file argument.
+
+    Parameters
+    ----------
+    doc: dict
+        Serialized value of a file argument
+
+    Returns
+    -------
+    string, string
+
+    Raises
+    ------
+    ValueError
+    """
+    try:
+        value = doc['value']
+        return value['fileId'], value.get('targetPath')
+    except KeyError as ex:
+        raise ValueError('missing element {}'.format(ex))
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def in_range(value, constraint):
+    """Test if a value is within a range constraint. Ranges are given in
+    interval notation where square brackets denote closed and round brackets
+    denote open intervals. Missing boundaries are infinite, e.g., '[0,)'.
+
+    Parameters
+    ----------
+    value: int or float
+        Numeric value
+    constraint: string
+        Range constraint
+
+    Returns
+    -------
+    bool
+
+    Raises
+    ------
+    ValueError
+    """
+    tokens = constraint.split(',')
+    if len(tokens) != 2:
+        raise ValueError("invalid interval '{}'".format(constraint))
+    left, right = tokens[0].strip(), tokens[1].strip()
+    if left[:1] not in ['[', '('] or right[-1:] not in [']', ')']:
+        raise ValueError("invalid interval '{}'".format(constraint))
+    lval = float(left[1:]) if left[1:] else float('-inf')
+    rval = float(right[:-1]) if right[:-1] else float('inf')
+    if value < lval or (left[0] == '(' and value == lval):
+        return False
+    if value > rval or (right[-1] == ')' and value == rval):
+        return False
+    return True
@@ -0,0 +1,301 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Retry policy for requests that are sent to the API. Requests that fail
+with a connection error or a transient server error (e.g., 502 Bad Gateway)
+are repeated with exponential backoff. A delay that is requested by the
+server in the Retry-After header takes precedence over the backoff delay.
+
+Only idempotent requests are repeated, i.e., GET, PUT and DELETE requests
+and POST requests that carry an idempotency key. The server uses the key to
+detect a repeated request so that the request does not create a second
+resource (e.g., a second run).
+
+A circuit breaker keeps track of consecutive failures for all requests that
+are sent via the same session. After a number of consecutive failures the
+circuit is opened and all requests fail immediately until the reset timeout
+has passed. Then, a single request is sent to test whether the server is
+available again. If the test request fails with an error that does not
+indicate whether the server is available (e.g., an invalid Url), the next
+request is allowed to test the server instead.
+"""
+
+import email.utils
+import threading
+import time
+import uuid
+
+import requests
+
+from robclient.backoff import Backoff
+
+
+"""Default values for the retry policy."""
+DEFAULT_RETRIES = 3
+DEFAULT_THRESHOLD = 5
+DEFAULT_TIMEOUT = 30.0
+
+"""Name of the request header that carries the idempotency key."""
+HEADER_IDEMPOTENCY_KEY = 'Idempotency-Key'
+
+"""Request methods that are repeated without an idempotency key."""
+IDEMPOTENT_METHODS = ['DELETE', 'GET', 'HEAD', 'OPTIONS', 'PUT']
+
+"""Response status codes for transient errors. Errors other than 429 (Too
+Many Requests) indicate that the server is unavailable.
+"""
+UNAVAILABLE_STATUS = [502, 503, 504]
+RETRY_STATUS = [429] + UNAVAILABLE_STATUS
+
+
+class CircuitBreaker(object):
+    """Circuit breaker for requests to the API server. The breaker is shared
+    by all threads that use the same session.
+    """
+    def __init__(self, threshold=DEFAULT_THRESHOLD, timeout=DEFAULT_TIMEOUT):
+        """Initialize the failure threshold and the reset timeout.
+
+        Parameters
+        ----------
+        threshold: int, default=5
+            Number of consecutive failures that open the circuit
+        timeout: float, default=30.0
+            Time (in seconds) before a request is sent again to the server
+            after the circuit was opened
+        """
+        self.threshold = threshold
+        self.timeout = timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Ensure that a request can be sent. If the circuit is open, only a
+        single request is allowed after the reset timeout has passed.
+
+        Raises
+        ------
+        robclient.retry.CircuitOpenError
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.timeout - time.monotonic()
+            if remaining > 0 or self.probing:
+                raise CircuitOpenError(max(remaining, 0))
+            self.probing = True
+
+    def failure(self):
+        """Record a failed request. Opens the circuit if the number of
+        consecutive failures reaches the threshold.
+        """
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Record a request with unknown outcome. Allows another request to
+        test the server if the circuit is open.
+        """
+        with self.lock:
+            self.probing = False
+
+    def success(self):
+        """Record a successful request. Closes the circuit."""
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Error that is raised if a request is not sent because the circuit
+    breaker is open.
+    """
+    def __init__(self, remaining):
+        """Initialize the error message.
+
+        Parameters
+        ----------
+        remaining: float
+            Time (in seconds) until the next request is allowed
+        """
+        msg = 'API server unavailable (retry in {:.0f}s)'.format(remaining)
+        super(CircuitOpenError, self).__init__(msg)
+
+
+class RetryPolicy(object):
+    """Send requests and repeat idempotent requests that fail with a
+    transient error.
+    """
+    def __init__(
+        self, retries=DEFAULT_RETRIES, initial=0.5, maximum=30.0,
+        breaker=None, sleep=time.sleep
+    ):
+        """Initialize the number of retries, the backoff delays and the
+        circuit breaker.
+
+        Parameters
+        ----------
+        retries: int, default=3
+            Maximum number of times that a request is repeated
+        initial: float, default=0.5
+            Initial backoff delay in seconds
+        maximum: float, default=30.0
+            Maximum delay in seconds. Requests are not repeated if the server
+            asks for a longer delay.
+        breaker: robclient.retry.CircuitBreaker, optional
+            Circuit breaker that is shared by all requests
+        sleep: callable, default=time.sleep
+            Function that waits for a given number of seconds
+        """
+        self.retries = retries
+        self.initial = initial
+        self.maximum = maximum
+        self.breaker = breaker
+        self.sleep = sleep
+
+    def send(self, send, method, url, **kwargs):
+        """Send a request using the given function. Idempotent requests are
+        repeated if they fail with a connection error or a transient server
+        error. The response for the last attempt is returned.
+
+        Parameters
+        ----------
+        send: callable
+            Function that sends a request, e.g., requests.Session.request
+        method: string
+            HTTP request method
+        url: string
+            Request Url
+        kwargs: dict
+            Additional arguments for the request
+
+        Returns
+        -------
+        requests.Response
+
+        Raises
+        ------
+        requests.ConnectionError
+        requests.Timeout
+        """
+        retry = is_idempotent(method, kwargs.get('headers'))
+        backoff = Backoff(initial=self.initial, maximum=self.maximum)
+        attempt = 0
+        while True:
+            if self.breaker is not None:
+                self.breaker.allow()
+            try:
+                r = send(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.record(False)
+                if not retry or attempt >= self.retries:
+                    raise
+                delay = backoff.next()
+            except BaseException:
+                # Ensure that the breaker does not wait for the outcome of a
+                # request that failed with any other error.
+                self.record(None)
+                raise
+            else:
+                self.record(r.status_code not in UNAVAILABLE_STATUS)
+                if r.status_code not in RETRY_STATUS:
+                    return r
+                if not retry or attempt >= self.retries:
+                    return r
+                delay = retry_after(r)
+                if delay is None:
+                    delay = backoff.next()
+                elif delay > self.maximum:
+                    return r
+                # Release the connection before the request is repeated.
+                r.close()
+            attempt += 1
+            self.sleep(delay)
+
+    def record(self, success):
+        """Record the outcome of a request in the circuit breaker.
+
+        Parameters
+        ----------
+        success: bool
+            Flag indicating whether the server responded. None if the outcome
+            of the request is unknown.
+        """
+        if self.breaker is None:
+            return
+        if success is None:
+            self.breaker.release()
+        elif success:
+            self.breaker.success()
+        else:
+            self.breaker.failure()
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def idempotency_key():
+    """Get a new unique key for a POST request.
+
+    Returns
+    -------
+    string
+    """
+    return uuid.uuid4().hex
+
+
+def is_idempotent(method, headers=None):
+    """Test if a request with the given method and headers can be repeated.
+
+    Parameters
+    ----------
+    method: string
+        HTTP request method
+    headers: dict, optional
+        Request headers
+
+    Returns
+    -------
+    bool
+    """
+    if method.upper() in IDEMPOTENT_METHODS:
+        return True
+    return headers is not None and HEADER_IDEMPOTENCY_KEY in headers
+
+
+def retry_after(response):
+    """Get the delay (in seconds) from the Retry-After header of a response.
+    The header value is either a number of seconds or a date. Returns None
+    if the response does not contain a valid header.
+
+    Parameters
+    ----------
+    response: requests.Response
+        Response for a failed request
+
+    Returns
+    -------
+    float
+    """
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date is None:
+        return None
+    return max(date.timestamp() - time.time(), 0.0)
@@ -8,6 +8,8 @@
 
 """Factory for Urls to access and manipulate API resources."""
 
+import robclient.config as config
+
 
 class UrlFactory(object):
     """The Url factory provides methods to generate API urls to access and
@@ -0,0 +1,342 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Local scheduler for submission runs. Run requests (i.e., a submission
+identifier and the list of run arguments) are kept in a persistent queue file.
+The scheduler starts queued runs while keeping at most a given number of runs
+active for each submission (or benchmark). Active runs are polled to detect
+when they are finished and their slot becomes available.
+
+If the API rejects a new run because the backend is busy, the scheduler backs
+off and tries again later. Server errors (e.g., 502 Bad Gateway) are retried
+in the same way, but an entry fails if its run cannot be started after a
+maximum number of attempts. The state of all queue entries is written to the
+queue file after each change so that an interrupted scheduler can be
+restarted without losing or duplicating runs. The identifier of a queue entry
+is used as the idempotency key when the run is started, i.e., a run that was
+started before the scheduler was interrupted is not started a second time.
+
+Processes that modify the queue hold an exclusive lock on a lock file next to
+the queue file while they load, modify and save the queue.
+"""
+
+import json
+import os
+import requests
+import time
+import uuid
+
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from robclient.backoff import Backoff
+from robclient.watch import TERMINAL_STATES
+
+
+"""States of queue entries."""
+ENTRY_ACTIVE = 'ACTIVE'
+ENTRY_FAILED = 'FAILED'
+ENTRY_FINISHED = 'FINISHED'
+ENTRY_QUEUED = 'QUEUED'
+
+"""HTTP status codes that indicate that the backend cannot accept new runs
+at the moment.
+"""
+BUSY_STATUS = [429, 503]
+
+"""HTTP status codes for server errors that may go away when a run is started
+again later.
+"""
+TRANSIENT_STATUS = [500, 502, 504]
+
+"""Maximum number of attempts to start a run after a server error."""
+MAX_ATTEMPTS = 5
+
+"""Default maximum number of active runs per submission or benchmark."""
+DEFAULT_LIMIT = 4
+
+
+class RunQueue(object):
+    """Persistent queue of run requests. Each entry is a dictionary with the
+    unique entry identifier, the submission identifier, the run arguments and
+    the entry state. Entries for started runs also contain the run identifier
+    and the last known run state. The number of failed attempts to start a
+    run after a server error is kept as well.
+
+    The queue file may be modified by other processes (e.g., when new run
+    requests are added while the scheduler is running). Changes to the queue
+    have to be made while the queue is locked (see locked()).
+    """
+    def __init__(self, filename):
+        """Read the queue entries from the given file. The queue is empty if
+        the file does not exist.
+
+        Parameters
+        ----------
+        filename: string
+            Path to the queue file
+        """
+        self.filename = filename
+        self.entries = list()
+        self.load()
+
+    def active(self):
+        """Get list of entries for runs that have been started and that are
+        not finished yet.
+
+        Returns
+        -------
+        list(dict)
+        """
+        return [e for e in self.entries if e['state'] == ENTRY_ACTIVE]
+
+    def add(self, submission_id, arguments):
+        """Append a new run request to the queue.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+        arguments: list(dict)
+            Serialized run arguments
+
+        Returns
+        -------
+        dict
+        """
+        entry = {
+            'id': uuid.uuid4().hex,
+            'submission': submission_id,
+            'arguments': arguments,
+            'state': ENTRY_QUEUED
+        }
+        self.entries.append(entry)
+        return entry
+
+    def clear(self, states=None):
+        """Remove entries that are in one of the given states. By default,
+        entries for finished and failed runs are removed.
+
+        Parameters
+        ----------
+        states: list(string), optional
+            States of removed entries
+
+        Returns
+        -------
+        int
+        """
+        if states is None:
+            states = [ENTRY_FAILED, ENTRY_FINISHED]
+        count = len(self.entries)
+        self.entries = [e for e in self.entries if e['state'] not in states]
+        return count - len(self.entries)
+
+    def load(self):
+        """(Re-)load the queue entries from the queue file."""
+        self.entries = read_entries(self.filename)
+
+    @contextmanager
+    def locked(self):
+        """Hold an exclusive lock on the queue. The queue entries are
+        reloaded when the lock is acquired. Blocks while the queue is locked
+        by another process. There is no locking on platforms without fcntl.
+
+        Returns
+        -------
+        robclient.scheduler.RunQueue
+        """
+        lockfile = '{}.lock'.format(self.filename)
+        with open(lockfile, 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                self.load()
+                yield self
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def queued(self):
+        """Get list of entries for runs that have not been started yet (in
+        the order in which they were added to the queue).
+
+        Returns
+        -------
+        list(dict)
+        """
+        return [e for e in self.entries if e['state'] == ENTRY_QUEUED]
+
+    def save(self):
+        """Write the queue entries to the queue file. The file is replaced
+        atomically. The queue should be locked while it is modified and
+        saved.
+        """
+        tmpfile = '{}.tmp'.format(self.filename)
+        with open(tmpfile, 'w') as f:
+            json.dump({'entries': self.entries}, f, indent=4)
+        os.replace(tmpfile, self.filename)
+
+
+def process_queue(
+    client, queue, limit=DEFAULT_LIMIT, per_benchmark=False, interval=1.0,
+    max_interval=30.0, timeout=None, callback=None
+):
+    """Start the queued runs and poll active runs until all entries in the
+    queue are finished or until the timeout is reached.
+
+    The number of active runs is limited for each submission or, if the
+    per_benchmark flag is True, for each benchmark. The polling interval
+    increases exponentially while the queue remains unchanged and it is reset
+    whenever a run is started or finished. The optional callback is called
+    with the queue entry whenever the state of an entry or of its run changes.
+
+    Parameters
+    ----------
+    client: robclient.api.Client
+        API client
+    queue: robclient.scheduler.RunQueue
+        Persistent queue of run requests
+    limit: int, default=4
+        Maximum number of active runs per submission or benchmark
+    per_benchmark: bool, default=False
+        Limit the number of active runs per benchmark instead of per
+        submission
+    interval: float, default=1.0
+        Initial polling interval in seconds
+    max_interval: float, default=30.0
+        Maximum polling interval in seconds
+    timeout: float, optional
+        Maximum time (in seconds) to process the queue
+    callback: callable, optional
+        Function that is called when an entry changes
+    """
+    backoff = Backoff(initial=interval, maximum=max_interval)
+    benchmarks = dict()
+
+    def get_slot(entry):
+        """Get the key for the group of runs that share the limit."""
+        if not per_benchmark:
+            return entry['submission']
+        s_id = entry['submission']
+        if s_id not in benchmarks:
+            body = client.get_submission(submission_id=s_id)
+            benchmarks[s_id] = body.get('workflow', s_id)
+        return benchmarks[s_id]
+
+    start = time.monotonic()
+    while True:
+        # The queue is locked while runs are polled and started so that other
+        # processes cannot modify the queue or start the same entry.
+        with queue.locked():
+            changed = False
+            try:
+                # Poll active runs to free the slots of finished runs.
+                for entry in queue.active():
+                    try:
+                        run = client.get_run(run_id=entry['runId'])
+                    except requests.HTTPError as ex:
+                        status = None
+                        if ex.response is not None:
+                            status = ex.response.status_code
+                        if status != 404:
+                            # Poll the run again after the next delay.
+                            continue
+                        entry['state'] = ENTRY_FAILED
+                        entry['error'] = str(ex)
+                    else:
+                        if run['state'] == entry['runState']:
+                            continue
+                        entry['runState'] = run['state']
+                        if run['state'] in TERMINAL_STATES:
+                            entry['state'] = ENTRY_FINISHED
+                    changed = True
+                    if callback is not None:
+                        callback(entry)
+                # Start queued runs while there are free slots.
+                active = Counter(get_slot(e) for e in queue.active())
+                for entry in queue.queued():
+                    slot = get_slot(entry)
+                    if active[slot] >= limit:
+                        continue
+                    try:
+                        # The entry identifier is the idempotency key so that
+                        # the run is not started twice if the scheduler is
+                        # interrupted before the queue is saved.
+                        run = client.start_run(
+                            submission_id=entry['submission'],
+                            arguments=entry['arguments'],
+                            key=entry['id']
+                        )
+                    except requests.HTTPError as ex:
+                        if ex.response is not None:
+                            status = ex.response.status_code
+                            if status in BUSY_STATUS:
+                                # Back off until the backend accepts new runs.
+                                break
+                            if status in TRANSIENT_STATUS:
+                                attempts = entry.get('attempts', 0) + 1
+                                entry['attempts'] = attempts
+                                if attempts < MAX_ATTEMPTS:
+                                    # Keep the attempt count after a restart
+                                    # and try again after the next delay.
+                                    queue.save()
+                                    break
+                        entry['state'] = ENTRY_FAILED
+                        entry['error'] = str(ex)
+                    else:
+                        entry['state'] = ENTRY_ACTIVE
+                        entry['runId'] = run['id']
+                        entry['runState'] = run['state']
+                        active[slot] += 1
+                        # Record the run identifier immediately to avoid that
+                        # the run is started again after a restart.
+                        queue.save()
+                    changed = True
+                    if callback is not None:
+                        callback(entry)
+            except requests.ConnectionError:
+                # Keep the queue and try again after the next delay.
+                pass
+            if changed:
+                queue.save()
+        if changed:
+            backoff.reset()
+        if not queue.active() and not queue.queued():
+            break
+        delay = backoff.next()
+        if timeout is not None:
+            if time.monotonic() + delay - start > timeout:
+                break
+        time.sleep(delay)
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def read_entries(filename):
+    """Read the list of queue entries from the given file. Returns an empty
+    list if the file does not exist.
+
+    Parameters
+    ----------
+    filename: string
+        Path to the queue file
+
+    Returns
+    -------
+    list(dict)
+    """
+    if not os.path.isfile(filename):
+        return list()
+    with open(filename, 'r') as f:
+        return json.load(f).get('entries', list())
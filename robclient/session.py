@@ -0,0 +1,195 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Shared HTTP session for all requests that are sent to the API. The session
+maintains a pool of persistent connections so that consecutive requests to the
+API server do not have to establish a new connection each time. Requests that
+fail with a transient error are repeated according to the retry policy of the
+session.
+"""
+
+import requests
+
+from requests.adapters import HTTPAdapter
+
+from robclient.retry import DEFAULT_RETRIES, CircuitBreaker, RetryPolicy
+
+
+"""Default number of connections that are kept in the connection pool."""
+DEFAULT_POOL_SIZE = 10
+
+"""Default timeouts (in seconds) for establishing a connection and for
+waiting for data from the server.
+"""
+DEFAULT_TIMEOUT = (10.0, 120.0)
+
+
+class ClientSession(object):
+    """Wrapper around a requests session object. The session carries the
+    request headers (e.g., the user access token) that are included in all
+    requests and it maintains the pool of connections to the API server.
+    """
+    def __init__(
+        self, headers=None, pool_size=None, keep_alive=True, retries=None,
+        timeout=DEFAULT_TIMEOUT
+    ):
+        """Initialize the underlying requests session, the connection pool,
+        the retry policy and the request timeout.
+
+        Parameters
+        ----------
+        headers: dict, optional
+            Default headers that are included in every request.
+        pool_size: int, optional
+            Maximum number of connections that are kept in the pool.
+        keep_alive: bool, default=True
+            Keep connections open after a request is completed. If False, the
+            server is asked to close the connection after each request.
+        retries: int, optional
+            Maximum number of times that a failed idempotent request is
+            repeated. A value of 0 disables retries. All requests share a
+            circuit breaker that fails fast if the server is unavailable.
+        timeout: float or tuple(float, float), default=(10.0, 120.0)
+            Timeout for requests (see requests.Session.request). Requests
+            that do not specify a timeout themselves fail if the server does
+            not respond in time. None disables the timeout.
+        """
+        self.session = requests.Session()
+        self.pool_size = 0
+        self.ensure_pool_size(pool_size if pool_size else DEFAULT_POOL_SIZE)
+        if headers is not None:
+            self.session.headers.update(headers)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+        if retries is None:
+            retries = DEFAULT_RETRIES
+        self.timeout = timeout
+        self.retry = None
+        if retries > 0:
+            self.retry = RetryPolicy(retries=retries, breaker=CircuitBreaker())
+
+    def close(self):
+        """Close all connections in the connection pool."""
+        self.session.close()
+
+    def delete(self, url, **kwargs):
+        """Send DELETE request to the given Url.
+
+        Parameters
+        ----------
+        url: string
+            Request Url
+        kwargs: dict
+            Additional arguments for the request
+
+        Returns
+        -------
+        requests.Response
+        """
+        return self.request('DELETE', url, **kwargs)
+
+    def ensure_pool_size(self, pool_size):
+        """Ensure that the connection pool can hold at least the given number
+        of connections. Used by components that send requests from multiple
+        threads in parallel.
+
+        Parameters
+        ----------
+        pool_size: int
+            Minimum number of connections in the pool
+        """
+        if pool_size <= self.pool_size:
+            return
+        self.pool_size = pool_size
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, **kwargs):
+        """Send GET request to the given Url.
+
+        Parameters
+        ----------
+        url: string
+            Request Url
+        kwargs: dict
+            Additional arguments for the request
+
+        Returns
+        -------
+        requests.Response
+        """
+        return self.request('GET', url, **kwargs)
+
+    @property
+    def headers(self):
+        """Default headers that are included in every request.
+
+        Returns
+        -------
+        dict
+        """
+        return self.session.headers
+
+    def post(self, url, **kwargs):
+        """Send POST request to the given Url.
+
+        Parameters
+        ----------
+        url: string
+            Request Url
+        kwargs: dict
+            Additional arguments for the request
+
+        Returns
+        -------
+        requests.Response
+        """
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        """Send PUT request to the given Url.
+
+        Parameters
+        ----------
+        url: string
+            Request Url
+        kwargs: dict
+            Additional arguments for the request
+
+        Returns
+        -------
+        requests.Response
+        """
+        return self.request('PUT', url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """Send a request using the shared session. Idempotent requests that
+        fail with a transient error are repeated. The default timeout is used
+        unless a timeout is given.
+
+        Parameters
+        ----------
+        method: string
+            HTTP request method
+        url: string
+            Request Url
+        kwargs: dict
+            Additional arguments for the request
+
+        Returns
+        -------
+        requests.Response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        if self.retry is None:
+            return self.session.request(method, url, **kwargs)
+        return self.retry.send(self.session.request, method, url, **kwargs)
@@ -0,0 +1,88 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Entry point for the 'robc' command. The command has the same arguments as
+'rob'. Commands are forwarded to the local agent if an agent is running.
+Otherwise, the command is executed in the current process. The module only
+imports the agent client functions so that forwarded commands start fast.
+
+Commands that read from standard input or ask for confirmation (e.g.,
+'login', 'files delete' or 'batch') and long-running commands (e.g., 'runs
+watch') are always executed in the current process. A command is also
+executed in the current process if the agent is busy with another command.
+"""
+
+import os
+import sys
+
+import robclient.agent as agent
+
+
+"""Commands that are not forwarded to the agent."""
+LOCAL_COMMANDS = [
+    # Agent
+    ['agent'],
+    # Commands that read from standard input or prompt for input
+    ['batch'],
+    ['files', 'delete'],
+    ['login'],
+    ['pwd'],
+    ['register'],
+    ['runs', 'start'],
+    ['submissions', 'delete'],
+    # Long-running commands
+    ['queue', 'run'],
+    ['runs', 'sweep'],
+    ['runs', 'watch']
+]
+
+
+def main(argv=None):
+    """Forward the command to the local agent or run it in the current
+    process.
+
+    Parameters
+    ----------
+    argv: list(string), optional
+        Command line arguments. By default, the arguments are read from
+        sys.argv.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not is_local(argv):
+        try:
+            code = agent.forward(argv)
+        except BrokenPipeError:
+            # The output was piped to a command that exited early (e.g., head).
+            # Redirect the remaining output to avoid a second error on exit.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            code = 1
+        if code is not None:
+            sys.exit(code)
+    from robclient.cli.base import cli
+    cli(args=argv, prog_name='rob')
+
+
+def is_local(argv):
+    """Test if the command for the given arguments has to be executed in the
+    current process.
+
+    Parameters
+    ----------
+    argv: list(string)
+        Command line arguments
+
+    Returns
+    -------
+    bool
+    """
+    names = [arg for arg in argv if not arg.startswith('-')]
+    for cmd in LOCAL_COMMANDS:
+        for i in range(len(names)):
+            if names[i:i + len(cmd)] == cmd:
+                return True
+    return False
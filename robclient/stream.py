@@ -0,0 +1,234 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Incremental parser for API responses that contain a large list of items
+(e.g., the ranking of a leaderboard or the list of users). Items of the list
+are parsed one at a time while the response body is read from the network.
+Memory usage is therefore bounded by the size of a single item instead of the
+size of the whole response.
+
+Incremental parsing requires the optional ijson package. If the package is not
+installed the whole response body is parsed at once.
+
+Other top-level elements of the response (e.g., the leaderboard schema) are
+available via the get() method. If such an element follows the list in the
+response body, the list items that are parsed before the element are kept in
+a buffer.
+"""
+
+import json
+
+from collections import deque
+
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:  # pragma: no cover
+    ijson = None
+
+
+class ListStream(object):
+    """Iterator over the items of a list element in a JSON document. The
+    list is identified by its key in the top-level object of the document.
+    """
+    def __init__(self, fileobj, key, response=None):
+        """Initialize the parser for the given file object.
+
+        Parameters
+        ----------
+        fileobj: file-like object
+            Binary stream containing the JSON document
+        key: string
+            Key of the list element in the top-level object
+        response: requests.Response, optional
+            Response that is closed when the stream is closed
+        """
+        self.key = key
+        self.response = response
+        # Parsed top-level elements other than the list
+        self.fields = dict()
+        # Buffer for parsed list items that were not consumed yet
+        self.buffer = deque()
+        if ijson is not None:
+            self.events = parse_events(fileobj)
+            self.done = False
+        else:
+            doc = json.load(fileobj)
+            self.buffer.extend(doc.pop(key, list()))
+            self.fields = doc
+            self.events = None
+            self.done = True
+
+    def __enter__(self):
+        """Enter the runtime context for the stream.
+
+        Returns
+        -------
+        robclient.stream.ListStream
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the stream when leaving the runtime context."""
+        self.close()
+        return False
+
+    def __iter__(self):
+        """Iterate over the list items in the order of the document.
+
+        Returns
+        -------
+        iterator(any)
+        """
+        while True:
+            while self.buffer:
+                yield self.buffer.popleft()
+            if self.done or not self.parse():
+                break
+        self.close()
+
+    def add(self, name, value):
+        """Add a parsed list item (if the name is None) or a parsed top-level
+        element.
+
+        Parameters
+        ----------
+        name: string
+            Key of the top-level element or None for list items
+        value: any
+            Parsed value
+        """
+        if name is None:
+            self.buffer.append(value)
+        else:
+            self.fields[name] = value
+
+    def close(self):
+        """Close the underlying response."""
+        self.done = True
+        if self.response is not None:
+            self.response.close()
+            self.response = None
+
+    def get(self, name, default_value=None):
+        """Get the value of a top-level element other than the list. If the
+        element has not been parsed yet the document is parsed until the
+        element is found. List items that are parsed before the element are
+        buffered.
+
+        Parameters
+        ----------
+        name: string
+            Key of the top-level element
+        default_value: any, optional
+            Value that is returned if the document does not contain the
+            element
+
+        Returns
+        -------
+        any
+        """
+        while name not in self.fields and not self.done:
+            if not self.parse():
+                break
+        return self.fields.get(name, default_value)
+
+    def parse(self):
+        """Parse the document until the next list item or top-level element
+        is complete. Returns False if the end of the document was reached.
+
+        Returns
+        -------
+        bool
+        """
+        item_prefix = '{}.item'.format(self.key)
+        builder = None
+        target = None
+        for prefix, event, value in self.events:
+            if builder is None:
+                if prefix == item_prefix:
+                    target = None
+                elif '.' not in prefix and prefix not in ['', self.key]:
+                    target = prefix
+                else:
+                    continue
+                if event in ['start_map', 'start_array']:
+                    builder = ObjectBuilder()
+                    builder.event(event, value)
+                    continue
+                if event == 'map_key':
+                    continue
+                self.add(target, value)
+                return True
+            builder.event(event, value)
+            if prefix in [item_prefix, target]:
+                if event in ['end_map', 'end_array'] and depth(builder) == 0:
+                    self.add(target, builder.value)
+                    return True
+        self.done = True
+        return False
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def depth(builder):
+    """Get the number of open containers in an object builder.
+
+    Parameters
+    ----------
+    builder: ijson.common.ObjectBuilder
+        Builder for a parsed value
+
+    Returns
+    -------
+    int
+    """
+    return len(builder.containers)
+
+
+def open_stream(response, key):
+    """Get a list stream for the body of a streamed response.
+
+    Parameters
+    ----------
+    response: requests.Response
+        Response for a request that was sent with stream=True
+    key: string
+        Key of the list element in the top-level object of the response
+
+    Returns
+    -------
+    robclient.stream.ListStream
+    """
+    # Decode compressed responses while reading from the raw stream.
+    response.raw.decode_content = True
+    return ListStream(response.raw, key=key, response=response)
+
+
+def parse_events(fileobj):
+    """Iterate over the parser events for a JSON document. Numbers are parsed
+    as int or float values. Syntax errors are raised as ValueError.
+
+    Parameters
+    ----------
+    fileobj: file-like object
+        Binary stream containing the JSON document
+
+    Returns
+    -------
+    iterator(tuple)
+
+    Raises
+    ------
+    ValueError
+    """
+    try:
+        for event in ijson.parse(fileobj, use_float=True):
+            yield event
+    except ijson.JSONError as ex:
+        raise ValueError('invalid JSON document: {}'.format(ex))
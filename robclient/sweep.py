@@ -0,0 +1,313 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Launch a batch of runs for a submission from a parameter sweep file. The
+sweep file contains a list of argument sets and/or a grid of parameter values
+that is expanded into the cartesian product of all values.
+
+JSON and YAML sweep files either contain a list of argument sets or an object
+with the optional elements 'grid' and 'runs':
+
+.. code-block:: yaml
+
+    grid:
+        learning_rate: [0.1, 0.01]
+        epochs: [10, 20]
+    runs:
+        - learning_rate: 0.5
+          epochs: 5
+
+CSV files contain one argument set per row. The header row contains the
+parameter identifier.
+
+All argument sets are validated against the submission parameters before
+the first run is started.
+"""
+
+import csv
+import itertools
+import json
+import os
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from robclient.protocol import ARG, FILE, PARA_FILE, InvalidArgumentError
+
+
+"""Default number of runs that are started in parallel."""
+DEFAULT_JOBS = 4
+
+
+class RateLimiter(object):
+    """Limit the number of calls per second for code that is executed by
+    multiple threads in parallel.
+    """
+    def __init__(self, rate=None):
+        """Initialize the minimal interval between two consecutive calls.
+
+        Parameters
+        ----------
+        rate: float, optional
+            Maximum number of calls per second. There is no limit if the rate
+            is None.
+        """
+        self.interval = 1.0 / rate if rate else 0
+        self.next_call = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Block until the next call is allowed."""
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def expand_grid(grid):
+    """Get the list of argument sets for the cartesian product of all
+    parameter values in the given grid. Values that are not lists are treated
+    as lists with a single element.
+
+    Parameters
+    ----------
+    grid: dict
+        Mapping of parameter identifier to a list of values
+
+    Returns
+    -------
+    list(dict)
+    """
+    keys = sorted(grid)
+    values = list()
+    for key in keys:
+        val = grid[key]
+        values.append(val if isinstance(val, list) else [val])
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def launch_runs(
+    client, submission_id, arguments, jobs=None, rate=None, callback=None
+):
+    """Start a run for each of the given lists of run arguments. Runs are
+    started in parallel by a pool of workers. The optional rate limits the
+    number of runs that are started per second.
+
+    The result is a list with one entry per argument list (in the order of
+    the input). Each entry is a dictionary that contains either the
+    identifier and state of the started run or the error message if the
+    run could not be started. The optional callback is called with each
+    entry, the number of processed argument lists and the total number of
+    argument lists.
+
+    Parameters
+    ----------
+    client: robclient.api.Client
+        API client
+    submission_id: string
+        Unique submission identifier
+    arguments: list(list(dict))
+        List of serialized run arguments for each run
+    jobs: int, optional
+        Maximum number of runs that are started in parallel
+    rate: float, optional
+        Maximum number of runs that are started per second
+    callback: callable, optional
+        Progress callback
+
+    Returns
+    -------
+    list(dict)
+    """
+    jobs = jobs if jobs else DEFAULT_JOBS
+    limiter = RateLimiter(rate)
+    client.session.ensure_pool_size(jobs)
+    lock = threading.Lock()
+    counter = [0]
+
+    def start(args):
+        limiter.wait()
+        entry = {'arguments': args}
+        try:
+            body = client.start_run(
+                submission_id=submission_id,
+                arguments=args
+            )
+            entry['runId'] = body['id']
+            entry['state'] = body['state']
+        except (IOError, OSError) as ex:
+            # Includes connection and HTTP errors of the requests package.
+            entry['error'] = str(ex)
+        except (KeyError, ValueError) as ex:
+            # Invalid response body.
+            entry['error'] = 'invalid response: {}'.format(ex)
+        if callback is not None:
+            with lock:
+                counter[0] += 1
+                callback(entry, counter[0], len(arguments))
+        return entry
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(start, arguments))
+
+
+def read_sweep(filename):
+    """Read the list of argument sets from a sweep file. The file format is
+    determined by the file suffix. Files with suffix '.csv' are read as CSV
+    files, '.json' files are read as JSON files and all other files are read
+    as YAML files.
+
+    Parameters
+    ----------
+    filename: string
+        Path to the sweep file
+
+    Returns
+    -------
+    list(dict)
+
+    Raises
+    ------
+    ValueError
+    """
+    lower = filename.lower()
+    with open(filename, 'r') as f:
+        if lower.endswith('.csv'):
+            return [dict(row) for row in csv.DictReader(f)]
+        elif lower.endswith('.json'):
+            doc = json.load(f)
+        else:
+            import yaml
+            doc = yaml.safe_load(f)
+    if isinstance(doc, list):
+        argsets = doc
+    elif isinstance(doc, dict):
+        argsets = list()
+        if 'grid' in doc:
+            argsets.extend(expand_grid(doc['grid']))
+        argsets.extend(doc.get('runs', list()))
+    else:
+        raise ValueError('invalid sweep file format')
+    for args in argsets:
+        if not isinstance(args, dict):
+            raise ValueError("invalid argument set '{}'".format(args))
+    return argsets
+
+
+def write_manifest(filename, submission_id, runs):
+    """Write the manifest file for a parameter sweep. The file is replaced
+    atomically so that a complete manifest remains if the process is
+    interrupted while the file is written.
+
+    Parameters
+    ----------
+    filename: string
+        Path to the manifest file
+    submission_id: string
+        Unique submission identifier
+    runs: list(dict)
+        Entries for the started runs
+    """
+    tmpfile = '{}.tmp'.format(filename)
+    with open(tmpfile, 'w') as f:
+        json.dump({'submission': submission_id, 'runs': runs}, f, indent=4)
+    os.replace(tmpfile, filename)
+
+
+def validate_arguments(parameters, argsets, files=None):
+    """Validate the argument sets against the parameter declarations of a
+    submission. Returns a list of serialized run arguments for each argument
+    set.
+
+    Values for file parameters are either a file identifier or an object
+    with elements 'fileId' and (optional) 'targetPath'. Missing values for
+    optional parameters are omitted from the run arguments. Empty values (i.e.,
+    empty cells in CSV files) are treated as missing values.
+
+    Parameters
+    ----------
+    parameters: robclient.protocol.ParameterIndex
+        Index of submission parameters
+    argsets: list(dict)
+        List of argument sets
+    files: list(string), optional
+        Identifier of files that were uploaded for the submission
+
+    Returns
+    -------
+    list(list(dict))
+
+    Raises
+    ------
+    ValueError
+    """
+    result = list()
+    for i, args in enumerate(argsets):
+        msg = 'argument set {}: {{}}'.format(i + 1)
+        for key in args:
+            if key not in parameters:
+                err = "unknown parameter '{}'".format(key)
+                raise ValueError(msg.format(err))
+        arguments = list()
+        for para in parameters.sorted():
+            value = args.get(para.para_id)
+            if value is None or value == '':
+                if para.is_required and para.default_value is None:
+                    err = "missing value for '{}'".format(para.para_id)
+                    raise ValueError(msg.format(err))
+                continue
+            try:
+                if para.type_id == PARA_FILE:
+                    value = file_argument(para, value, files=files)
+                else:
+                    value = para.to_argument(value)
+            except InvalidArgumentError as ex:
+                raise ValueError(msg.format(ex))
+            arguments.append(ARG(para.para_id, value))
+        result.append(arguments)
+    return result
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def file_argument(para, value, files=None):
+    """Get serialized run argument for a file parameter.
+
+    Parameters
+    ----------
+    para: robclient.protocol.Parameter
+        File parameter declaration
+    value: string or dict
+        File identifier or object with file identifier and target path
+    files: list(string), optional
+        Identifier of files that were uploaded for the submission
+
+    Returns
+    -------
+    dict
+
+    Raises
+    ------
+    robclient.protocol.InvalidArgumentError
+    """
+    if isinstance(value, dict):
+        file_id = value.get('fileId')
+        target = value.get('targetPath')
+    else:
+        file_id = str(value)
+        target = None
+    if target is None:
+        target = para.target if para.target is not None else para.default_value
+    if files is not None and file_id not in files:
+        raise InvalidArgumentError("unknown file '{}'".format(file_id))
+    return FILE(file_id=file_id, target=target)
@@ -0,0 +1,274 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Synchronize a local directory with the uploaded files of a submission.
+Local files are compared with the uploaded files by their name, size and
+content hash. Only new or modified files are uploaded.
+
+Content hashes of local files are cached in an index file in the synchronized
+directory. The index is keyed by the relative file path. A cached hash is
+reused as long as the modification time and size of the file are unchanged.
+The index also records the identifier and hash of files that were uploaded to
+each submission.
+"""
+
+import hashlib
+import json
+import os
+
+
+"""Name of the index file in the synchronized directory."""
+INDEX_FILE = '.robsync.json'
+
+"""Names of elements in the file handles of the API that may contain the
+SHA-256 hash of an uploaded file.
+"""
+HASH_ELEMENTS = ['sha256', 'hash']
+
+
+class FileIndex(object):
+    """Index of content hashes for files in a local directory and of files
+    that were uploaded from the directory to a submission.
+    """
+    def __init__(self, directory, filename=None):
+        """Read the index from the index file in the given directory. If the
+        index file does not exist an empty index is created.
+
+        Parameters
+        ----------
+        directory: string
+            Path to the synchronized directory
+        filename: string, optional
+            Path to the index file
+        """
+        self.directory = directory
+        if filename is None:
+            filename = os.path.join(directory, INDEX_FILE)
+        self.filename = filename
+        self.files = dict()
+        self.uploads = dict()
+        if os.path.isfile(filename):
+            try:
+                with open(filename, 'r') as f:
+                    doc = json.load(f)
+                self.files = doc.get('files', dict())
+                self.uploads = doc.get('uploads', dict())
+            except (IOError, ValueError):
+                # Ignore invalid index files. The index will be rebuilt.
+                pass
+
+    def hash(self, filename, relpath):
+        """Get the SHA-256 hash for the given file. Returns the cached value
+        if the modification time and size of the file have not changed since
+        the hash was computed.
+
+        Parameters
+        ----------
+        filename: string
+            Path to the local file
+        relpath: string
+            Path of the file relative to the synchronized directory
+
+        Returns
+        -------
+        string
+        """
+        stat = os.stat(filename)
+        entry = self.files.get(relpath)
+        if entry is not None:
+            unchanged = entry['mtime'] == stat.st_mtime_ns
+            if unchanged and entry['size'] == stat.st_size:
+                return entry['sha256']
+        checksum = file_hash(filename)
+        self.files[relpath] = {
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': checksum
+        }
+        return checksum
+
+    def retain(self, relpaths):
+        """Remove cached hashes for files that are not in the given list.
+
+        Parameters
+        ----------
+        relpaths: list(string)
+            Relative paths of existing local files
+        """
+        relpaths = set(relpaths)
+        for key in list(self.files):
+            if key not in relpaths:
+                del self.files[key]
+
+    def save(self):
+        """Write the index to the index file."""
+        with open(self.filename, 'w') as f:
+            json.dump({'files': self.files, 'uploads': self.uploads}, f)
+
+    def set_upload(self, submission_id, relpath, file_id, checksum):
+        """Record the identifier and hash of a file that was uploaded to the
+        given submission.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+        relpath: string
+            Path of the file relative to the synchronized directory
+        file_id: string
+            Unique identifier of the uploaded file
+        checksum: string
+            SHA-256 hash of the uploaded file
+        """
+        uploads = self.uploads.setdefault(submission_id, dict())
+        uploads[relpath] = {'fileId': file_id, 'sha256': checksum}
+
+    def upload(self, submission_id, relpath):
+        """Get information about the file that was uploaded for the given path
+        to a submission. The result is None if no upload was recorded.
+
+        Parameters
+        ----------
+        submission_id: string
+            Unique submission identifier
+        relpath: string
+            Path of the file relative to the synchronized directory
+
+        Returns
+        -------
+        dict
+        """
+        return self.uploads.get(submission_id, dict()).get(relpath)
+
+
+class SyncPlan(object):
+    """List of files that need to be uploaded, of uploaded files that are
+    deleted and of local files that are unchanged.
+    """
+    def __init__(self):
+        """Initialize the empty lists of uploads, deletions and skipped
+        files.
+        """
+        # List of (filename, relpath, checksum) tuples
+        self.uploads = list()
+        # List of file handles for uploaded files
+        self.deletes = list()
+        # List of relative paths for unchanged files
+        self.skipped = list()
+
+
+def sync_plan(submission_id, files, remote_files, index, delete=False):
+    """Compare local files with the files that were uploaded to a submission.
+    A local file is unchanged if there exists an uploaded file with the same
+    name and size. If the API provides the hash of uploaded files, or if the
+    upload of the file was recorded in the index, the hashes have to match as
+    well.
+
+    Uploaded files are only deleted if the delete flag is True. This includes
+    previous uploads of a modified local file, uploaded files that do not have
+    a local counterpart, and duplicate uploads of an unchanged file. Without
+    the flag, modified files are uploaded in addition to their previous
+    versions.
+
+    Parameters
+    ----------
+    submission_id: string
+        Unique submission identifier
+    files: list(tuple(string, string))
+        List of local file path and relative path pairs
+    remote_files: list(dict)
+        List of handles for uploaded files
+    index: robclient.sync.FileIndex
+        Index of local file hashes and file uploads
+    delete: bool, default=False
+        Delete uploaded files that are replaced or that do not exist locally
+
+    Returns
+    -------
+    robclient.sync.SyncPlan
+    """
+    plan = SyncPlan()
+    remote = dict()
+    for fh in remote_files:
+        remote.setdefault(fh['name'], list()).append(fh)
+    for filename, relpath in files:
+        checksum = index.hash(filename, relpath)
+        size = os.path.getsize(filename)
+        candidates = remote.pop(relpath, list())
+        upload = index.upload(submission_id, relpath)
+        match = None
+        for fh in candidates:
+            if fh.get('size') != size:
+                continue
+            remote_hash = get_hash(fh)
+            if remote_hash is not None and remote_hash != checksum:
+                continue
+            if upload is not None and upload['fileId'] == fh['id']:
+                if upload['sha256'] != checksum:
+                    continue
+            match = fh
+            break
+        if match is not None:
+            plan.skipped.append(relpath)
+            if delete:
+                # Remove duplicate uploads of the same file.
+                for fh in candidates:
+                    if fh['id'] != match['id']:
+                        plan.deletes.append(fh)
+        else:
+            plan.uploads.append((filename, relpath, checksum))
+            if delete:
+                # Replace previous uploads of the modified file.
+                plan.deletes.extend(candidates)
+    if delete:
+        for name in sorted(remote):
+            plan.deletes.extend(remote[name])
+    index.retain([relpath for _, relpath in files])
+    return plan
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def file_hash(filename, chunk_size=1024 * 1024):
+    """Compute the SHA-256 hash for the contents of the given file.
+
+    Parameters
+    ----------
+    filename: string
+        Path to the local file
+    chunk_size: int, optional
+        Size of chunks that are read from the file
+
+    Returns
+    -------
+    string
+    """
+    sha = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def get_hash(fh):
+    """Get the SHA-256 hash for an uploaded file from the file handle. Returns
+    None if the handle does not contain a hash value.
+
+    Parameters
+    ----------
+    fh: dict
+        Handle for an uploaded file
+
+    Returns
+    -------
+    string
+    """
+    for key in HASH_ELEMENTS:
+        if fh.get(key):
+            return fh[key]
+    return None
@@ -8,7 +8,18 @@
 
 """Helper methods and classes for the command line interface."""
 
-from flowserv.model.parameter.numeric import NUMERIC_TYPES
+import click
+import sys
+
+from robclient.protocol import NUMERIC_TYPES
+
+import robclient.download as download
+
+
+"""Default number of rows that are used to determine the column widths of a
+streamed table.
+"""
+DEFAULT_SAMPLE_SIZE = 100
 
 
 class ResultTable(object):
@@ -70,6 +81,132 @@ class ResultTable(object):
         return result
 
 
+class TableWriter(object):
+    """Renderer for result tables. Column widths are either given when the
+    writer is created or they are determined from the headline and the rows
+    that are added to the table. By default, all rows are buffered and the
+    table is written when the writer is closed, i.e., the column widths fit
+    all values. If a sample size is given the column widths are determined
+    from the first rows only and each following row is written to the output
+    stream immediately (streamed table). Values that are longer than the
+    width of their column are not truncated.
+
+    Each cell value is converted to a string exactly once.
+    """
+    def __init__(
+        self, headline, types, sink=None, widths=None, sample_size=None
+    ):
+        """Initialize the table columns and the output stream.
+
+        Parameters
+        ----------
+        headline: list(string)
+            List of column names
+        types: list(string)
+            List of column type identifier
+        sink: file-like object, optional
+            Output stream. Lines are written to standard output by default.
+        widths: list(int), optional
+            Declared column widths. The width of a column is at least the
+            length of the column name.
+        sample_size: int, optional
+            Number of rows that are used to determine the column widths if
+            no widths are declared. All rows are used by default.
+        """
+        self.headline = [str(name) for name in headline]
+        self.aligns = [align(t) for t in types]
+        if sink is None:
+            sink = sys.stdout
+        self.sink = sink
+        self.sample_size = sample_size
+        self.widths = None
+        # Buffer for rows that are added before the column widths are known
+        self.rows = list()
+        if widths is not None:
+            self.set_widths(widths)
+
+    def __enter__(self):
+        """Enter the runtime context for the writer.
+
+        Returns
+        -------
+        robclient.table.TableWriter
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Write buffered rows when leaving the runtime context."""
+        self.close()
+        return False
+
+    def add(self, row):
+        """Add a row to the table. The row is written to the output stream if
+        the column widths are known. Otherwise, the row is buffered until the
+        number of buffered rows reaches the sample size (if given).
+
+        Parameters
+        ----------
+        row: list
+            List of column values
+        """
+        row = ['' if val is None else str(val) for val in row]
+        if self.widths is not None:
+            self.write(row)
+            return
+        self.rows.append(row)
+        if self.sample_size and len(self.rows) >= self.sample_size:
+            self.flush()
+
+    def close(self):
+        """Write all buffered rows. The column widths are determined from the
+        buffered rows if they are not known yet.
+        """
+        self.flush()
+
+    def flush(self):
+        """Determine the column widths from the buffered rows (if not known
+        yet) and write the buffered rows to the output stream.
+        """
+        if self.widths is None:
+            widths = [0] * len(self.headline)
+            for row in self.rows:
+                for col, val in enumerate(row):
+                    if len(val) > widths[col]:
+                        widths[col] = len(val)
+            self.set_widths(widths)
+        for row in self.rows:
+            self.write(row)
+        self.rows = list()
+
+    def set_widths(self, widths):
+        """Set the column widths and write the table header.
+
+        Parameters
+        ----------
+        widths: list(int)
+            Minimal column widths
+        """
+        self.widths = [max(w, len(h)) for w, h in zip(widths, self.headline)]
+        self.write(self.headline)
+        self.sink.write('-|-'.join(['-' * w for w in self.widths]) + '\n')
+
+    def write(self, row):
+        """Write a single row to the output stream.
+
+        Parameters
+        ----------
+        row: list(string)
+            List of cell values
+        """
+        cells = list()
+        for val, width, alignment in zip(row, self.widths, self.aligns):
+            if alignment == '>':
+                cells.append(val.rjust(width))
+            else:
+                cells.append(val.ljust(width))
+        self.sink.write(' | '.join(cells) + '\n')
+
+
 # ------------------------------------------------------------------------------
 # Helper Methods
 # ------------------------------------------------------------------------------
@@ -91,6 +228,22 @@ def align(type_id):
         return '<'
 
 
+def echo_download(filename, count, total):
+    """Print progress information for a file that was downloaded as part of
+    a parallel download of multiple files.
+
+    Parameters
+    ----------
+    filename: string
+        Path to the downloaded file
+    count: int
+        Number of completed downloads
+    total: int
+        Total number of files that are being downloaded
+    """
+    click.echo('[{}/{}] {}'.format(count, total, filename))
+
+
 def format_row(row, column_size, types):
     """Format the given row. Row values are padded using the given list of
     column widths.
@@ -123,11 +276,42 @@ def format_row(row, column_size, types):
     return line
 
 
-def save_file(response, filename):
-    """Write the file contents in the response to the specified path. This code
-    is based on:
-    https://www.techcoil.com/blog/how-to-download-a-file-via-http-post-and-http-get-with-python-3-requests-library/
+def format_throughput(size, seconds):
+    """Get a human-readable summary for the number of bytes that were
+    transferred in the given amount of time.
+
+    Parameters
+    ----------
+    size: int
+        Number of transferred bytes
+    seconds: float
+        Transfer time in seconds
+
+    Returns
+    -------
+    string
+    """
+    megabytes = size / (1024 * 1024)
+    rate = megabytes / seconds if seconds > 0 else 0
+    return '{:.2f} MB in {:.2f} s ({:.2f} MB/s)'.format(
+        megabytes,
+        seconds,
+        rate
+    )
+
+
+def save_file(response, filename, chunk_size=None):
+    """Write the file contents in the response to the specified path. The
+    response is expected to be streamed. Contents are written in chunks using
+    the shared download engine.
+
+    Parameters
+    ----------
+    response: requests.Response
+        Response for a file download request
+    filename: string
+        Output file
+    chunk_size: int, optional
+        Size of chunks that are read from the response stream
     """
-    with open(filename, 'wb') as local_file:
-        for chunk in response.iter_content(chunk_size=128):
-            local_file.write(chunk)
+    download.save_file(response, filename, chunk_size=chunk_size)
@@ -0,0 +1,169 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Streaming encoder for file uploads. The multipart/form-data request body
+is generated on the fly while the request is sent. The uploaded file is read
+in chunks so that memory usage remains constant independently of the size of
+the uploaded file.
+"""
+
+import fnmatch
+import os
+import uuid
+
+from robclient.download import DEFAULT_CHUNK_SIZE
+
+
+class MultipartFile(object):
+    """Iterable multipart/form-data request body for a single file. The
+    length of the body is known in advance so that the request is sent with a
+    Content-Length header instead of using chunked transfer encoding.
+
+    The optional callback is called after each chunk is sent with the number
+    of bytes of the file that have been sent so far and the file size. The
+    multipart headers that enclose the file are not counted.
+    """
+    def __init__(
+        self, filename, name=None, field='file', chunk_size=None,
+        callback=None
+    ):
+        """Initialize the multipart boundary and the encoded parts of the
+        request body that precede and follow the file contents.
+
+        Parameters
+        ----------
+        filename: string
+            Path to the uploaded file
+        name: string, optional
+            Name of the uploaded file. By default, the base name of the file
+            path is used.
+        field: string, default='file'
+            Name of the form field for the file
+        chunk_size: int, optional
+            Size of chunks that are read from the file
+        callback: callable, optional
+            Progress callback
+        """
+        self.filename = filename
+        self.chunk_size = chunk_size if chunk_size else DEFAULT_CHUNK_SIZE
+        self.callback = callback
+        self.boundary = uuid.uuid4().hex
+        if name is None:
+            name = os.path.basename(filename)
+        name = name.replace('"', '%22')
+        self.preamble = (
+            '--{}\r\n'
+            'Content-Disposition: form-data; name="{}"; filename="{}"\r\n'
+            'Content-Type: application/octet-stream\r\n'
+            '\r\n'
+        ).format(self.boundary, field, name).encode('utf-8')
+        self.epilogue = '\r\n--{}--\r\n'.format(self.boundary).encode('utf-8')
+        self.filesize = os.path.getsize(filename)
+
+    def __iter__(self):
+        """Generate the request body. The file is opened when the body is sent
+        and closed after the last chunk was read.
+
+        Returns
+        -------
+        iterator(bytes)
+        """
+        sent = 0
+        yield self.preamble
+        with open(self.filename, 'rb') as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+                sent += len(chunk)
+                if self.callback is not None:
+                    self.callback(sent, self.filesize)
+        yield self.epilogue
+        if self.callback is not None:
+            self.callback(sent, self.filesize)
+
+    def __len__(self):
+        """Get the total size of the request body in bytes.
+
+        Returns
+        -------
+        int
+        """
+        return len(self.preamble) + self.filesize + len(self.epilogue)
+
+    @property
+    def content_type(self):
+        """Value for the Content-Type header of the request.
+
+        Returns
+        -------
+        string
+        """
+        return 'multipart/form-data; boundary={}'.format(self.boundary)
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def list_files(directory, include=None, exclude=None):
+    """Get list of files in the given directory and all its sub-directories.
+    Files are selected if their path relative to the directory matches any of
+    the include patterns and none of the exclude patterns. Patterns are Unix
+    shell-style wildcards. Each pattern is matched against the relative path
+    and the base name of a file.
+
+    The result is a sorted list of tuples containing the file path and the
+    relative path (using '/' as the separator).
+
+    Parameters
+    ----------
+    directory: string
+        Path to the base directory
+    include: list(string), optional
+        Patterns for files that are included. All files are included by
+        default.
+    exclude: list(string), optional
+        Patterns for files that are excluded
+
+    Returns
+    -------
+    list(tuple(string, string))
+    """
+    result = list()
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            filename = os.path.join(root, name)
+            relpath = os.path.relpath(filename, directory).replace(os.sep, '/')
+            if include and not matches(relpath, include):
+                continue
+            if exclude and matches(relpath, exclude):
+                continue
+            result.append((filename, relpath))
+    return sorted(result, key=lambda f: f[1])
+
+
+def matches(relpath, patterns):
+    """Test if the relative file path or the base name of the file matches any
+    of the given patterns.
+
+    Parameters
+    ----------
+    relpath: string
+        Relative file path
+    patterns: list(string)
+        List of Unix shell-style wildcards
+
+    Returns
+    -------
+    bool
+    """
+    name = relpath.split('/')[-1]
+    for pattern in patterns:
+        if fnmatch.fnmatch(relpath, pattern) or fnmatch.fnmatch(name, pattern):
+            return True
+    return False
@@ -7,4 +7,4 @@
 # terms of the MIT License; see LICENSE file for more details.
 
 """Information about the current version of the ROB platform."""
-__version__ = '0.2.0'
+__version__ = '0.3.0'
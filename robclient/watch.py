@@ -0,0 +1,163 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Monitor the state of one or more runs until each run reaches a terminal
+state. Each run is polled with an exponentially increasing interval that is
+reset whenever the state of the run changes. Runs that are due at the same
+time are polled in parallel using the shared session of the API client.
+
+A run that cannot be polled does not stop the other runs from being watched.
+Runs that no longer exist (or are not accessible) are removed from the set of
+watched runs. After other errors (e.g., a server error) the run is polled
+again later. Errors that are raised by the state change callback (e.g., when
+downloading the results of a finished run fails) remove the run from the set
+of watched runs as well.
+"""
+
+import requests
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from robclient.backoff import Backoff
+from robclient.protocol import STATE_CANCELED, STATE_ERROR, STATE_SUCCESS
+
+
+"""States of runs that are finished."""
+TERMINAL_STATES = [STATE_CANCELED, STATE_ERROR, STATE_SUCCESS]
+
+"""Default number of runs that are polled in parallel."""
+DEFAULT_JOBS = 4
+
+
+def watch_runs(
+    client, run_ids, callback=None, interval=1.0, max_interval=30.0,
+    timeout=None, jobs=None, error_callback=None
+):
+    """Poll the given runs until all of them are in a terminal state or until
+    the timeout is reached. The callback is called with the run identifier,
+    the previous state (None for the first poll), the new state and the run
+    handle whenever the state of a run changes. The error callback is called
+    with the run identifier, the error and a flag indicating whether the run
+    was removed from the set of watched runs whenever polling a run fails or
+    the callback raises an error.
+
+    Returns a dictionary that maps the identifier of finished runs to their
+    final run handle. Runs that did not finish before the timeout and runs
+    that were removed after an error are not included in the result.
+    Errors that are raised by the callback are re-raised if no error
+    callback is given.
+
+    Parameters
+    ----------
+    client: robclient.api.Client
+        API client
+    run_ids: list(string)
+        Identifier of monitored runs
+    callback: callable, optional
+        Function that is called on each state change
+    interval: float, default=1.0
+        Initial polling interval in seconds
+    max_interval: float, default=30.0
+        Maximum polling interval in seconds
+    timeout: float, optional
+        Maximum time (in seconds) to wait for runs to finish
+    jobs: int, optional
+        Maximum number of runs that are polled in parallel
+    error_callback: callable, optional
+        Function that is called when polling a run fails
+
+    Returns
+    -------
+    dict
+    """
+    jobs = jobs if jobs else DEFAULT_JOBS
+    client.session.ensure_pool_size(jobs)
+    states = dict()
+    backoff = dict()
+    # Time when the next poll for each active run is due
+    due = dict()
+    for run_id in run_ids:
+        states[run_id] = None
+        backoff[run_id] = Backoff(initial=interval, maximum=max_interval)
+        due[run_id] = 0
+    result = dict()
+    start = time.monotonic()
+
+    def poll(run_id):
+        """Get the run handle or the error that occurred."""
+        try:
+            return client.get_run(run_id), None
+        except (requests.ConnectionError, requests.HTTPError) as ex:
+            return None, ex
+        except ValueError as ex:
+            return None, ex
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while due:
+            now = time.monotonic()
+            batch = [run_id for run_id, t in due.items() if t <= now]
+            for run_id, (run, error) in zip(batch, executor.map(poll, batch)):
+                if error is not None:
+                    removed = is_permanent(error)
+                    if error_callback is not None:
+                        error_callback(run_id, error, removed)
+                    if removed:
+                        del due[run_id]
+                    else:
+                        delay = backoff[run_id].next()
+                        due[run_id] = time.monotonic() + delay
+                    continue
+                state = run['state']
+                if state != states[run_id]:
+                    if callback is not None:
+                        try:
+                            callback(run_id, states[run_id], state, run)
+                        except (requests.RequestException, OSError,
+                                ValueError) as ex:
+                            if error_callback is None:
+                                raise
+                            error_callback(run_id, ex, True)
+                            del due[run_id]
+                            continue
+                    states[run_id] = state
+                    backoff[run_id].reset()
+                if state in TERMINAL_STATES:
+                    result[run_id] = run
+                    del due[run_id]
+                else:
+                    due[run_id] = time.monotonic() + backoff[run_id].next()
+            if not due:
+                break
+            next_poll = min(due.values())
+            if timeout is not None and next_poll - start > timeout:
+                break
+            time.sleep(max(0, next_poll - time.monotonic()))
+    return result
+
+
+# -- Helper functions ---------------------------------------------------------
+
+def is_permanent(error):
+    """Test if an error for a run request will not go away when the request
+    is repeated, i.e., if the server responded with a client error (e.g., 404
+    for a deleted run). Too many requests (429) is not a permanent error.
+
+    Parameters
+    ----------
+    error: Exception
+        Error that was raised by the request
+
+    Returns
+    -------
+    bool
+    """
+    if not isinstance(error, requests.HTTPError) or error.response is None:
+        return False
+    status = error.response.status_code
+    return 400 <= status < 500 and status != 429
@@ -0,0 +1,169 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Benchmark for the cold-start latency of the command line interface. Each
+command is run repeatedly in a fresh Python interpreter, once with the --help
+option and once as a real invocation. For the real invocation the API is
+expected at a local port where no server is listening and requests are not
+repeated, i.e., the time includes the imports, the setup of the API client and
+a single failed connection attempt. The script reports the minimum and median
+wall-clock time of the runs and the modules with the highest cumulative import
+time for the real invocation (as reported by 'python -X importtime').
+
+Usage: python scripts/coldstart.py [-n RUNS] [-m MODULES] [COMMAND ...]
+
+Commands are given as quoted strings, e.g., 'benchmarks list'. By default a
+fixed set of commands is measured.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+"""Commands that are measured by default."""
+COMMANDS = [
+    '',
+    'whoami',
+    'users',
+    'benchmarks leaders',
+    'files list',
+    'runs list',
+    'queue list',
+    'submissions list'
+]
+
+"""Python statement that invokes the command line interface."""
+INVOKE = 'import sys; from robclient.cli.base import cli; cli(sys.argv[1:])'
+
+"""Environment for real invocations. The API Url points to a local port where
+no server is listening and failed requests are not repeated.
+"""
+OFFLINE_ENV = {
+    'FLOWSERV_API_HOST': '127.0.0.1',
+    'FLOWSERV_API_PORT': '9',
+    'FLOWSERV_API_PROTOCOL': 'http',
+    'ROB_ACCESS_TOKEN': 'coldstart',
+    'ROB_RETRIES': '0'
+}
+
+
+def environment():
+    """Get the environment for the benchmark processes.
+
+    Returns
+    -------
+    dict
+    """
+    env = dict(os.environ)
+    env.update(OFFLINE_ENV)
+    return env
+
+
+def import_times(command):
+    """Get the cumulative import time (in milliseconds) for each top-level
+    import of a real invocation of a command.
+
+    Parameters
+    ----------
+    command: string
+        Command line arguments
+
+    Returns
+    -------
+    list(tuple(string, float))
+    """
+    args = [sys.executable, '-X', 'importtime', '-c', INVOKE]
+    args += ['--no-cache'] + command.split()
+    proc = subprocess.run(
+        args,
+        env=environment(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True
+    )
+    result = list()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, module = line[12:].split('|')
+        if not module.startswith('  ') and cumulative.strip().isdigit():
+            result.append((module.strip(), int(cumulative) / 1000))
+    return sorted(result, key=lambda m: m[1], reverse=True)
+
+
+def run_command(command, show_help=True):
+    """Run a command in a new interpreter and return the elapsed time in
+    milliseconds. If the help flag is False the command is invoked against
+    the offline API. The exit code of the command is ignored in this case
+    since the request is expected to fail.
+
+    Parameters
+    ----------
+    command: string
+        Command line arguments
+    show_help: bool, default=True
+        Run the command with the --help option
+
+    Returns
+    -------
+    float
+    """
+    args = [sys.executable, '-c', INVOKE]
+    if show_help:
+        args += command.split() + ['--help']
+    else:
+        args += ['--no-cache'] + command.split()
+    start = time.perf_counter()
+    subprocess.run(
+        args,
+        env=environment(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=show_help
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv=None):
+    """Run the benchmark for the given command line arguments."""
+    parser = argparse.ArgumentParser(description='CLI cold-start benchmark')
+    parser.add_argument('commands', nargs='*', help='Commands to measure')
+    parser.add_argument('-n', '--runs', type=int, default=10)
+    parser.add_argument('-m', '--modules', type=int, default=3)
+    args = parser.parse_args(argv)
+    commands = args.commands if args.commands else COMMANDS
+    print('{:<24} {:>9} {:>9} {:>9} {:>9}  {}'.format(
+        'Command',
+        'Help min',
+        'Help med',
+        'Run min',
+        'Run med',
+        'Slowest imports (ms)'
+    ))
+    for command in commands:
+        help_times = [run_command(command) for _ in range(args.runs)]
+        run_times = list()
+        for _ in range(args.runs):
+            run_times.append(run_command(command, show_help=False))
+        modules = import_times(command)[:args.modules]
+        print('{:<24} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f}  {}'.format(
+            'rob ' + command if command else 'rob',
+            min(help_times),
+            statistics.median(help_times),
+            min(run_times),
+            statistics.median(run_times),
+            ', '.join('{} {:.1f}'.format(m, t) for m, t in modules)
+        ))
+
+
+if __name__ == '__main__':
+    main()
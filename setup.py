@@ -18,7 +18,7 @@ install_requires = [
     'future',
     'Click',
     'requests',
-    'flowserv-core>=0.2.0'
+    'pyyaml'
 ]
 
 
@@ -31,6 +31,10 @@ tests_require = [
 
 
 extras_require = {
+    'aio': ['aiohttp'],
+    'parquet': ['pyarrow'],
+    'prompt': ['flowserv-core>=0.2.0'],
+    'stream': ['ijson'],
     'docs': [
         'Sphinx',
         'sphinx-rtd-theme'
@@ -68,6 +72,7 @@ setup(
     author_email='heiko.muller@gmail.com',
     license='MIT',
     packages=find_packages(exclude=('tests',)),
+    python_requires='>=3.6',
     include_package_data=True,
     extras_require=extras_require,
     tests_require=tests_require,
@@ -75,16 +80,17 @@ setup(
     entry_points={
         'console_scripts': [
             'rob = robclient.cli.base:cli',
+            'robc = robclient.shim:main',
         ]
     },
     classifiers=[
         'License :: OSI Approved :: MIT License',
         'Operating System :: OS Independent',
-        'Programming Language :: Python :: 2',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
         'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
         'Programming Language :: Python'
     ]
 )
@@ -0,0 +1,199 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the local agent and the command shim."""
+
+import io
+import json
+import os
+import pytest
+import socket
+import threading
+import time
+
+from robclient.agent import CHANNEL_BUSY, CHANNEL_EXIT, CHANNEL_STDERR
+from robclient.agent import CHANNEL_STDOUT, FRAME_HEADER, MAX_FRAME_SIZE
+from robclient.agent import Agent, forward, frame_writer, is_running
+from robclient.agent import write_frame
+
+import robclient.agent as agent
+import robclient.shim as shim
+
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, 'AF_UNIX'),
+    reason='Unix domain sockets are not supported'
+)
+
+
+def frame(channel, data):
+    """Get the bytes for a frame with the given channel and payload."""
+    return FRAME_HEADER.pack(channel, len(data)) + data
+
+
+def read_frames(buf):
+    """Split the given bytes into a list of (channel, payload) pairs."""
+    frames = list()
+    pos = 0
+    while pos < len(buf):
+        channel, size = FRAME_HEADER.unpack(buf[pos:pos + FRAME_HEADER.size])
+        pos += FRAME_HEADER.size
+        frames.append((channel, buf[pos:pos + size]))
+        pos += size
+    return frames
+
+
+def serve_once(filename, data, chunk_size=None):
+    """Listen on the socket and answer a single request with the given bytes.
+    The answer is sent in chunks of the given size to simulate partial reads
+    by the client. Returns the thread and a list that receives the request.
+    """
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(filename)
+    server.listen(1)
+    requests = list()
+
+    def handle():
+        conn, _ = server.accept()
+        with conn:
+            requests.append(json.loads(conn.makefile('rb').readline()))
+            size = chunk_size if chunk_size else len(data)
+            for pos in range(0, len(data), size):
+                conn.sendall(data[pos:pos + size])
+                time.sleep(0.001)
+        server.close()
+
+    thread = threading.Thread(target=handle)
+    thread.start()
+    return thread, requests
+
+
+@pytest.fixture
+def filename(tmpdir, monkeypatch):
+    """Path to the Unix domain socket in a temporary directory. The path is
+    kept short since the length of socket paths is limited.
+    """
+    monkeypatch.chdir(str(tmpdir))
+    monkeypatch.setenv('ROB_AGENT_SOCKET', 'agent.sock')
+    return 'agent.sock'
+
+
+def test_frame_writer():
+    """Test writing output as length-prefixed frames."""
+    sink = io.BytesIO()
+    write_frame(sink, CHANNEL_EXIT, b'0')
+    assert sink.getvalue() == b'x\x00\x00\x00\x010'
+    # Text output is written when a line is complete.
+    sink = io.BytesIO()
+    stdout = frame_writer(sink, CHANNEL_STDOUT)
+    stdout.write('a')
+    assert sink.getvalue() == b''
+    stdout.write('b\n')
+    assert read_frames(sink.getvalue()) == [(CHANNEL_STDOUT, b'ab\n')]
+    # Large outputs are split into frames of at most the maximum size.
+    sink = io.BytesIO()
+    stderr = frame_writer(sink, CHANNEL_STDERR)
+    stderr.buffer.write(b'x' * (2 * MAX_FRAME_SIZE + 10))
+    stderr.flush()
+    frames = read_frames(sink.getvalue())
+    assert [len(data) for _, data in frames] == [
+        MAX_FRAME_SIZE,
+        MAX_FRAME_SIZE,
+        10
+    ]
+    assert all(channel == CHANNEL_STDERR for channel, _ in frames)
+
+
+def test_forward_frames(filename, capsys):
+    """Test reading output frames and the exit code of a forwarded command
+    from partial reads.
+    """
+    data = frame(CHANNEL_STDOUT, b'out\n') + frame(CHANNEL_STDERR, b'err\n')
+    data += frame(CHANNEL_STDOUT, b'x' * MAX_FRAME_SIZE)
+    data += frame(CHANNEL_EXIT, b'3')
+    thread, requests = serve_once(filename, data, chunk_size=1000)
+    assert forward(['runs', 'list']) == 3
+    thread.join()
+    assert requests[0]['argv'] == ['runs', 'list']
+    assert requests[0]['env']['ROB_AGENT_SOCKET'] == filename
+    out, err = capsys.readouterr()
+    assert out == 'out\n' + 'x' * MAX_FRAME_SIZE
+    assert err == 'err\n'
+
+
+def test_forward_invalid_frames(filename):
+    """Test the result for busy agents and for truncated or oversized
+    frames.
+    """
+    assert forward(['runs', 'list']) is None
+    thread, _ = serve_once(filename, frame(CHANNEL_BUSY, b''))
+    assert forward(['runs', 'list']) is None
+    thread.join()
+    for data in [
+        frame(CHANNEL_STDOUT, b'output')[:-2],
+        FRAME_HEADER.pack(CHANNEL_STDOUT, MAX_FRAME_SIZE + 1),
+        frame(CHANNEL_STDOUT, b'output')
+    ]:
+        os.remove(filename)
+        thread, _ = serve_once(filename, data)
+        assert forward(['runs', 'list']) == 1
+        thread.join()
+
+
+def test_agent(filename, monkeypatch, capsys):
+    """Test executing forwarded commands in a running agent."""
+    monkeypatch.setenv('ROB_CACHEDIR', 'cache')
+    server = Agent(filename)
+    thread = threading.Thread(target=server.serve)
+    thread.start()
+    try:
+        while not is_running(filename):
+            time.sleep(0.01)
+        assert forward(['--help']) == 0
+        assert 'Usage:' in capsys.readouterr().out
+        assert forward(['unknown']) == 2
+        assert 'No such command' in capsys.readouterr().err
+        assert forward(['agent', 'status']) == 2
+        # Commands are rejected while another command is running.
+        with server.lock:
+            assert forward(['--help']) is None
+        assert forward([], request=agent.REQUEST_STATUS) == 0
+        assert json.loads(capsys.readouterr().out)['commands'] == 3
+    finally:
+        assert forward([], request=agent.REQUEST_STOP) == 0
+        thread.join()
+    assert not os.path.exists(filename)
+
+
+def test_shim(filename, monkeypatch, capsys):
+    """Test running commands in the current process if they cannot be
+    forwarded.
+    """
+    # Run in the current process if no agent is running.
+    with pytest.raises(SystemExit) as ex:
+        shim.main(['--help'])
+    assert ex.value.code == 0
+    assert 'Usage:' in capsys.readouterr().out
+    # The exit code of forwarded commands is passed through.
+    calls = list()
+
+    def fake_forward(argv):
+        calls.append(argv)
+        return 4
+
+    monkeypatch.setattr(agent, 'forward', fake_forward)
+    with pytest.raises(SystemExit) as ex:
+        shim.main(['runs', 'list'])
+    assert ex.value.code == 4
+    assert calls == [['runs', 'list']]
+    # Local commands are never forwarded.
+    with pytest.raises(SystemExit):
+        shim.main(['runs', 'watch', '--help'])
+    assert len(calls) == 1
+    assert shim.is_local(['--raw', 'queue', 'run'])
+    assert not shim.is_local(['runs', 'list'])
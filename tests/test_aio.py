@@ -0,0 +1,115 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the asynchronous API client."""
+
+import asyncio
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+
+from robclient.aio import AsyncClient, get_runs  # noqa: E402
+from robclient.protocol import HEADER_TOKEN  # noqa: E402
+from robclient.route import UrlFactory  # noqa: E402
+
+import robclient.aio as aio  # noqa: E402
+
+
+class FakeResponse(object):
+    """Response for a request Url. Urls that end with 'missing' fail with
+    404 Not Found.
+    """
+    def __init__(self, session, url):
+        self.session = session
+        self.url = url
+
+    async def __aenter__(self):
+        session = self.session
+        session.active += 1
+        session.max_active = max(session.max_active, session.active)
+        # Give other requests the chance to start.
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.session.active -= 1
+
+    async def json(self):
+        return {'url': self.url}
+
+    def raise_for_status(self):
+        if self.url.endswith('missing'):
+            raise aiohttp.ClientError('404 Not Found')
+
+
+class FakeSession(object):
+    """Replacement for the aiohttp client session that records the request
+    headers and the maximum number of requests in flight.
+    """
+    def __init__(self, headers=None, connector=None):
+        self.headers = headers
+        self.active = 0
+        self.max_active = 0
+        self.closed = False
+        FakeSession.instances.append(self)
+
+    async def close(self):
+        self.closed = True
+
+    def get(self, url):
+        return FakeResponse(self, url)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """Replace the aiohttp client session and connector."""
+    FakeSession.instances = list()
+    monkeypatch.setattr(aio.aiohttp, 'ClientSession', FakeSession)
+    monkeypatch.setattr(aio.aiohttp, 'TCPConnector', lambda limit: None)
+    return FakeSession
+
+
+def test_get_runs(session):
+    """Test getting multiple runs concurrently with the synchronous
+    wrapper.
+    """
+    run_ids = ['R{}'.format(i) for i in range(10)]
+    urls = UrlFactory(base_url='http://api')
+    runs = get_runs(run_ids, concurrency=3, urls=urls, access_token='T0')
+    assert [r['url'] for r in runs] == [urls.get_run(r) for r in run_ids]
+    s = session.instances[0]
+    assert s.headers == {HEADER_TOKEN: 'T0'}
+    assert 0 < s.max_active <= 3
+    assert s.closed
+
+
+def test_get_runs_error(session):
+    """Test that request errors are raised and that the session is closed."""
+    urls = UrlFactory(base_url='http://api')
+    with pytest.raises(aiohttp.ClientError):
+        get_runs(['R1', 'missing'], urls=urls, access_token='T0')
+    assert session.instances[0].closed
+
+
+def test_get_leaderboards(session):
+    """Test getting leaderboards concurrently inside an event loop."""
+    urls = UrlFactory(base_url='http://api')
+
+    async def fetch():
+        async with AsyncClient(urls=urls, access_token='T0') as client:
+            return await client.get_leaderboards(['B1', 'B2'])
+
+    loop = asyncio.new_event_loop()
+    try:
+        boards = loop.run_until_complete(fetch())
+    finally:
+        loop.close()
+    assert [b['url'] for b in boards] == [
+        urls.get_leaderboard('B1'),
+        urls.get_leaderboard('B2')
+    ]
@@ -0,0 +1,111 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the programmatic API client."""
+
+import io
+import json
+import os
+import pytest
+import requests
+
+from robclient.api import Client, resource_path, select_resources
+from robclient.protocol import HEADER_TOKEN
+from robclient.route import UrlFactory
+from robclient.session import ClientSession
+
+
+class FakeServer(object):
+    """Send function that responds with the given status code and echoes the
+    request method, Url and JSON body in the response body.
+    """
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.requests = list()
+
+    def __call__(self, method, url, **kwargs):
+        data = kwargs.get('json')
+        self.requests.append((method, url, data))
+        r = requests.Response()
+        r.status_code = self.status_code
+        r.url = url
+        body = {'method': method, 'url': url, 'data': data}
+        r._content = json.dumps(body).encode('utf-8')
+        r.raw = io.BytesIO(r._content)
+        return r
+
+
+def create_client(status_code=200):
+    """Create an API client for a fake server."""
+    server = FakeServer(status_code=status_code)
+    session = ClientSession(headers={HEADER_TOKEN: 'T0'}, retries=0)
+    session.session.request = server
+    urls = UrlFactory(base_url='http://api')
+    return Client(urls=urls, session=session), server
+
+
+def test_client_requests():
+    """Test that client methods send requests to the API routes and return
+    the parsed response body.
+    """
+    client, server = create_client()
+    urls = client.urls
+    body = client.get_run('R1')
+    assert body == {'method': 'GET', 'url': urls.get_run('R1'), 'data': None}
+    assert client.list_runs('S1')['url'] == urls.list_runs('S1')
+    body = client.cancel_run('R1')
+    assert body['method'] == 'PUT'
+    assert body['data'] == {'reason': 'User request'}
+    body = client.update_submission('S1', name='A')
+    assert body['url'] == urls.update_submission('S1')
+    assert body['data'] == {'name': 'A'}
+    body = client.login('alice', 'secret')
+    assert body['method'] == 'POST'
+    assert body['data'] == {'username': 'alice', 'password': 'secret'}
+    body = client.create_submission('B1', 'A', members=['U1'])
+    assert body['url'] == urls.create_submission('B1')
+    assert body['data'] == {'name': 'A', 'members': ['U1']}
+    assert client.session.headers[HEADER_TOKEN] == 'T0'
+
+
+def test_client_errors():
+    """Test that error responses are raised as HTTP errors."""
+    client, server = create_client(status_code=404)
+    with pytest.raises(requests.HTTPError):
+        client.get_run('R1')
+    with pytest.raises(requests.HTTPError):
+        client.start_run('S1', list())
+    with pytest.raises(requests.HTTPError):
+        client.delete_run('R1')
+    assert [method for method, _, _ in server.requests] == [
+        'GET',
+        'POST',
+        'DELETE'
+    ]
+
+
+def test_resource_path(tmpdir):
+    """Test output paths for resource files."""
+    targetdir = str(tmpdir)
+    filename = resource_path(targetdir, 'results/data.json')
+    assert filename == os.path.join(targetdir, 'results', 'data.json')
+    filename = resource_path(targetdir, 'results/../data.json')
+    assert filename == os.path.join(targetdir, 'data.json')
+    for name in ['../data.json', '/etc/passwd', 'results/../../data.json']:
+        with pytest.raises(ValueError):
+            resource_path(targetdir, name)
+
+
+def test_select_resources():
+    """Test selecting resources by their identifier."""
+    resources = [{'id': 'A'}, {'id': 'B'}, {'id': 'C'}]
+    assert select_resources(resources) == resources
+    result = select_resources(resources, ['C', 'A'])
+    assert result == [{'id': 'C'}, {'id': 'A'}]
+    with pytest.raises(ValueError):
+        select_resources(resources, ['D'])
@@ -0,0 +1,171 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for running scripts of command line interface calls."""
+
+import io
+import json
+import os
+import pytest
+import requests
+
+from robclient.api import Client
+from robclient.batch import BatchRunner, read_lines, substitute
+from robclient.protocol import HEADER_TOKEN
+from robclient.route import UrlFactory
+from robclient.session import ClientSession
+
+
+class FakeServer(object):
+    """Send function that returns the response for the first route that
+    matches the end of the request Url. Requests for unknown routes fail with
+    404 Not Found. All requests are recorded together with the access token
+    of the session that sent the request.
+    """
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = list()
+        self.session = None
+
+    def __call__(self, method, url, **kwargs):
+        token = self.session.headers.get(HEADER_TOKEN)
+        self.requests.append((method, url, token))
+        status, body = 404, dict()
+        for suffix, result in self.routes.items():
+            if url.endswith(suffix):
+                status, body = result
+                break
+        r = requests.Response()
+        r.status_code = status
+        r.url = url
+        r._content = json.dumps(body).encode()
+        r.raw = io.BytesIO(r._content)
+        return r
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Fake API server with routes for the user commands."""
+    monkeypatch.setenv('ROB_ACCESS_TOKEN', 'T0')
+    monkeypatch.delenv('ROB_SUBMISSION', raising=False)
+    return FakeServer({
+        '/users/whoami': (200, {'username': 'alice'}),
+        '/users/login': (200, {'token': 'T1'}),
+        '/submissions/S1/runs': (200, {'runs': list()})
+    })
+
+
+def create_runner(server, keep_going=False, options=None):
+    """Create a batch runner with a client for the fake server."""
+    session = ClientSession(headers={HEADER_TOKEN: 'T0'}, retries=0)
+    session.session.request = server
+    server.session = session
+    client = Client(urls=UrlFactory(base_url='http://api'), session=session)
+    return BatchRunner(client=client, options=options, keep_going=keep_going)
+
+
+def test_batch_exit_codes(server, capsys):
+    """Test the exit code of a script with failed commands."""
+    runner = create_runner(server)
+    assert runner.run(['whoami', 'rob whoami']) == 0
+    assert len(server.requests) == 2
+    assert 'Logged in as alice.' in capsys.readouterr().out
+    # The script stops at the first failed command.
+    script = ['whoami', 'runs list -s S2', 'whoami']
+    assert runner.run(script) == 1
+    assert len(server.requests) == 4
+    assert '404 Client Error' in capsys.readouterr().out
+    # Missing arguments and usage errors are failures.
+    assert runner.run(['runs list', 'whoami']) == 1
+    assert runner.run(['runs cancel', 'whoami']) == 2
+    assert runner.run(['unknown']) == 2
+    assert len(server.requests) == 4
+    # All commands are executed if errors are ignored.
+    runner = create_runner(server, keep_going=True)
+    assert runner.run(script) == 1
+    assert len(server.requests) == 7
+
+
+def test_batch_failed_commands(server, tmpdir, capsys):
+    """Test the exit code of commands that have nothing to do or that cannot
+    be started.
+    """
+    runner = create_runner(server, keep_going=True)
+    # Watch runs without a submission and for a submission without runs.
+    assert runner.run(['runs watch']) == 1
+    assert 'no run or submission specified' in capsys.readouterr().out
+    assert runner.run(['runs watch -s S1']) == 1
+    assert 'no active runs' in capsys.readouterr().out
+    # Upload an empty directory.
+    directory = str(tmpdir.mkdir('empty'))
+    assert runner.run(['files upload -s S1 -d {}'.format(directory)]) == 1
+    assert 'no files to upload' in capsys.readouterr().out
+    # Start an agent with a socket in a directory that cannot be created.
+    filename = os.path.join(str(tmpdir), 'agent')
+    open(filename, 'w').close()
+    socket = os.path.join(filename, 'agent.sock')
+    assert runner.run(['agent start -S {}'.format(socket)]) == 1
+
+
+def test_batch_invalid_lines(server, capsys):
+    """Test errors for lines that reference undefined variables."""
+    runner = create_runner(server)
+    assert runner.run(['whoami', 'runs list -s $UNDEFINED', 'whoami']) == 2
+    assert len(server.requests) == 1
+    assert 'line 2: undefined variable' in capsys.readouterr().err
+    assert runner.run(['X=a b']) == 2
+
+
+def test_batch_variables(server, capsys):
+    """Test assigning and exporting variables."""
+    runner = create_runner(server)
+    script = [
+        '# List runs for the default submission',
+        'S=S1',
+        'export ROB_SUBMISSION=$S',
+        'runs list',
+        'runs list \\',
+        '    -s ${S}'
+    ]
+    assert runner.run(script) == 0
+    urls = [url for _, url, _ in server.requests]
+    assert urls == ['http://api/submissions/S1/runs'] * 2
+    # Exported variables are removed from the environment after the script.
+    assert 'ROB_SUBMISSION' not in os.environ
+
+
+def test_batch_output_exports(server, capsys):
+    """Test applying exports that are printed by a command."""
+    runner = create_runner(server)
+    assert runner.run(['login -u alice -p secret', 'whoami']) == 0
+    assert 'export ROB_ACCESS_TOKEN=T1' in capsys.readouterr().out
+    assert [token for _, _, token in server.requests] == ['T0', 'T1']
+    assert runner.variables['ROB_ACCESS_TOKEN'] == 'T1'
+    # The access token of the shared client is restored after the script.
+    assert runner.client.session.headers[HEADER_TOKEN] == 'T0'
+    assert os.environ['ROB_ACCESS_TOKEN'] == 'T0'
+    # Exports are not printed in raw mode.
+    runner = create_runner(server, options=['--raw'])
+    assert runner.run(['login -u alice -p secret']) == 0
+    assert 'not exported with --raw' in capsys.readouterr().err
+    assert 'ROB_ACCESS_TOKEN' not in runner.variables
+
+
+def test_read_lines():
+    """Test reading logical lines from a script."""
+    lines = ['# comment', '', 'a \\', 'b', '  c  ', 'd \\']
+    assert list(read_lines(lines)) == [(3, 'a  b'), (5, 'c'), (6, 'd')]
+
+
+def test_substitute(monkeypatch):
+    """Test replacing variable references in script lines."""
+    monkeypatch.setenv('ROB_X', 'env')
+    variables = {'A': '1'}
+    assert substitute('$A ${A}B $ROB_X $$', variables) == '1 1B env $'
+    with pytest.raises(ValueError):
+        substitute('$B', variables)
@@ -0,0 +1,135 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the on-disk cache for API responses."""
+
+import io
+import json
+import os
+import requests
+import time
+
+from robclient.api import Client
+from robclient.cache import ResponseCache, cache_key
+from robclient.cli.base import invoke
+from robclient.protocol import HEADER_TOKEN
+from robclient.route import UrlFactory
+from robclient.session import ClientSession
+
+
+class FakeServer(object):
+    """Send function that returns the next response from a list of status
+    code, header and body triples. The headers of all requests are recorded.
+    """
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = list()
+
+    def __call__(self, method, url, headers=None, **kwargs):
+        self.requests.append(dict(headers) if headers else dict())
+        status, headers, body = self.responses.pop(0)
+        r = requests.Response()
+        r.status_code = status
+        r.url = url
+        r.headers.update(headers)
+        r._content = json.dumps(body).encode() if body is not None else b''
+        r.raw = io.BytesIO(r._content)
+        return r
+
+
+def create_client(tmpdir, responses, max_size=None):
+    """Create an API client with a response cache for the fake server."""
+    server = FakeServer(responses)
+    session = ClientSession(headers={HEADER_TOKEN: 'T0'}, retries=0)
+    session.session.request = server
+    cache = ResponseCache(
+        directory=os.path.join(str(tmpdir), 'cache'),
+        max_size=max_size
+    )
+    client = Client(
+        urls=UrlFactory(base_url='http://api'),
+        session=session,
+        cache=cache
+    )
+    return client, server
+
+
+def test_cache_revalidation(tmpdir):
+    """Test revalidating cached responses with their ETag."""
+    client, server = create_client(tmpdir, [
+        (200, {'ETag': '"v1"'}, {'benchmarks': [1]}),
+        (304, {}, None),
+        (200, {'ETag': '"v2"'}, {'benchmarks': [2]})
+    ])
+    assert client.list_benchmarks() == {'benchmarks': [1]}
+    assert client.list_benchmarks() == {'benchmarks': [1]}
+    assert client.list_benchmarks() == {'benchmarks': [2]}
+    assert server.requests[0].get('If-None-Match') is None
+    assert server.requests[1]['If-None-Match'] == '"v1"'
+    assert server.requests[2]['If-None-Match'] == '"v1"'
+    # Fresh responses are taken from the cache without a request.
+    client, server = create_client(tmpdir, [
+        (200, {'Cache-Control': 'max-age=60'}, {'benchmarks': [3]})
+    ])
+    assert client.list_benchmarks() == {'benchmarks': [3]}
+    assert client.list_benchmarks() == {'benchmarks': [3]}
+    assert len(server.requests) == 1
+
+
+def test_cache_uncacheable_response(tmpdir):
+    """Test that a cached entry is removed if the revalidated response cannot
+    be cached.
+    """
+    for headers in [{}, {'ETag': '"v2"', 'Cache-Control': 'no-store'}]:
+        client, server = create_client(tmpdir, [
+            (200, {'ETag': '"v1"'}, {'benchmarks': [1]}),
+            (200, headers, {'benchmarks': [2]}),
+            (200, {}, {'benchmarks': [3]})
+        ])
+        key = cache_key(client.urls.list_benchmarks(), 'T0')
+        assert client.list_benchmarks() == {'benchmarks': [1]}
+        assert client.cache.get(key) is not None
+        assert client.list_benchmarks() == {'benchmarks': [2]}
+        assert client.cache.get(key) is None
+        assert client.list_benchmarks() == {'benchmarks': [3]}
+        assert server.requests[2].get('If-None-Match') is None
+
+
+def test_cache_eviction(tmpdir):
+    """Test removing the least recently used entries if the cache size is
+    exceeded.
+    """
+    cache = ResponseCache(directory=str(tmpdir))
+    entry = {'url': 'x', 'etag': 'e', 'expires': 0, 'body': 'x' * 100}
+    for i, key in enumerate(['a', 'b', 'c']):
+        cache.write(key, entry)
+        # Make sure that the modification times differ.
+        os.utime(cache.filename(key), (time.time(), time.time() - 10 + i))
+    size = os.path.getsize(cache.filename('a'))
+    # Mark 'a' as recently used.
+    assert cache.get('a') is not None
+    cache.max_size = 2 * size
+    cache.evict()
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+
+
+def test_no_cache_option(tmpdir, capsys):
+    """Test that the --no-cache option bypasses the response cache."""
+    body = {'benchmarks': [{'id': 'B1', 'name': 'A', 'description': 'D'}]}
+    client, server = create_client(tmpdir, [
+        (200, {'Cache-Control': 'max-age=60'}, body),
+        (200, {'Cache-Control': 'max-age=60'}, body)
+    ])
+    assert invoke(['benchmarks', 'list'], client) == 0
+    assert invoke(['benchmarks', 'list'], client) == 0
+    assert len(server.requests) == 1
+    assert invoke(['--no-cache', 'benchmarks', 'list'], client) == 0
+    assert len(server.requests) == 2
+    assert 'B1' in capsys.readouterr().out
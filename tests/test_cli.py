@@ -0,0 +1,79 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the lazily loaded commands of the command line
+interface.
+"""
+
+import click
+import json
+import subprocess
+import sys
+
+from click.testing import CliRunner
+
+from robclient.cli.base import COMMANDS, LazyGroup, cli
+
+
+"""Script that prints the loaded command modules and whether the requests
+package was imported after running the command line interface with the given
+arguments. The command line interface is only imported if no arguments are
+given.
+"""
+SCRIPT = '''
+import json
+import sys
+from robclient.cli.base import cli
+if len(sys.argv) > 1:
+    try:
+        cli(args=sys.argv[1:], prog_name='rob')
+    except SystemExit:
+        pass
+modules = [m for m in sys.modules if m.startswith('robclient.cli.')]
+doc = {'modules': sorted(modules), 'requests': 'requests' in sys.modules}
+print(json.dumps(doc))
+'''
+
+
+def loaded_modules(*args):
+    """Run the command line interface in a new process and return the loaded
+    command modules and whether the requests package was imported.
+    """
+    out = subprocess.check_output([sys.executable, '-c', SCRIPT] + list(args))
+    return json.loads(out.decode('utf-8').splitlines()[-1])
+
+
+def test_command_map():
+    """Test that every entry in the command map references a command."""
+    group = LazyGroup(lazy_commands=COMMANDS)
+    ctx = click.Context(group)
+    assert group.list_commands(ctx) == sorted(COMMANDS)
+    for name in COMMANDS:
+        cmd = group.get_command(ctx, name)
+        assert isinstance(cmd, click.Command)
+        assert group.commands[name] is cmd
+    assert group.get_command(ctx, 'unknown') is None
+
+
+def test_help_lists_all_commands():
+    """Test that the help text lists all commands."""
+    result = CliRunner().invoke(cli, ['--help'])
+    assert result.exit_code == 0
+    for name in COMMANDS:
+        assert '  {} '.format(name) in result.output
+
+
+def test_lazy_imports():
+    """Test that command modules and the requests package are only imported
+    when a command is invoked.
+    """
+    doc = loaded_modules()
+    assert doc['modules'] == ['robclient.cli.base']
+    assert not doc['requests']
+    doc = loaded_modules('runs', '--help')
+    assert doc['modules'] == ['robclient.cli.base', 'robclient.cli.run']
@@ -0,0 +1,296 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for resumable file downloads."""
+
+import io
+import json
+import os
+import pytest
+import requests
+
+from robclient.api import Client
+from robclient.download import META_SUFFIX, PART_SUFFIX
+from robclient.download import download, download_segment
+from robclient.download import download_segmented, read_partial
+
+from robclient.route import UrlFactory
+
+import robclient.download as engine
+
+
+"""Content of the downloaded file."""
+DATA = b'0123456789' * 100
+
+
+class FakeSession(object):
+    """Session that serves a single file and supports range requests. The
+    server can be configured to ignore range requests, to omit the file size
+    from the response headers, and to send an incomplete response body.
+    """
+    def __init__(
+        self, data=DATA, etag='"v1"', ranges=True, limit=None, size=True
+    ):
+        self.data = data
+        self.etag = etag
+        self.ranges = ranges
+        self.limit = limit
+        self.size = size
+        self.requests = list()
+        self.pool_size = 0
+
+    def ensure_pool_size(self, pool_size):
+        self.pool_size = max(self.pool_size, pool_size)
+
+    def get(self, url, stream=False, headers=None):
+        headers = headers if headers is not None else dict()
+        self.requests.append(dict(headers))
+        r = requests.Response()
+        r.url = url
+        r.headers['ETag'] = self.etag
+        r.headers['Content-Disposition'] = 'attachment; filename="data.bin"'
+        start, end = 0, len(self.data) - 1
+        byte_range = headers.get('Range')
+        if_range = headers.get('If-Range')
+        if byte_range and self.ranges and if_range in [None, self.etag]:
+            first, last = byte_range[6:].split('-')
+            start = int(first)
+            end = int(last) if last else end
+            r.status_code = 206
+            r.headers['Content-Range'] = 'bytes {}-{}/{}'.format(
+                start,
+                end,
+                len(self.data) if self.size else '*'
+            )
+        else:
+            r.status_code = 200
+        body = self.data[start:end + 1]
+        if self.size:
+            r.headers['Content-Length'] = str(len(body))
+        if self.limit is not None:
+            body = body[:self.limit]
+        r.raw = io.BytesIO(body)
+        return r
+
+
+class TrackingReader(io.BytesIO):
+    """Response body that records the size of each read."""
+    def __init__(self, data, reads):
+        super(TrackingReader, self).__init__(data)
+        self.reads = reads
+
+    def read(self, size=-1):
+        buf = super(TrackingReader, self).read(size)
+        self.reads.append(len(buf))
+        return buf
+
+
+class TrackingSession(FakeSession):
+    """Session that records whether responses are streamed and the size of
+    each read from the response body.
+    """
+    def __init__(self, **kwargs):
+        super(TrackingSession, self).__init__(**kwargs)
+        self.reads = list()
+        self.streamed = list()
+
+    def get(self, url, stream=False, headers=None):
+        r = super(TrackingSession, self).get(url, stream, headers)
+        r.raw = TrackingReader(r.raw.getvalue(), self.reads)
+        self.streamed.append(stream)
+        return r
+
+
+def test_download_file(tmpdir):
+    """Test downloading a complete file."""
+    filename = os.path.join(str(tmpdir), 'out', 'data.bin')
+    session = FakeSession()
+    assert download(session, 'http://api/file', filename) == filename
+    with open(filename, 'rb') as f:
+        assert f.read() == DATA
+    assert not os.path.exists(filename + PART_SUFFIX)
+    assert not os.path.exists(filename + META_SUFFIX)
+    assert 'Range' not in session.requests[0]
+
+
+def test_streaming_download(tmpdir, monkeypatch):
+    """Test that the response body is streamed to disk in chunks of the
+    configured size.
+    """
+    monkeypatch.setenv('ROB_CHUNKSIZE', '128')
+    session = TrackingSession()
+    client = Client(urls=UrlFactory(base_url='http://api'), session=session)
+    assert client.chunk_size == 128
+    filename = os.path.join(str(tmpdir), 'data.bin')
+    client.download('http://api/file', filename)
+    with open(filename, 'rb') as f:
+        assert f.read() == DATA
+    assert session.streamed == [True]
+    assert max(session.reads) == 128
+    assert sum(session.reads) == len(DATA)
+    # Use the given chunk size for parallel downloads of multiple files.
+    session = TrackingSession()
+    client = Client(session=session, chunk_size=300)
+    files = [('http://api/file', filename + str(i)) for i in range(3)]
+    client.download_files(files, jobs=2)
+    assert session.streamed == [True] * 3
+    assert max(session.reads) == 300
+    for _, filename in files:
+        with open(filename, 'rb') as f:
+            assert f.read() == DATA
+
+
+def test_download_filename_from_header(tmpdir):
+    """Test downloading a file with the name from the response header."""
+    cwd = os.getcwd()
+    os.chdir(str(tmpdir))
+    try:
+        assert download(FakeSession(), 'http://api/file') == 'data.bin'
+        assert os.path.getsize('data.bin') == len(DATA)
+    finally:
+        os.chdir(cwd)
+
+
+def test_resume_interrupted_download(tmpdir):
+    """Test resuming a download after the connection was interrupted."""
+    filename = os.path.join(str(tmpdir), 'data.bin')
+    with pytest.raises(IOError):
+        download(FakeSession(limit=300), 'http://api/file', filename)
+    assert not os.path.exists(filename)
+    assert os.path.getsize(filename + PART_SUFFIX) == 300
+    meta = read_partial(filename)
+    assert meta['offset'] == 300
+    assert meta['size'] == len(DATA)
+    # Only the remaining bytes are requested.
+    session = FakeSession()
+    download(session, 'http://api/file', filename)
+    assert session.requests[0]['Range'] == 'bytes=300-'
+    assert session.requests[0]['If-Range'] == '"v1"'
+    with open(filename, 'rb') as f:
+        assert f.read() == DATA
+    assert read_partial(filename) is None
+    assert not os.path.exists(filename + META_SUFFIX)
+
+
+def test_resume_modified_file(tmpdir):
+    """Test downloading the full file if the file was modified after the
+    download was interrupted.
+    """
+    filename = os.path.join(str(tmpdir), 'data.bin')
+    with pytest.raises(IOError):
+        download(FakeSession(limit=300), 'http://api/file', filename)
+    data = b'abcdefghij' * 100
+    session = FakeSession(data=data, etag='"v2"')
+    download(session, 'http://api/file', filename)
+    assert session.requests[0]['Range'] == 'bytes=300-'
+    with open(filename, 'rb') as f:
+        assert f.read() == data
+    # Partial downloads with a different file size are discarded.
+    with pytest.raises(IOError):
+        download(FakeSession(limit=300), 'http://api/file', filename)
+    with open(filename + META_SUFFIX, 'r') as f:
+        meta = json.load(f)
+    meta['size'] = 2000
+    with open(filename + META_SUFFIX, 'w') as f:
+        json.dump(meta, f)
+    session = FakeSession()
+    download(session, 'http://api/file', filename)
+    assert len(session.requests) == 2
+    assert 'Range' not in session.requests[1]
+    with open(filename, 'rb') as f:
+        assert f.read() == DATA
+
+
+def test_resume_without_range_support(tmpdir):
+    """Test downloading the full file if the server ignores range
+    requests.
+    """
+    filename = os.path.join(str(tmpdir), 'data.bin')
+    with pytest.raises(IOError):
+        download(FakeSession(limit=300), 'http://api/file', filename)
+    download(FakeSession(ranges=False), 'http://api/file', filename)
+    with open(filename, 'rb') as f:
+        assert f.read() == DATA
+    # Partial downloads are ignored if resume is disabled.
+    with pytest.raises(IOError):
+        download(FakeSession(limit=300), 'http://api/file', filename)
+    session = FakeSession()
+    download(session, 'http://api/file', filename, resume=False)
+    assert 'Range' not in session.requests[0]
+    with open(filename, 'rb') as f:
+        assert f.read() == DATA
+
+
+def test_download_segmented(tmpdir, monkeypatch):
+    """Test downloading a file in parallel segments."""
+    monkeypatch.setattr(engine, 'MIN_SEGMENT_SIZE', 100)
+    filename = os.path.join(str(tmpdir), 'out', 'data.bin')
+    session = FakeSession()
+    result = download_segmented(session, 'http://api/file', filename)
+    assert result == filename
+    with open(filename, 'rb') as f:
+        assert f.read() == DATA
+    assert not os.path.exists(filename + PART_SUFFIX)
+    # One request for the file size and one request for each segment.
+    ranges = sorted(r['Range'] for r in session.requests[1:])
+    assert session.requests[0]['Range'] == 'bytes=0-0'
+    assert ranges == [
+        'bytes=0-249',
+        'bytes=250-499',
+        'bytes=500-749',
+        'bytes=750-999'
+    ]
+    assert all(r['If-Range'] == '"v1"' for r in session.requests[1:])
+    assert session.pool_size == 4
+    # The number of segments is limited by the minimal segment size.
+    session = FakeSession()
+    download_segmented(session, 'http://api/file', filename, segments=20)
+    assert len(session.requests) == 11
+    with open(filename, 'rb') as f:
+        assert f.read() == DATA
+
+
+def test_download_segmented_fallback(tmpdir, monkeypatch):
+    """Test downloading the file in a single request if the server ignores
+    range requests, if the file size is unknown, or if the file is too small
+    to be split.
+    """
+    filename = os.path.join(str(tmpdir), 'data.bin')
+    monkeypatch.setattr(engine, 'MIN_SEGMENT_SIZE', 100)
+    for session in [FakeSession(ranges=False), FakeSession(size=False)]:
+        download_segmented(session, 'http://api/file', filename)
+        assert len(session.requests) == 2
+        assert 'Range' not in session.requests[1]
+        with open(filename, 'rb') as f:
+            assert f.read() == DATA
+    monkeypatch.setattr(engine, 'MIN_SEGMENT_SIZE', 1000)
+    session = FakeSession()
+    download_segmented(session, 'http://api/file', filename)
+    assert len(session.requests) == 2
+    with open(filename, 'rb') as f:
+        assert f.read() == DATA
+
+
+def test_download_segment_errors(tmpdir):
+    """Test errors for segments of a modified file and for incomplete
+    segments.
+    """
+    filename = os.path.join(str(tmpdir), 'data.bin')
+    with open(filename, 'wb') as f:
+        f.truncate(len(DATA))
+    download_segment(FakeSession(), 'http://api/file', filename, 100, 199)
+    with open(filename, 'rb') as f:
+        data = f.read()
+    assert data[100:200] == DATA[100:200]
+    assert data[:100] == b'\0' * 100
+    with pytest.raises(IOError):
+        session = FakeSession(etag='"v2"')
+        download_segment(session, 'http://api/file', filename, 0, 99, '"v1"')
+    with pytest.raises(IOError):
+        session = FakeSession(limit=50)
+        download_segment(session, 'http://api/file', filename, 0, 99)
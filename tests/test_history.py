@@ -0,0 +1,84 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the local leaderboard history."""
+
+import os
+
+from robclient.history import LeaderboardHistory
+
+
+"""Result schema for the test leaderboards."""
+SCHEMA = [{'id': 'acc', 'name': 'Accuracy', 'type': 'float'}]
+
+
+def entry(submission_id, run_id, **results):
+    """Create a ranking entry with the given result values."""
+    return {
+        'submission': {'id': submission_id, 'name': submission_id.upper()},
+        'run': {'id': run_id},
+        'results': [{'id': key, 'value': val} for key, val in results.items()]
+    }
+
+
+def leaderboard(*ranking):
+    """Create a leaderboard with the given ranking entries."""
+    return {'schema': SCHEMA, 'ranking': list(ranking)}
+
+
+def test_record_changes(tmpdir):
+    """Test that only changed ranking entries are stored."""
+    filename = os.path.join(str(tmpdir), 'data', 'history.db')
+    db = LeaderboardHistory(filename)
+    assert db.schema('B1') is None
+    board = leaderboard(entry('s1', 'r1', acc=0.9), entry('s2', 'r2', acc=0.8))
+    assert db.record('B1', board, created_at='2020-01-01') == 2
+    assert db.record('B1', board, created_at='2020-01-02') == 0
+    board = leaderboard(
+        entry('s3', 'r3', acc=0.95),
+        entry('s1', 'r1', acc=0.9)
+    )
+    assert db.record('B1', board, created_at='2020-01-03') == 3
+    db.close()
+    # The history is kept in the database file.
+    db = LeaderboardHistory(filename)
+    assert db.schema('B1') == SCHEMA
+    changes = [
+        (c['createdAt'], c['submission']['id'], c['rank'], c['results'])
+        for c in db.history('B1')
+    ]
+    # Removed entries have no rank and no results. SQLite sorts NULL first.
+    assert changes == [
+        ('2020-01-01', 's1', 1, {'acc': 0.9}),
+        ('2020-01-01', 's2', 2, {'acc': 0.8}),
+        ('2020-01-03', 's2', None, None),
+        ('2020-01-03', 's3', 1, {'acc': 0.95}),
+        ('2020-01-03', 's1', 2, {'acc': 0.9})
+    ]
+    changes = db.history('B1', submission_id='s1')
+    assert [c['rank'] for c in changes] == [1, 2]
+    assert db.history('B2') == list()
+
+
+def test_record_missing_values(tmpdir):
+    """Test recording entries with missing result values."""
+    db = LeaderboardHistory(os.path.join(str(tmpdir), 'history.db'))
+    board = leaderboard(
+        entry('s1', 'r1', acc=0.9),
+        {'submission': {'id': 's2'}, 'run': {'id': 'r2'}, 'results': [
+            {'id': 'acc'}
+        ]},
+        {'submission': {'id': 's3'}, 'run': {'id': 'r3'}}
+    )
+    assert db.record('B1', board) == 3
+    results = [c['results'] for c in db.history('B1')]
+    assert results == [{'acc': 0.9}, {'acc': None}, dict()]
+    # A value that becomes available is a change.
+    board['ranking'][1]['results'][0]['value'] = 0.5
+    assert db.record('B1', board) == 1
+    assert db.history('B1')[-1]['results'] == {'acc': 0.5}
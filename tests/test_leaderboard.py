@@ -0,0 +1,154 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for leaderboard helper functions."""
+
+import pytest
+
+from robclient.leaderboard import DIFF_CHANGED, DIFF_DROPPED, DIFF_NEW
+from robclient.leaderboard import DIFF_UNCHANGED, diff_leaderboards
+from robclient.leaderboard import filter_ranking, parse_filter
+from robclient.protocol import PARA_FLOAT, PARA_INT, PARA_STRING
+
+
+"""Result schema for the test leaderboards."""
+SCHEMA = [
+    {'id': 'acc', 'name': 'Accuracy', 'type': PARA_FLOAT},
+    {'id': 'count', 'name': 'Count', 'type': PARA_INT},
+    {'id': 'label', 'name': 'Label', 'type': PARA_STRING}
+]
+
+
+def entry(submission_id, run_id, **results):
+    """Create a ranking entry with the given result values."""
+    return {
+        'submission': {'id': submission_id, 'name': submission_id.upper()},
+        'run': {'id': run_id},
+        'results': [{'id': key, 'value': val} for key, val in results.items()]
+    }
+
+
+def leaderboard(*ranking):
+    """Create a leaderboard with the given ranking entries."""
+    return {'schema': SCHEMA, 'ranking': list(ranking)}
+
+
+def test_diff_leaderboards():
+    """Test comparing two leaderboard snapshots."""
+    old = leaderboard(
+        entry('s1', 'r1', acc=0.9, count=10, label='a'),
+        entry('s2', 'r2', acc=0.8, count=5, label='b'),
+        entry('s3', 'r3', acc=0.7, count=1, label='c')
+    )
+    new = leaderboard(
+        entry('s4', 'r4', acc=0.95, count=2, label='d'),
+        entry('s1', 'r1', acc=0.9, count=12, label='a'),
+        entry('s3', 'r3', acc=0.7, count=1, label='c')
+    )
+    result = diff_leaderboards(old, new)
+    keys = [(d['submission']['id'], d['run']) for d in result]
+    assert keys == [('s4', 'r4'), ('s1', 'r1'), ('s3', 'r3'), ('s2', 'r2')]
+    status = [d['status'] for d in result]
+    assert status == [DIFF_NEW, DIFF_CHANGED, DIFF_UNCHANGED, DIFF_DROPPED]
+    ranks = [(d['rank'], d['previousRank']) for d in result]
+    assert ranks == [(1, None), (2, 1), (3, 3), (None, 2)]
+    # Differences are only computed for numeric columns that changed.
+    assert result[0]['deltas'] == dict()
+    assert result[1]['deltas'] == {'count': 2}
+    assert result[2]['deltas'] == dict()
+    assert result[3]['results'] == {'acc': 0.8, 'count': 5, 'label': 'b'}
+
+
+def test_diff_leaderboards_changed_rank():
+    """Test that entries with a different rank are changed even if the result
+    values are the same.
+    """
+    old = leaderboard(entry('s1', 'r1', acc=0.9), entry('s2', 'r2', acc=0.9))
+    new = leaderboard(entry('s2', 'r2', acc=0.9), entry('s1', 'r1', acc=0.9))
+    result = diff_leaderboards(old, new)
+    assert [d['status'] for d in result] == [DIFF_CHANGED, DIFF_CHANGED]
+    assert [d['deltas'] for d in result] == [dict(), dict()]
+
+
+def test_diff_leaderboards_missing_values():
+    """Test comparing entries with missing and non-numeric result values."""
+    old = leaderboard(
+        entry('s1', 'r1', acc=None, count=3),
+        {'submission': {'id': 's2'}, 'run': {'id': 'r2'}}
+    )
+    new = leaderboard(
+        entry('s1', 'r1', acc=0.5, count='n/a'),
+        {'submission': {'id': 's2'}, 'run': {'id': 'r2'}}
+    )
+    result = diff_leaderboards(old, new)
+    assert [d['status'] for d in result] == [DIFF_CHANGED, DIFF_UNCHANGED]
+    assert result[0]['deltas'] == dict()
+    assert result[1]['results'] == dict()
+
+
+def test_diff_empty_leaderboards():
+    """Test comparing leaderboards without ranking entries."""
+    assert diff_leaderboards(leaderboard(), leaderboard()) == list()
+    new = leaderboard(entry('s1', 'r1', acc=0.9))
+    result = diff_leaderboards(leaderboard(), new)
+    assert [d['status'] for d in result] == [DIFF_NEW]
+    result = diff_leaderboards(new, leaderboard())
+    assert [d['status'] for d in result] == [DIFF_DROPPED]
+
+
+def test_filter_ranking():
+    """Test filtering ranking entries."""
+    board = leaderboard(
+        entry('s1', 'r1', acc=0.9, count=10, label='a'),
+        entry('s2', 'r2', acc=0.8, count=5, label='b'),
+        entry('s3', 'r3', acc=0.7, label='c'),
+        entry('s4', 'r4', acc=0.6, count=1, label='b')
+    )
+    filters = [parse_filter('count>=5', SCHEMA)]
+    result = filter_ranking(board, filters=filters)
+    assert [rank for rank, _, _ in result] == [1, 2]
+    filters = [
+        parse_filter('Label=b', SCHEMA),
+        parse_filter('acc<0.8', SCHEMA)
+    ]
+    result = filter_ranking(board, filters=filters)
+    assert [e['run']['id'] for _, e, _ in result] == ['r4']
+    # Entries without a value for a filtered column do not match.
+    filters = [parse_filter('count!=10', SCHEMA)]
+    result = filter_ranking(board, filters=filters)
+    assert [e['run']['id'] for _, e, _ in result] == ['r2', 'r4']
+    assert len(list(filter_ranking(board, top=3))) == 3
+    for expr in ['count>x', 'unknown=1', 'count']:
+        with pytest.raises(ValueError):
+            parse_filter(expr, SCHEMA)
+
+
+def test_sort_ranking():
+    """Test sorting ranking entries and selecting the top entries."""
+    board = leaderboard(
+        entry('s1', 'r1', count=10),
+        entry('s2', 'r2', count='n/a'),
+        entry('s3', 'r3'),
+        entry('s4', 'r4', count=1),
+        entry('s5', 'r5', count=5)
+    )
+
+    def runs(**kwargs):
+        return [e['run']['id'] for _, e, _ in filter_ranking(board, **kwargs)]
+
+    # Numbers come before other values and entries without a value come
+    # last in both sort orders.
+    assert runs(sort='count') == ['r4', 'r5', 'r1', 'r2', 'r3']
+    assert runs(sort='count', descending=True) == [
+        'r1', 'r5', 'r4', 'r2', 'r3'
+    ]
+    assert runs(sort='count', top=2) == ['r4', 'r5']
+    assert runs(sort='count', descending=True, top=4) == [
+        'r1', 'r5', 'r4', 'r2'
+    ]
+    assert runs(sort='count', top=10) == ['r4', 'r5', 'r1', 'r2', 'r3']
@@ -0,0 +1,49 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for writers of machine-readable command output."""
+
+import json
+import pytest
+
+from robclient.output import FORMAT_CSV, FORMAT_NDJSON, FORMAT_TSV
+from robclient.output import create_writer
+from robclient.protocol import PARA_INT, PARA_STRING
+
+
+"""Column names, keys and types for the test output."""
+HEADLINE = ['Name', 'Count']
+KEYS = ['name', 'count']
+TYPES = [PARA_STRING, PARA_INT]
+
+
+def write_rows(fmt, rows):
+    """Write the given rows to standard output in the given format."""
+    with create_writer(fmt, HEADLINE, TYPES, keys=KEYS) as writer:
+        for row in rows:
+            writer.add(row)
+
+
+def test_csv_writer(capsys):
+    """Test writing rows as CSV and TSV to standard output."""
+    write_rows(FORMAT_CSV, [['alice', 1], ['b,c', None]])
+    assert capsys.readouterr().out == 'name,count\nalice,1\n"b,c",\n'
+    write_rows(FORMAT_TSV, [['alice', 1]])
+    assert capsys.readouterr().out == 'name\tcount\nalice\t1\n'
+
+
+def test_ndjson_writer(capsys):
+    """Test writing rows as newline-delimited JSON to standard output."""
+    write_rows(FORMAT_NDJSON, [['alice', 1], ['bob', None]])
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {'name': 'alice', 'count': 1},
+        {'name': 'bob', 'count': None}
+    ]
+    with pytest.raises(ValueError):
+        create_writer('xml', HEADLINE, TYPES)
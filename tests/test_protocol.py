@@ -0,0 +1,100 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the parameter declarations and run argument serializers of
+the API protocol.
+"""
+
+import pytest
+
+from robclient.protocol import ARG, FILE, GET_FILE, PARA_BOOL, PARA_ENUM
+from robclient.protocol import PARA_FILE, PARA_FLOAT, PARA_INT, PARA_STRING
+from robclient.protocol import InvalidArgumentError, Parameter
+from robclient.protocol import ParameterIndex, in_range
+
+
+def parameter(type_id, **kwargs):
+    """Create a parameter declaration of the given type."""
+    return Parameter(para_id='p', type_id=type_id, name='P', index=0, **kwargs)
+
+
+def test_in_range():
+    """Test range constraints in interval notation."""
+    assert in_range(0, '[0,1]')
+    assert in_range(1, '[0,1]')
+    assert not in_range(0, '(0,1]')
+    assert not in_range(1, '[0,1)')
+    assert in_range(0.5, '(0,1)')
+    assert not in_range(-1, '[0,)')
+    assert in_range(10 ** 9, '[0,)')
+    assert in_range(-10 ** 9, '(,0]')
+    assert in_range(5, '[ 1 , 10 ]')
+    for constraint in ['0,1', '[0,1', '[0;1]', '[0,1,2]', '[a,1]']:
+        with pytest.raises(ValueError):
+            in_range(0, constraint)
+
+
+def test_to_argument():
+    """Test validating and converting argument values."""
+    para = parameter(PARA_INT, constraint='[1,10]')
+    assert para.to_argument('5') == 5
+    assert isinstance(parameter(PARA_FLOAT).to_argument('1'), float)
+    para = parameter(PARA_BOOL)
+    assert para.to_argument('True') is True
+    assert para.to_argument('0') is False
+    assert para.to_argument(None) is False
+    values = [{'value': 'a'}, {'value': 'b'}]
+    assert parameter(PARA_ENUM, values=values).to_argument('b') == 'b'
+    assert parameter(PARA_STRING).to_argument(12) == '12'
+    assert parameter(PARA_FILE).to_argument('F1') == 'F1'
+    invalid = [
+        (parameter(PARA_INT, constraint='[1,10]'), '11'),
+        (parameter(PARA_INT), '1.5'),
+        (parameter(PARA_FLOAT), None),
+        (parameter(PARA_BOOL), 'yes'),
+        (parameter(PARA_ENUM, values=values), 'c'),
+        (parameter(PARA_STRING, is_required=True), None)
+    ]
+    for para, value in invalid:
+        with pytest.raises(InvalidArgumentError):
+            para.to_argument(value)
+    # Argument errors are value errors.
+    assert issubclass(InvalidArgumentError, ValueError)
+
+
+def test_parameter_index():
+    """Test creating the parameter index from serialized declarations."""
+    parameters = ParameterIndex.from_dict([
+        {'id': 'b', 'type': PARA_INT, 'index': 1, 'defaultValue': 1},
+        {'id': 'a', 'type': PARA_STRING, 'index': 0}
+    ])
+    assert [p.para_id for p in parameters.sorted()] == ['a', 'b']
+    assert parameters['a'].is_required
+    assert not parameters['b'].is_required
+    assert parameters['b'].prompt() == "b (int) [default '1'] $> "
+    with pytest.raises(ValueError):
+        ParameterIndex.from_dict([{'id': 'a'}])
+    with pytest.raises(ValueError):
+        ParameterIndex.from_dict([
+            {'id': 'a', 'type': PARA_INT},
+            {'id': 'a', 'type': PARA_STRING}
+        ])
+
+
+def test_run_arguments():
+    """Test serializing run arguments."""
+    assert ARG('a', 1) == {'id': 'a', 'value': 1}
+    value = FILE('F1', target='data/x.csv')
+    assert value == {
+        'type': '$file',
+        'value': {'fileId': 'F1', 'targetPath': 'data/x.csv'}
+    }
+    assert GET_FILE(value) == ('F1', 'data/x.csv')
+    assert GET_FILE(FILE('F1')) == ('F1', None)
+    with pytest.raises(ValueError):
+        GET_FILE({'value': {}})
@@ -0,0 +1,128 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for parallel downloads of run and benchmark resource files."""
+
+import io
+import json
+import os
+import pytest
+import requests
+
+from robclient.api import Client
+from robclient.cli.base import invoke
+from robclient.protocol import HEADER_TOKEN
+from robclient.route import UrlFactory
+from robclient.session import ClientSession
+
+
+"""Resource files of the test run and benchmark."""
+RESOURCES = [
+    {'id': 'F1', 'name': 'results/a.json'},
+    {'id': 'F2', 'name': 'results/b.json'},
+    {'id': 'F3', 'name': 'plot.png'}
+]
+
+
+class FakeServer(object):
+    """Send function that serves the run and benchmark handles and the
+    content of their resource files. Requests for unknown Urls fail with 404
+    Not Found.
+    """
+    def __init__(self, urls):
+        self.routes = {
+            urls.get_run('R1'): json.dumps({'resources': RESOURCES}),
+            urls.get_benchmark('B1'): json.dumps({
+                'postproc': {'resources': RESOURCES}
+            })
+        }
+        for res in RESOURCES:
+            content = 'content of {}'.format(res['id'])
+            self.routes[urls.download_run_file('R1', res['id'])] = content
+            url = urls.download_benchmark_file('B1', res['id'])
+            self.routes[url] = content
+
+    def __call__(self, method, url, **kwargs):
+        r = requests.Response()
+        r.url = url
+        body = self.routes.get(url)
+        r.status_code = 200 if body is not None else 404
+        r._content = body.encode('utf-8') if body is not None else b''
+        r.headers['Content-Length'] = str(len(r._content))
+        r.raw = io.BytesIO(r._content)
+        return r
+
+
+@pytest.fixture
+def client():
+    """API client for the fake server."""
+    urls = UrlFactory(base_url='http://api')
+    session = ClientSession(headers={HEADER_TOKEN: 'T0'}, retries=0)
+    session.session.request = FakeServer(urls)
+    return Client(urls=urls, session=session)
+
+
+def read_file(filename):
+    """Read the content of a downloaded file."""
+    with open(filename, 'r') as f:
+        return f.read()
+
+
+def test_download_run_resources(client, tmpdir):
+    """Test downloading all resource files of a run in parallel."""
+    targetdir = str(tmpdir)
+    progress = list()
+    files = client.download_run_resources(
+        'R1',
+        targetdir,
+        jobs=3,
+        callback=lambda f, count, total: progress.append((count, total))
+    )
+    assert sorted(files) == sorted([
+        os.path.join(targetdir, 'results', 'a.json'),
+        os.path.join(targetdir, 'results', 'b.json'),
+        os.path.join(targetdir, 'plot.png')
+    ])
+    assert read_file(os.path.join(targetdir, 'plot.png')) == 'content of F3'
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    assert client.session.pool_size >= 3
+    # Download selected files of a benchmark.
+    targetdir = os.path.join(str(tmpdir), 'benchmark')
+    files = client.download_benchmark_resources(
+        'B1',
+        targetdir,
+        resource_ids=['F2']
+    )
+    assert files == [os.path.join(targetdir, 'results', 'b.json')]
+    assert read_file(files[0]) == 'content of F2'
+    with pytest.raises(ValueError):
+        client.download_benchmark_resources('B1', targetdir, ['F4'])
+
+
+def test_download_resources_command(client, tmpdir, capsys):
+    """Test the --resources option of the download commands."""
+    targetdir = str(tmpdir)
+    argv = ['runs', 'download', '-r', 'R1', '--resources', 'F1,F3']
+    assert invoke(argv + ['-d', targetdir, '-j', '2'], client) == 0
+    out = capsys.readouterr().out
+    assert 'Downloaded 2 file(s).' in out
+    assert read_file(os.path.join(targetdir, 'results', 'a.json')) == (
+        'content of F1'
+    )
+    assert not os.path.exists(os.path.join(targetdir, 'results', 'b.json'))
+    argv = ['benchmarks', 'download', '-b', 'B1', '--resources', 'all']
+    assert invoke(argv + ['-d', targetdir], client) == 0
+    assert 'Downloaded 3 file(s).' in capsys.readouterr().out
+    assert read_file(os.path.join(targetdir, 'results', 'b.json')) == (
+        'content of F2'
+    )
+    # Unknown resources and invalid option combinations are errors.
+    argv = ['runs', 'download', '-r', 'R1', '--resources', 'F4']
+    assert invoke(argv, client) == 1
+    argv = ['runs', 'download', '-r', 'R1', '--resources', 'all', '-a']
+    assert invoke(argv, client) == 1
@@ -0,0 +1,215 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the retry policy, the circuit breaker and idempotency keys
+for requests that start runs.
+"""
+
+import io
+import json
+import pytest
+import requests
+
+from robclient.api import Client
+from robclient.retry import HEADER_IDEMPOTENCY_KEY
+from robclient.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from robclient.retry import retry_after
+from robclient.route import UrlFactory
+from robclient.session import ClientSession
+
+
+class FakeServer(object):
+    """Send function that returns responses with the given status codes in
+    order and records all requests.
+    """
+    def __init__(self, status_codes, headers=None, body=None):
+        self.status_codes = list(status_codes)
+        self.headers = headers if headers is not None else dict()
+        self.body = body if body is not None else dict()
+        self.requests = list()
+
+    def __call__(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        status = self.status_codes.pop(0)
+        if status is None:
+            raise requests.ConnectionError('connection refused')
+        return response(status, self.headers, self.body, url)
+
+
+def response(status_code, headers=None, body=None, url=None):
+    """Create a response object with the given status code, headers and JSON
+    body.
+    """
+    r = requests.Response()
+    r.status_code = status_code
+    r.url = url
+    if headers is not None:
+        r.headers.update(headers)
+    r._content = json.dumps(body if body is not None else dict()).encode()
+    r.raw = io.BytesIO(r._content)
+    return r
+
+
+def idempotency_keys(server):
+    """Get the idempotency keys of all requests that were sent to a fake
+    server.
+    """
+    return [r[2]['headers'][HEADER_IDEMPOTENCY_KEY] for r in server.requests]
+
+
+def test_circuit_breaker():
+    """Test opening and closing the circuit after consecutive failures."""
+    breaker = CircuitBreaker(threshold=2, timeout=0)
+    breaker.allow()
+    breaker.failure()
+    breaker.allow()
+    breaker.failure()
+    # After the timeout a single request is allowed to probe the server.
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.success()
+    breaker.allow()
+    breaker.allow()
+    # The circuit stays open until the timeout has passed.
+    breaker = CircuitBreaker(threshold=1, timeout=60)
+    breaker.failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_retry_connection_errors():
+    """Test repeating requests that fail with a connection error."""
+    delays = list()
+    policy = RetryPolicy(retries=2, sleep=delays.append)
+    server = FakeServer([None, None, 200])
+    r = policy.send(server, 'GET', 'http://api/runs')
+    assert r.status_code == 200
+    assert len(server.requests) == 3
+    assert len(delays) == 2
+    # The error is raised after the last retry.
+    server = FakeServer([None, None, None])
+    with pytest.raises(requests.ConnectionError):
+        policy.send(server, 'GET', 'http://api/runs')
+    assert len(server.requests) == 3
+
+
+def test_retry_non_idempotent_requests():
+    """Test that POST requests are only repeated if they carry an idempotency
+    key.
+    """
+    policy = RetryPolicy(retries=3, sleep=lambda d: None)
+    server = FakeServer([502, 200])
+    r = policy.send(server, 'POST', 'http://api/runs')
+    assert r.status_code == 502
+    assert len(server.requests) == 1
+    server = FakeServer([None])
+    with pytest.raises(requests.ConnectionError):
+        policy.send(server, 'POST', 'http://api/runs')
+    server = FakeServer([502, 200])
+    headers = {HEADER_IDEMPOTENCY_KEY: 'abc'}
+    r = policy.send(server, 'POST', 'http://api/runs', headers=headers)
+    assert r.status_code == 200
+    assert len(server.requests) == 2
+
+
+def test_retry_status_codes():
+    """Test repeating requests for transient server errors."""
+    delays = list()
+    policy = RetryPolicy(retries=3, sleep=delays.append)
+    server = FakeServer([502, 503, 429, 200])
+    r = policy.send(server, 'GET', 'http://api/runs')
+    assert r.status_code == 200
+    assert len(delays) == 3
+    # Client errors are not repeated.
+    server = FakeServer([404, 200])
+    r = policy.send(server, 'GET', 'http://api/runs')
+    assert r.status_code == 404
+    assert len(server.requests) == 1
+    # The response for the last attempt is returned.
+    server = FakeServer([503, 503, 503, 503, 200])
+    r = policy.send(server, 'GET', 'http://api/runs')
+    assert r.status_code == 503
+    assert len(server.requests) == 4
+
+
+def test_retry_after_header():
+    """Test the delay that is requested by the server."""
+    delays = list()
+    policy = RetryPolicy(retries=1, maximum=10, sleep=delays.append)
+    server = FakeServer([503, 200], headers={'Retry-After': '5'})
+    assert policy.send(server, 'GET', 'http://api/runs').status_code == 200
+    assert delays == [5.0]
+    # Requests are not repeated if the delay exceeds the maximum.
+    server = FakeServer([503, 200], headers={'Retry-After': '60'})
+    assert policy.send(server, 'GET', 'http://api/runs').status_code == 503
+    assert len(server.requests) == 1
+    # Parse delays from dates and ignore invalid values.
+    date = 'Wed, 21 Oct 2015 07:28:00 GMT'
+    assert retry_after(response(503, {'Retry-After': date})) == 0.0
+    assert retry_after(response(503, {'Retry-After': 'soon'})) is None
+    assert retry_after(response(503)) is None
+
+
+def test_start_run_idempotency_key():
+    """Test that repeated requests to start a run carry the same idempotency
+    key.
+    """
+    session = ClientSession(retries=2)
+    session.retry.sleep = lambda d: None
+    server = FakeServer([502, 201], body={'id': 'R1'})
+    session.session.request = server
+    client = Client(urls=UrlFactory(base_url='http://api'), session=session)
+    assert client.start_run('S1', list()) == {'id': 'R1'}
+    keys = idempotency_keys(server)
+    assert len(keys) == 2
+    assert keys[0] == keys[1]
+    # Each run gets a new key unless the key is given by the caller.
+    server = FakeServer([201, 201], body={'id': 'R2'})
+    session.session.request = server
+    client.start_run('S1', list())
+    client.start_run('S1', list(), key='entry-1')
+    keys = idempotency_keys(server)
+    assert keys[0] not in [keys[1], 'entry-1']
+    assert keys[1] == 'entry-1'
+
+
+def test_circuit_breaker_probe_errors():
+    """Test that a probe request that fails with an unexpected error does not
+    keep the circuit open.
+    """
+    breaker = CircuitBreaker(threshold=1, timeout=0)
+    policy = RetryPolicy(retries=0, breaker=breaker, sleep=lambda d: None)
+    with pytest.raises(requests.ConnectionError):
+        policy.send(FakeServer([None]), 'GET', 'http://api/runs')
+
+    def send(method, url, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError('broken')
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        policy.send(send, 'GET', 'http://api/runs')
+    # The next request is allowed to probe the server.
+    r = policy.send(FakeServer([200]), 'GET', 'http://api/runs')
+    assert r.status_code == 200
+    assert policy.send(FakeServer([200]), 'GET', 'http://api/runs')
+
+
+def test_session_timeout():
+    """Test the default timeout for requests of a client session."""
+    session = ClientSession(retries=0)
+    server = FakeServer([200, 200])
+    session.session.request = server
+    session.get('http://api/runs')
+    session.get('http://api/runs', timeout=5)
+    assert server.requests[0][2]['timeout'] == (10.0, 120.0)
+    assert server.requests[1][2]['timeout'] == 5
+    session = ClientSession(retries=1, timeout=None)
+    server = FakeServer([200])
+    session.session.request = server
+    session.get('http://api/runs')
+    assert server.requests[0][2]['timeout'] is None
@@ -0,0 +1,163 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the local run queue and scheduler."""
+
+import os
+import requests
+
+from robclient.protocol import STATE_PENDING, STATE_SUCCESS
+from robclient.scheduler import ENTRY_FAILED, ENTRY_FINISHED, ENTRY_QUEUED
+from robclient.scheduler import MAX_ATTEMPTS, RunQueue, process_queue
+
+
+class FakeClient(object):
+    """API client that runs each started run for a fixed number of polls.
+    New runs are rejected with 429 Too Many Requests while the number of
+    active runs on the backend is at the given capacity. Runs with an
+    identifier in the missing list cannot be found. The given number of
+    requests to start a run fail with a server error.
+    """
+    def __init__(self, polls=2, capacity=None, missing=None, errors=0):
+        self.polls = polls
+        self.capacity = capacity
+        self.missing = missing if missing is not None else list()
+        self.errors = errors
+        self.runs = dict()
+        self.keys = list()
+        self.max_active = 0
+
+    def active(self):
+        return len([r for r in self.runs.values() if r['polls'] > 0])
+
+    def get_run(self, run_id):
+        if run_id in self.missing:
+            raise http_error(404)
+        run = self.runs[run_id]
+        run['polls'] -= 1
+        state = STATE_PENDING if run['polls'] > 0 else STATE_SUCCESS
+        return {'id': run_id, 'state': state}
+
+    def start_run(self, submission_id, arguments, key=None):
+        if self.errors > 0:
+            self.errors -= 1
+            raise http_error(502)
+        if self.capacity is not None and self.active() >= self.capacity:
+            raise http_error(429)
+        self.keys.append(key)
+        run_id = 'R{}'.format(len(self.runs))
+        self.runs[run_id] = {'submission': submission_id, 'polls': self.polls}
+        self.max_active = max(self.max_active, self.active())
+        return {'id': run_id, 'state': STATE_PENDING}
+
+
+def http_error(status_code):
+    """Create an HTTP error for a response with the given status code."""
+    r = requests.Response()
+    r.status_code = status_code
+    return requests.HTTPError('{} error'.format(status_code), response=r)
+
+
+def run(client, queue, **kwargs):
+    """Process the queue without waiting between iterations."""
+    process_queue(client, queue, interval=0, max_interval=0, **kwargs)
+
+
+def test_process_queue(tmpdir):
+    """Test starting all queued runs with a limit per submission."""
+    filename = os.path.join(str(tmpdir), 'queue.json')
+    queue = RunQueue(filename)
+    for i in range(5):
+        queue.add('S1', [{'name': 'x', 'value': i}])
+    queue.add('S2', list())
+    queue.save()
+    client = FakeClient()
+    events = list()
+    run(client, queue, limit=2, callback=events.append)
+    assert len(client.runs) == 6
+    assert client.max_active == 3
+    # Each run is started once with the entry identifier as idempotency key.
+    assert sorted(client.keys) == sorted(e['id'] for e in queue.entries)
+    states = [e['state'] for e in RunQueue(filename).entries]
+    assert states == [ENTRY_FINISHED] * 6
+    # The callback is called when a run is started and when it finishes.
+    assert len(events) == 12
+    assert queue.clear() == 6
+    assert queue.entries == list()
+
+
+def test_process_queue_backpressure(tmpdir):
+    """Test backing off while the backend does not accept new runs."""
+    queue = RunQueue(os.path.join(str(tmpdir), 'queue.json'))
+    for i in range(4):
+        queue.add('S1', list())
+    queue.save()
+    client = FakeClient(capacity=1)
+    run(client, queue, limit=4)
+    assert len(client.runs) == 4
+    assert client.max_active == 1
+    assert [e['state'] for e in queue.entries] == [ENTRY_FINISHED] * 4
+
+
+def test_process_queue_missing_runs(tmpdir):
+    """Test failing entries for runs that no longer exist."""
+    queue = RunQueue(os.path.join(str(tmpdir), 'queue.json'))
+    queue.add('S1', list())
+    queue.add('S1', list())
+    queue.save()
+    run(FakeClient(missing=['R0']), queue)
+    assert [e['state'] for e in queue.entries] == [
+        ENTRY_FAILED,
+        ENTRY_FINISHED
+    ]
+    assert '404' in queue.entries[0]['error']
+
+
+def test_process_queue_server_errors(tmpdir):
+    """Test retrying to start runs after server errors."""
+    filename = os.path.join(str(tmpdir), 'queue.json')
+    queue = RunQueue(filename)
+    queue.add('S1', list())
+    queue.save()
+    client = FakeClient(errors=MAX_ATTEMPTS - 1)
+    run(client, queue)
+    assert [e['state'] for e in queue.entries] == [ENTRY_FINISHED]
+    assert queue.entries[0]['attempts'] == MAX_ATTEMPTS - 1
+    # The entry fails if the run cannot be started after the maximum number
+    # of attempts.
+    queue.add('S1', list())
+    queue.save()
+    client = FakeClient(errors=MAX_ATTEMPTS)
+    run(client, queue)
+    assert client.runs == dict()
+    entries = RunQueue(filename).entries
+    assert [e['state'] for e in entries] == [ENTRY_FINISHED, ENTRY_FAILED]
+    assert '502' in entries[1]['error']
+
+
+def test_locked_queue(tmpdir):
+    """Test that changes by another process are reloaded when the queue is
+    locked.
+    """
+    filename = os.path.join(str(tmpdir), 'queue.json')
+    queue = RunQueue(filename)
+    assert queue.entries == list()
+    other = RunQueue(filename)
+    with other.locked():
+        other.add('S1', list())
+        other.add('S2', list())
+        other.save()
+    with queue.locked():
+        assert [e['submission'] for e in queue.entries] == ['S1', 'S2']
+        assert [e['state'] for e in queue.queued()] == [ENTRY_QUEUED] * 2
+        queue.entries[0]['state'] = ENTRY_FAILED
+        queue.save()
+    with other.locked():
+        assert other.clear() == 1
+        other.save()
+    assert [e['submission'] for e in RunQueue(filename).entries] == ['S2']
@@ -0,0 +1,91 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the shared HTTP session."""
+
+import pytest
+import threading
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from robclient.session import DEFAULT_POOL_SIZE, ClientSession
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Request handler that records the client port of each request and
+    responds with an empty JSON object.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.ports.append(self.client_address[1])
+        self.server.headers.append(dict(self.headers))
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Local HTTP server that runs in a background thread."""
+    httpd = HTTPServer(('127.0.0.1', 0), Handler)
+    httpd.ports = list()
+    httpd.headers = list()
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    thread.join()
+
+
+def test_connection_reuse(server):
+    """Test that consecutive requests reuse the same connection."""
+    url = 'http://127.0.0.1:{}/runs'.format(server.server_port)
+    session = ClientSession(headers={'X-Token': 'T0'}, retries=0)
+    for _ in range(5):
+        assert session.get(url).json() == dict()
+    session.close()
+    assert len(server.ports) == 5
+    assert len(set(server.ports)) == 1
+    assert all(h['X-Token'] == 'T0' for h in server.headers)
+
+
+def test_connection_close(server):
+    """Test opening a new connection for each request if connections are not
+    kept alive.
+    """
+    url = 'http://127.0.0.1:{}/runs'.format(server.server_port)
+    session = ClientSession(keep_alive=False, retries=0)
+    for _ in range(3):
+        assert session.get(url).json() == dict()
+    session.close()
+    assert len(set(server.ports)) == 3
+    assert all(h['Connection'] == 'close' for h in server.headers)
+
+
+def test_pool_size():
+    """Test that the connection pool only grows."""
+    session = ClientSession()
+    adapter = session.session.get_adapter('http://api')
+    assert session.pool_size == DEFAULT_POOL_SIZE
+    assert adapter._pool_maxsize == DEFAULT_POOL_SIZE
+    session.ensure_pool_size(DEFAULT_POOL_SIZE - 1)
+    assert session.session.get_adapter('https://api') is adapter
+    session.ensure_pool_size(DEFAULT_POOL_SIZE + 5)
+    assert session.pool_size == DEFAULT_POOL_SIZE + 5
+    for url in ['http://api', 'https://api']:
+        adapter = session.session.get_adapter(url)
+        assert adapter._pool_maxsize == DEFAULT_POOL_SIZE + 5
+    assert ClientSession(pool_size=2).pool_size == 2
@@ -0,0 +1,137 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the incremental parser for large list responses."""
+
+import io
+import json
+import pytest
+import requests
+
+from robclient.api import Client
+from robclient.cli.base import invoke
+from robclient.protocol import HEADER_TOKEN
+from robclient.route import UrlFactory
+from robclient.session import ClientSession
+from robclient.stream import ListStream
+
+import robclient.stream as stream
+
+
+"""Leaderboard document with top-level elements before and after the
+ranking.
+"""
+DOCUMENT = {
+    'schema': [{'id': 'acc', 'name': 'Accuracy', 'type': 'float'}],
+    'ranking': [
+        {'run': {'id': 'R1'}, 'results': [{'id': 'acc', 'value': 0.9}]},
+        {'run': {'id': 'R2'}, 'results': [{'id': 'acc', 'value': 1}]},
+        {'run': {'id': 'R3'}, 'results': []}
+    ],
+    'count': 3,
+    'links': [{'rel': 'self', 'href': 'http://api'}]
+}
+
+
+class TrackingReader(io.BytesIO):
+    """Binary stream that records the number of bytes that were read."""
+    def __init__(self, data):
+        super(TrackingReader, self).__init__(data)
+        self.count = 0
+
+    def read(self, size=-1):
+        buf = super(TrackingReader, self).read(size)
+        self.count += len(buf)
+        return buf
+
+
+@pytest.fixture(params=['ijson', 'json'])
+def parser(request, monkeypatch):
+    """Run tests with the incremental parser and with the fallback that
+    parses the whole document if ijson is not installed.
+    """
+    if request.param == 'ijson':
+        pytest.importorskip('ijson')
+    else:
+        monkeypatch.setattr(stream, 'ijson', None)
+    return request.param
+
+
+def document(doc):
+    """Get a binary stream for the serialized JSON document."""
+    return io.BytesIO(json.dumps(doc).encode('utf-8'))
+
+
+def test_list_stream(parser):
+    """Test iterating over list items and accessing other elements."""
+    with ListStream(document(DOCUMENT), key='ranking') as items:
+        assert items.get('schema') == DOCUMENT['schema']
+        assert list(items) == DOCUMENT['ranking']
+        assert items.get('count') == 3
+        assert items.get('links') == DOCUMENT['links']
+        assert items.get('unknown', 'x') == 'x'
+    # Access elements that follow the list before the list items.
+    items = ListStream(document(DOCUMENT), key='ranking')
+    assert items.get('links') == DOCUMENT['links']
+    assert list(items) == DOCUMENT['ranking']
+    # Number types are preserved.
+    items = ListStream(document(DOCUMENT), key='ranking')
+    values = [r['results'][0]['value'] for r in list(items)[:2]]
+    assert values == [0.9, 1]
+    assert isinstance(values[1], int)
+    # Documents without the list.
+    items = ListStream(document({'count': 0}), key='ranking')
+    assert list(items) == list()
+    assert items.get('count') == 0
+
+
+def test_list_stream_incremental():
+    """Test that list items are parsed while the document is read."""
+    pytest.importorskip('ijson')
+    doc = {'users': [{'id': str(i), 'name': 'x' * 100} for i in range(1000)]}
+    fileobj = TrackingReader(json.dumps(doc).encode('utf-8'))
+    items = iter(ListStream(fileobj, key='users'))
+    assert next(items) == {'id': '0', 'name': 'x' * 100}
+    assert fileobj.count < len(fileobj.getvalue())
+    assert len(list(items)) == 999
+
+
+def test_list_stream_invalid_document(parser):
+    """Test errors for truncated and malformed documents."""
+    data = json.dumps(DOCUMENT).encode('utf-8')
+    for buf in [data[:len(data) // 2], b'{"ranking": [1, 2,, 3]}']:
+        with pytest.raises(ValueError):
+            list(ListStream(io.BytesIO(buf), key='ranking'))
+
+
+def test_stream_runs_command(parser, monkeypatch, capsys):
+    """Test printing a streamed run listing with the --stream option."""
+    monkeypatch.setenv('ROB_SUBMISSION', 'S1')
+    body = {'runs': [
+        {'id': 'R1', 'createdAt': '2020-01-01', 'state': 'SUCCESS'},
+        {'id': 'R2', 'createdAt': '2020-01-02', 'state': 'ERROR'}
+    ]}
+    requests_sent = list()
+
+    def send(method, url, **kwargs):
+        requests_sent.append(kwargs.get('stream'))
+        r = requests.Response()
+        r.status_code = 200
+        r.url = url
+        r.raw = io.BytesIO(json.dumps(body).encode('utf-8'))
+        return r
+
+    session = ClientSession(headers={HEADER_TOKEN: 'T0'}, retries=0)
+    session.session.request = send
+    client = Client(urls=UrlFactory(base_url='http://api'), session=session)
+    assert invoke(['--stream', 'runs', 'list'], client) == 0
+    assert requests_sent == [True]
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ['ID', '|', 'Submitted', 'at', '|', 'State']
+    assert [line.split()[0] for line in lines[2:]] == ['R1', 'R2']
+    assert lines[3].split()[-1] == 'ERROR'
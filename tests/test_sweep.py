@@ -0,0 +1,220 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for launching runs from a parameter sweep file."""
+
+import json
+import os
+import pytest
+import requests
+import threading
+
+from robclient.cli.base import invoke
+from robclient.protocol import ParameterIndex
+from robclient.sweep import RateLimiter, expand_grid, launch_runs
+from robclient.sweep import read_sweep, validate_arguments
+
+import robclient.sweep as sweep
+
+
+"""Parameter declarations of the test submission."""
+PARAMETERS = [
+    {'id': 'epochs', 'type': 'int', 'range': '[1,100]'},
+    {'id': 'rate', 'type': 'float', 'defaultValue': 0.1},
+    {'id': 'data', 'type': 'file', 'isRequired': False, 'target': 'data.csv'}
+]
+
+
+class FakeClock(object):
+    """Replacement for the time module that records delays instead of
+    waiting. The clock is advanced by the delay if the advance flag is True.
+    """
+    def __init__(self, advance=True):
+        self.now = 100.0
+        self.advance = advance
+        self.sleeps = list()
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        if self.advance:
+            self.now += delay
+
+
+class FakeSession(object):
+    """Session that only records the requested pool size."""
+    def __init__(self):
+        self.pool_size = 0
+
+    def ensure_pool_size(self, pool_size):
+        self.pool_size = max(self.pool_size, pool_size)
+
+
+class FakeClient(object):
+    """API client that starts runs for a submission with the test parameters.
+    Runs with more than 50 epochs are rejected by the server.
+    """
+    def __init__(self):
+        self.session = FakeSession()
+        self.started = list()
+        self.lock = threading.Lock()
+
+    def get_submission(self, submission_id):
+        return {'id': submission_id, 'parameters': PARAMETERS, 'files': []}
+
+    def start_run(self, submission_id, arguments):
+        epochs = [a['value'] for a in arguments if a['id'] == 'epochs'][0]
+        if epochs > 50:
+            r = requests.Response()
+            r.status_code = 400
+            raise requests.HTTPError('400 Bad Request', response=r)
+        with self.lock:
+            run_id = 'R{}'.format(len(self.started))
+            self.started.append(arguments)
+        return {'id': run_id, 'state': 'PENDING'}
+
+
+def write_file(directory, name, content):
+    """Write a sweep file and return the file path."""
+    filename = os.path.join(directory, name)
+    with open(filename, 'w') as f:
+        f.write(content)
+    return filename
+
+
+def test_read_sweep(tmpdir):
+    """Test reading argument sets from JSON, YAML and CSV files."""
+    directory = str(tmpdir)
+    doc = {'grid': {'epochs': [1, 2], 'rate': 0.5}, 'runs': [{'epochs': 3}]}
+    filename = write_file(directory, 'sweep.json', json.dumps(doc))
+    assert read_sweep(filename) == [
+        {'epochs': 1, 'rate': 0.5},
+        {'epochs': 2, 'rate': 0.5},
+        {'epochs': 3}
+    ]
+    filename = write_file(directory, 'sweep.yaml', '- epochs: 1\n- rate: 2\n')
+    assert read_sweep(filename) == [{'epochs': 1}, {'rate': 2}]
+    filename = write_file(directory, 'sweep.csv', 'epochs,rate\n1,\n2,0.5\n')
+    assert read_sweep(filename) == [
+        {'epochs': '1', 'rate': ''},
+        {'epochs': '2', 'rate': '0.5'}
+    ]
+    for content in ['1', '[1, 2]']:
+        with pytest.raises(ValueError):
+            read_sweep(write_file(directory, 'invalid.json', content))
+    assert expand_grid({'a': [1, 2], 'b': [3, 4]}) == [
+        {'a': 1, 'b': 3},
+        {'a': 1, 'b': 4},
+        {'a': 2, 'b': 3},
+        {'a': 2, 'b': 4}
+    ]
+
+
+def test_validate_arguments():
+    """Test validating argument sets against the submission parameters."""
+    parameters = ParameterIndex.from_dict(PARAMETERS)
+    argsets = [{'epochs': '5', 'rate': ''}, {'epochs': 1, 'data': 'F1'}]
+    arguments = validate_arguments(parameters, argsets, files=['F1'])
+    assert arguments == [
+        [{'id': 'epochs', 'value': 5}],
+        [
+            {'id': 'epochs', 'value': 1},
+            {
+                'id': 'data',
+                'value': {
+                    'type': '$file',
+                    'value': {'fileId': 'F1', 'targetPath': 'data.csv'}
+                }
+            }
+        ]
+    ]
+    invalid = [
+        {'rate': 1},
+        {'epochs': 0},
+        {'epochs': 'x'},
+        {'epochs': 1, 'unknown': 1},
+        {'epochs': 1, 'data': 'F2'}
+    ]
+    for args in invalid:
+        with pytest.raises(ValueError):
+            validate_arguments(parameters, [args], files=['F1'])
+
+
+def test_rate_limiter(monkeypatch):
+    """Test limiting the number of calls per second."""
+    clock = FakeClock()
+    monkeypatch.setattr(sweep, 'time', clock)
+    limiter = RateLimiter(rate=4)
+    for _ in range(5):
+        limiter.wait()
+    assert clock.sleeps == [0.25] * 4
+    # Calls are not delayed after a pause.
+    clock.now += 10
+    limiter.wait()
+    assert len(clock.sleeps) == 4
+    # There is no limit without a rate.
+    limiter = RateLimiter()
+    for _ in range(5):
+        limiter.wait()
+    assert len(clock.sleeps) == 4
+
+
+def test_launch_runs(monkeypatch):
+    """Test starting runs in parallel with a rate limit."""
+    # The clock stands still so that the delays do not depend on the order
+    # in which the workers sleep.
+    clock = FakeClock(advance=False)
+    monkeypatch.setattr(sweep, 'time', clock)
+    client = FakeClient()
+    arguments = [[{'id': 'epochs', 'value': i * 10}] for i in range(8)]
+    progress = list()
+    runs = launch_runs(
+        client,
+        'S1',
+        arguments,
+        jobs=3,
+        rate=2,
+        callback=lambda entry, count, total: progress.append((count, total))
+    )
+    # Results are in the order of the argument lists.
+    assert [r['arguments'] for r in runs] == arguments
+    assert len([r for r in runs if 'runId' in r]) == 6
+    assert ['error' in r for r in runs[-2:]] == [True, True]
+    assert '400 Bad Request' in runs[-1]['error']
+    assert sorted(progress) == [(i, 8) for i in range(1, 9)]
+    assert client.session.pool_size == 3
+    # All but the first request wait for their slot.
+    assert sorted(clock.sleeps) == [0.5 * i for i in range(1, 8)]
+
+
+def test_sweep_command_manifest(tmpdir, capsys):
+    """Test writing the manifest for a sweep with failed runs."""
+    directory = str(tmpdir)
+    doc = {'grid': {'epochs': [10, 20, 60]}}
+    filename = write_file(directory, 'sweep.json', json.dumps(doc))
+    manifest = os.path.join(directory, 'manifest.json')
+    client = FakeClient()
+    argv = ['runs', 'sweep', '-s', 'S1', '-i', filename, '-m', manifest]
+    assert invoke(argv, client) == 1
+    assert 'Started 2 run(s), 1 error(s).' in capsys.readouterr().out
+    with open(manifest, 'r') as f:
+        doc = json.load(f)
+    assert doc['submission'] == 'S1'
+    epochs = [r['arguments'][0]['value'] for r in doc['runs']]
+    assert epochs == [10, 20, 60]
+    assert sorted(r.get('runId') for r in doc['runs'][:2]) == ['R0', 'R1']
+    assert 'error' in doc['runs'][2]
+    assert not os.path.exists(manifest + '.tmp')
+    # Runs are not started in a dry run.
+    client = FakeClient()
+    argv = ['runs', 'sweep', '-s', 'S1', '-i', filename, '--dry-run']
+    assert invoke(argv, client) == 0
+    assert client.started == list()
+    assert '3 valid argument set(s).' in capsys.readouterr().out
@@ -0,0 +1,149 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for the synchronization of local files with the uploaded files
+of a submission.
+"""
+
+import os
+
+from robclient.sync import INDEX_FILE, FileIndex, file_hash, sync_plan
+
+
+def write_file(directory, name, content):
+    """Write a file in the given directory and return the pair of file path
+    and relative path.
+    """
+    filename = os.path.join(directory, name)
+    with open(filename, 'w') as f:
+        f.write(content)
+    return filename, name
+
+
+def test_file_index(tmpdir):
+    """Test caching file hashes and uploads in the index file."""
+    directory = str(tmpdir)
+    filename, relpath = write_file(directory, 'a.txt', 'A')
+    index = FileIndex(directory)
+    checksum = index.hash(filename, relpath)
+    assert checksum == file_hash(filename)
+    index.set_upload('S1', relpath, 'F1', checksum)
+    index.save()
+    assert os.path.isfile(os.path.join(directory, INDEX_FILE))
+    index = FileIndex(directory)
+    assert index.files[relpath]['sha256'] == checksum
+    assert index.upload('S1', relpath) == {'fileId': 'F1', 'sha256': checksum}
+    assert index.upload('S2', relpath) is None
+    # The cached hash is not used after the file was modified.
+    write_file(directory, 'a.txt', 'AB')
+    assert index.hash(filename, relpath) == file_hash(filename)
+    assert index.hash(filename, relpath) != checksum
+    # Invalid index files are ignored.
+    with open(os.path.join(directory, INDEX_FILE), 'w') as f:
+        f.write('{')
+    assert FileIndex(directory).files == dict()
+
+
+def test_sync_new_and_unchanged_files(tmpdir):
+    """Test uploading new files and skipping unchanged files."""
+    directory = str(tmpdir)
+    files = [
+        write_file(directory, 'a.txt', 'A'),
+        write_file(directory, 'b.txt', 'BB')
+    ]
+    index = FileIndex(directory)
+    remote = [{'id': 'F1', 'name': 'a.txt', 'size': 1}]
+    plan = sync_plan('S1', files, remote, index)
+    assert plan.skipped == ['a.txt']
+    assert [relpath for _, relpath, _ in plan.uploads] == ['b.txt']
+    assert plan.uploads[0][2] == file_hash(files[1][0])
+    assert plan.deletes == []
+
+
+def test_sync_modified_files(tmpdir):
+    """Test replacing uploaded files that were modified locally."""
+    directory = str(tmpdir)
+    files = [write_file(directory, 'a.txt', 'A')]
+    index = FileIndex(directory)
+    # Different size.
+    remote = [{'id': 'F1', 'name': 'a.txt', 'size': 2}]
+    plan = sync_plan('S1', files, remote, index, delete=True)
+    assert [relpath for _, relpath, _ in plan.uploads] == ['a.txt']
+    assert plan.deletes == remote
+    # Same size but different hash from the API.
+    remote = [{'id': 'F1', 'name': 'a.txt', 'size': 1, 'sha256': 'x'}]
+    plan = sync_plan('S1', files, remote, index, delete=True)
+    assert len(plan.uploads) == 1
+    assert plan.deletes == remote
+    # Same size but different hash for the recorded upload.
+    index.set_upload('S1', 'a.txt', 'F1', 'x')
+    remote = [{'id': 'F1', 'name': 'a.txt', 'size': 1}]
+    plan = sync_plan('S1', files, remote, index, delete=True)
+    assert len(plan.uploads) == 1
+    assert plan.deletes == remote
+    # The recorded upload matches the local file.
+    index.set_upload('S1', 'a.txt', 'F1', file_hash(files[0][0]))
+    plan = sync_plan('S1', files, remote, index, delete=True)
+    assert plan.skipped == ['a.txt']
+    assert plan.uploads == []
+
+
+def test_sync_modified_files_without_delete(tmpdir):
+    """Test that previous uploads of modified files are kept if the delete
+    flag is not set.
+    """
+    directory = str(tmpdir)
+    files = [
+        write_file(directory, 'a.txt', 'A'),
+        write_file(directory, 'b.txt', 'B')
+    ]
+    index = FileIndex(directory)
+    remote = [
+        {'id': 'F1', 'name': 'a.txt', 'size': 2},
+        {'id': 'F2', 'name': 'b.txt', 'size': 1, 'sha256': 'x'},
+        {'id': 'F3', 'name': 'c.txt', 'size': 1}
+    ]
+    plan = sync_plan('S1', files, remote, index)
+    assert [relpath for _, relpath, _ in plan.uploads] == ['a.txt', 'b.txt']
+    assert plan.deletes == []
+    assert plan.skipped == []
+
+
+def test_sync_delete_files(tmpdir):
+    """Test deleting uploaded files that do not exist locally and duplicate
+    uploads of unchanged files.
+    """
+    directory = str(tmpdir)
+    files = [write_file(directory, 'a.txt', 'A')]
+    index = FileIndex(directory)
+    remote = [
+        {'id': 'F1', 'name': 'a.txt', 'size': 1},
+        {'id': 'F2', 'name': 'a.txt', 'size': 1},
+        {'id': 'F3', 'name': 'c.txt', 'size': 3},
+        {'id': 'F4', 'name': 'b.txt', 'size': 3}
+    ]
+    plan = sync_plan('S1', files, remote, index)
+    assert plan.skipped == ['a.txt']
+    assert plan.deletes == []
+    plan = sync_plan('S1', files, remote, index, delete=True)
+    assert plan.skipped == ['a.txt']
+    assert [fh['id'] for fh in plan.deletes] == ['F2', 'F4', 'F3']
+
+
+def test_sync_retain_index(tmpdir):
+    """Test removing hashes of deleted local files from the index."""
+    directory = str(tmpdir)
+    files = [
+        write_file(directory, 'a.txt', 'A'),
+        write_file(directory, 'b.txt', 'B')
+    ]
+    index = FileIndex(directory)
+    sync_plan('S1', files, list(), index)
+    assert sorted(index.files) == ['a.txt', 'b.txt']
+    sync_plan('S1', files[:1], list(), index)
+    assert sorted(index.files) == ['a.txt']
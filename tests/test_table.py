@@ -0,0 +1,55 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for writing result tables."""
+
+import io
+
+from robclient.protocol import PARA_INT, PARA_STRING
+from robclient.table import TableWriter
+
+
+def test_table_writer(capsys):
+    """Test writing a buffered table to standard output."""
+    with TableWriter(['Name', 'Count'], [PARA_STRING, PARA_INT]) as table:
+        table.add(['alice', 1])
+        table.add(['bob', None])
+        table.add(['carol', 100])
+    assert capsys.readouterr().out.splitlines() == [
+        'Name  | Count',
+        '------|------',
+        'alice |     1',
+        'bob   |      ',
+        'carol |   100'
+    ]
+
+
+def test_streamed_table_writer():
+    """Test writing rows after the column widths were determined from the
+    first rows.
+    """
+    sink = io.StringIO()
+    table = TableWriter(
+        ['A', 'B'],
+        [PARA_STRING, PARA_STRING],
+        sink=sink,
+        sample_size=2
+    )
+    table.add(['x', 'y'])
+    assert sink.getvalue() == ''
+    table.add(['xx', 'y'])
+    table.add(['xxxx', 'yy'])
+    assert sink.getvalue().splitlines() == [
+        'A  | B',
+        '---|--',
+        'x  | y',
+        'xx | y',
+        'xxxx | yy'
+    ]
+    table.close()
+    assert len(sink.getvalue().splitlines()) == 5
@@ -0,0 +1,190 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for streaming file uploads."""
+
+import email
+import email.policy
+import io
+import json
+import os
+import requests
+import threading
+
+from robclient.api import Client
+from robclient.cli.base import invoke
+from robclient.protocol import HEADER_TOKEN
+from robclient.route import UrlFactory
+from robclient.session import ClientSession
+from robclient.upload import MultipartFile, list_files
+
+
+class FakeServer(object):
+    """Send function that accepts file uploads. The multipart request body is
+    parsed and the uploaded files are kept by their name.
+    """
+    def __init__(self):
+        self.files = dict()
+        self.lock = threading.Lock()
+
+    def __call__(self, method, url, data=None, headers=None, **kwargs):
+        header = 'Content-Type: {}\r\n\r\n'.format(headers['Content-Type'])
+        message = email.message_from_bytes(
+            header.encode('utf-8') + b''.join(data),
+            policy=email.policy.HTTP
+        )
+        part = next(message.iter_parts())
+        content = part.get_content()
+        with self.lock:
+            file_id = 'F{}'.format(len(self.files))
+            self.files[part.get_filename()] = content
+        name = part.get_filename()
+        body = {'id': file_id, 'name': name, 'size': len(content)}
+        r = requests.Response()
+        r.status_code = 201
+        r.url = url
+        r._content = json.dumps(body).encode('utf-8')
+        r.raw = io.BytesIO(r._content)
+        return r
+
+
+def create_client():
+    """Create an API client for a fake server that accepts uploads."""
+    server = FakeServer()
+    session = ClientSession(headers={HEADER_TOKEN: 'T0'}, retries=0)
+    session.session.request = server
+    client = Client(urls=UrlFactory(base_url='http://api'), session=session)
+    return client, server
+
+
+def write_files(directory, names):
+    """Create files in the given directory. The content of each file is its
+    relative path.
+    """
+    for name in names:
+        filename = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'w') as f:
+            f.write(name)
+
+
+def test_multipart_body(tmpdir):
+    """Test encoding a file as multipart/form-data request body."""
+    filename = os.path.join(str(tmpdir), 'data.bin')
+    data = os.urandom(1000)
+    with open(filename, 'wb') as f:
+        f.write(data)
+    body = MultipartFile(filename, name='my "data".bin', chunk_size=300)
+    content = b''.join(body)
+    assert len(content) == len(body)
+    header = 'Content-Type: {}\r\n\r\n'.format(body.content_type)
+    message = email.message_from_bytes(
+        header.encode('utf-8') + content,
+        policy=email.policy.HTTP
+    )
+    parts = list(message.iter_parts())
+    assert len(parts) == 1
+    assert parts[0].get_param('name', header='Content-Disposition') == 'file'
+    assert parts[0].get_filename() == 'my %22data%22.bin'
+    assert parts[0].get_content() == data
+
+
+def test_multipart_progress(tmpdir):
+    """Test that the progress callback never reports more than the file
+    size.
+    """
+    filename = os.path.join(str(tmpdir), 'data.bin')
+    with open(filename, 'wb') as f:
+        f.write(b'x' * 1000)
+    progress = list()
+    body = MultipartFile(
+        filename,
+        chunk_size=300,
+        callback=lambda sent, total: progress.append((sent, total))
+    )
+    b''.join(body)
+    assert [sent for sent, _ in progress] == [300, 600, 900, 1000, 1000]
+    assert all(total == 1000 for _, total in progress)
+    # Empty files report zero progress once the body is complete.
+    filename = os.path.join(str(tmpdir), 'empty.bin')
+    open(filename, 'wb').close()
+    progress = list()
+    body = MultipartFile(
+        filename,
+        callback=lambda sent, total: progress.append((sent, total))
+    )
+    assert len(b''.join(body)) == len(body)
+    assert progress == [(0, 0)]
+
+
+def test_list_files(tmpdir):
+    """Test selecting files in a directory with include and exclude
+    patterns.
+    """
+    directory = str(tmpdir)
+    os.makedirs(os.path.join(directory, 'data', 'raw'))
+    for name in ['a.csv', 'b.txt', 'data/c.csv', 'data/raw/d.csv']:
+        open(os.path.join(directory, name), 'w').close()
+    files = list_files(directory)
+    assert [relpath for _, relpath in files] == [
+        'a.csv',
+        'b.txt',
+        'data/c.csv',
+        'data/raw/d.csv'
+    ]
+    assert os.path.isfile(files[2][0])
+    files = list_files(directory, include=['*.csv'], exclude=['data/raw/*'])
+    assert [relpath for _, relpath in files] == ['a.csv', 'data/c.csv']
+
+
+def test_upload_files(tmpdir):
+    """Test uploading multiple files in parallel."""
+    directory = str(tmpdir)
+    names = ['a.csv', 'b.txt', 'data/c.csv', 'data/raw/d.csv']
+    write_files(directory, names)
+    client, server = create_client()
+    progress = list()
+    result = client.upload_files(
+        'S1',
+        list_files(directory),
+        jobs=3,
+        callback=lambda body, count, total: progress.append((count, total))
+    )
+    # Results are in the order of the given files.
+    assert [f['name'] for f in result] == names
+    assert [f['size'] for f in result] == [len(name) for name in names]
+    assert server.files['data/raw/d.csv'] == b'data/raw/d.csv'
+    assert progress == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    assert client.session.pool_size >= 3
+
+
+def test_upload_directory_command(tmpdir, capsys):
+    """Test uploading the matching files in a directory with the files upload
+    command.
+    """
+    directory = str(tmpdir)
+    write_files(directory, ['a.csv', 'b.txt', 'data/c.csv', 'data/d.csv'])
+    client, server = create_client()
+    argv = ['files', 'upload', '-s', 'S1', '-d', directory, '-j', '2']
+    argv += ['--include', '*.csv', '--exclude', 'd.csv']
+    assert invoke(argv, client) == 0
+    assert sorted(server.files) == ['a.csv', 'data/c.csv']
+    out = capsys.readouterr().out
+    assert 'Uploaded 2 file(s)' in out
+    assert '| data/c.csv |' in out
+    # Raw output contains the handles of all uploaded files.
+    client, server = create_client()
+    argv = ['--raw', 'files', 'upload', '-s', 'S1', '-d', directory]
+    assert invoke(argv, client) == 0
+    doc = json.loads(capsys.readouterr().out)
+    assert [f['name'] for f in doc['files']] == [
+        'a.csv',
+        'b.txt',
+        'data/c.csv',
+        'data/d.csv'
+    ]
@@ -0,0 +1,122 @@
+# This file is part of the Reproducible Open Benchmarks for Data Analysis
+# Platform (ROB).
+#
+# Copyright (C) [2019-2020] NYU.
+#
+# ROB is free software; you can redistribute it and/or modify it under the
+# terms of the MIT License; see LICENSE file for more details.
+
+"""Unit tests for watching the state of runs."""
+
+import pytest
+import requests
+
+from robclient.protocol import STATE_PENDING, STATE_RUNNING, STATE_SUCCESS
+from robclient.watch import is_permanent, watch_runs
+
+
+class FakeSession(object):
+    """Session that only records the requested pool size."""
+    def __init__(self):
+        self.pool_size = 0
+
+    def ensure_pool_size(self, pool_size):
+        self.pool_size = max(self.pool_size, pool_size)
+
+
+class FakeClient(object):
+    """API client that returns a fixed sequence of states for each run. An
+    exception in the sequence is raised instead of returning a run handle.
+    """
+    def __init__(self, states):
+        self.session = FakeSession()
+        self.states = states
+
+    def get_run(self, run_id):
+        state = self.states[run_id].pop(0)
+        if isinstance(state, Exception):
+            raise state
+        return {'id': run_id, 'state': state}
+
+
+def http_error(status_code):
+    """Create an HTTP error for a response with the given status code."""
+    r = requests.Response()
+    r.status_code = status_code
+    return requests.HTTPError('{} error'.format(status_code), response=r)
+
+
+def watch(client, run_ids, **kwargs):
+    """Watch runs without waiting between polls."""
+    return watch_runs(client, run_ids, interval=0, max_interval=0, **kwargs)
+
+
+def test_watch_runs():
+    """Test polling runs until they are finished."""
+    client = FakeClient({
+        'R1': [STATE_PENDING, STATE_PENDING, STATE_RUNNING, STATE_SUCCESS],
+        'R2': [STATE_SUCCESS]
+    })
+    changes = list()
+    result = watch(
+        client,
+        ['R1', 'R2'],
+        callback=lambda r, old, new, run: changes.append((r, old, new)),
+        jobs=2
+    )
+    assert sorted(result) == ['R1', 'R2']
+    assert changes == [
+        ('R1', None, STATE_PENDING),
+        ('R2', None, STATE_SUCCESS),
+        ('R1', STATE_PENDING, STATE_RUNNING),
+        ('R1', STATE_RUNNING, STATE_SUCCESS)
+    ]
+    assert client.session.pool_size == 2
+
+
+def test_watch_runs_with_errors():
+    """Test that errors for one run do not stop watching the other runs."""
+    client = FakeClient({
+        'R1': [http_error(404)],
+        'R2': [http_error(502), requests.ConnectionError(), STATE_SUCCESS],
+        'R3': [STATE_RUNNING, STATE_SUCCESS]
+    })
+    errors = list()
+    result = watch(
+        client,
+        ['R1', 'R2', 'R3'],
+        error_callback=lambda r, ex, removed: errors.append((r, removed))
+    )
+    assert sorted(result) == ['R2', 'R3']
+    assert errors == [('R1', True), ('R2', False), ('R2', False)]
+    assert is_permanent(http_error(404))
+    assert not is_permanent(http_error(429))
+    assert not is_permanent(requests.ConnectionError())
+
+
+def test_watch_runs_with_callback_errors():
+    """Test that a failed download for a finished run does not stop watching
+    the other runs.
+    """
+    client = FakeClient({
+        'R1': [STATE_SUCCESS],
+        'R2': [STATE_RUNNING, STATE_SUCCESS]
+    })
+
+    def download(run_id, old_state, new_state, run):
+        if run_id == 'R1':
+            raise OSError('no space left on device')
+
+    errors = list()
+    result = watch(
+        client,
+        ['R1', 'R2'],
+        callback=download,
+        error_callback=lambda r, ex, removed: errors.append((r, removed))
+    )
+    assert list(result) == ['R2']
+    assert errors == [('R1', True)]
+    # Errors are raised if there is no error callback.
+    client = FakeClient({'R1': [STATE_SUCCESS]})
+    with pytest.raises(OSError):
+        watch(client, ['R1'], callback=download)